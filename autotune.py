@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+CPU Inference Autotune
+Find the Ollama runner options and concurrency that give the highest
+throughput on each endpoint, and store them as inference profiles (see
+inference_profiles.py) that every pipeline applies automatically.
+
+For each active endpoint and model, a short set of problems spread evenly
+over the input file is sent as a fixed workload, first with Ollama's
+defaults, then while searching num_thread and num_batch (at concurrency 1)
+and finally the number of requests in flight. Each parameter is searched
+over its candidates in order until SEARCH_PATIENCE candidates in a row fail
+to beat the fastest one; --grid tries every combination instead.
+
+Trials use a fixed seed and temperature, so every trial generates the same
+tokens and wall-clock times are directly comparable. num_ctx is not tuned:
+every trial request carries the num_ctx the token budget picks for it in the
+pipelines, so the profile is measured under production context sizes.
+"""
+
+import itertools
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from bench import summarize_samples
+from endpoints import get_active_endpoints, get_client
+from inference_profiles import save_profile, INFERENCE_PROFILES_FILE
+from input_index import load_input_index
+from preflight import run_preflight
+from token_budget import get_token_budget
+from traceWithThink import build_trace_prompt
+from translation import build_translation_prompt, build_trace_context, translation_models
+from warmup import KEEP_ALIVE
+
+# Try to import configuration, fall back to defaults if not found
+try:
+    from config import AUTOTUNE_NUM_THREAD, AUTOTUNE_NUM_BATCH, AUTOTUNE_CONCURRENCY, AUTOTUNE_NUM_PREDICT
+except ImportError:
+    AUTOTUNE_NUM_THREAD = [4, 8, 12, 16, 24, 32]  # num_thread candidates (physical cores are usually best)
+    AUTOTUNE_NUM_BATCH = [128, 256, 512, 1024]  # num_batch candidates
+    AUTOTUNE_CONCURRENCY = [1, 2, 3, 4]  # In-flight request candidates per endpoint
+    AUTOTUNE_NUM_PREDICT = 256  # Output tokens generated per trial request
+
+# Slower candidates in a row after which a parameter's search stops
+SEARCH_PATIENCE = 2
+# A candidate must beat the best wall time by this fraction to replace it
+MIN_IMPROVEMENT = 0.03
+# Sampling options that make every trial generate the same tokens
+TRIAL_OPTIONS = {'temperature': 0, 'seed': 42}
+
+
+def sample_problems(file_path: str, count: int) -> List[Dict[str, str]]:
+    """
+    Pick problems spread evenly over the input file.
+
+    Args:
+        file_path: Input JSONL file
+        count: Number of problems to pick
+
+    Returns:
+        List of {'title', 'content'} entries
+    """
+    index = load_input_index(file_path)
+    if not len(index):
+        return []
+    line_numbers = np.unique(np.linspace(0, len(index) - 1, min(count, len(index))).round().astype(np.int64))
+    entries = []
+    for _, line in index.read_lines(line_numbers):
+        entry = json.loads(line)
+        entries.append({'title': entry.get('title', ''), 'content': entry.get('content', '')})
+    return entries
+
+
+def build_workload(entries: List[Dict[str, str]], kind: str, size: int) -> List[str]:
+    """
+    Build the prompts of a tuning workload.
+
+    Translation prompts wrap the problem statements, which stand in for
+    English traces.
+
+    Args:
+        entries: Sampled problems
+        kind: "generation" or "translation"
+        size: Number of prompts (problems are repeated to reach it)
+
+    Returns:
+        List of prompts
+    """
+    if kind == 'generation':
+        prompts = [build_trace_prompt(entry['content']) for entry in entries]
+    else:
+        prompts = [build_translation_prompt(build_trace_context(entry['content'])) for entry in entries]
+    return list(itertools.islice(itertools.cycle(prompts), max(size, len(prompts))))
+
+
+def _timed_request(host: str, model: str, prompt: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Send one request straight to an endpoint and collect its token statistics."""
+    start_time = time.time()
+    response = get_client(host).generate(model=model, prompt=prompt, options=options, keep_alive=KEEP_ALIVE)
+    return {
+        'latency': time.time() - start_time,
+        'prompt_tokens': response.get('prompt_eval_count') or 0,
+        'prompt_seconds': (response.get('prompt_eval_duration') or 0) / 1e9,
+        'output_tokens': response.get('eval_count') or 0,
+        'output_seconds': (response.get('eval_duration') or 0) / 1e9,
+    }
+
+
+def run_trial(host: str, model: str, workload: List[Tuple[str, Dict[str, Any]]],
+              settings: Dict[str, Optional[int]], trial: int) -> Dict[str, Any]:
+    """
+    Send the workload to one endpoint with one set of options.
+
+    A one-token request with the options of the first workload request runs
+    first, so the model reload that a num_thread / num_batch change causes is
+    not timed. Every prompt gets a per-trial prefix so no trial reuses the
+    prompt cache of an earlier one.
+
+    Args:
+        host: Ollama server URL
+        model: Model name
+        workload: (prompt, options) pairs; options hold num_ctx, num_predict
+            and the fixed sampling options
+        settings: 'num_thread' and 'num_batch' (None keeps Ollama's default) and 'concurrency'
+        trial: Trial number, used in the prompt prefix
+
+    Returns:
+        summarize_samples figures for the trial
+    """
+    runner = {name: settings[name] for name in ('num_thread', 'num_batch') if settings.get(name)}
+    _timed_request(host, model, f"[trial {trial}]", {**workload[0][1], **runner, 'num_predict': 1})
+
+    def send(item):
+        i, (prompt, options) = item
+        return _timed_request(host, model, f"[trial {trial}.{i}]\n{prompt}", {**options, **runner})
+
+    start_time = time.time()
+    with ThreadPoolExecutor(max_workers=settings['concurrency']) as pool:
+        samples = list(pool.map(send, enumerate(workload)))
+    return summarize_samples(samples, time.time() - start_time)
+
+
+def _describe(settings: Dict[str, Optional[int]]) -> str:
+    """Format trial settings for the progress output."""
+    return (f"num_thread={settings.get('num_thread') or 'default'} "
+            f"num_batch={settings.get('num_batch') or 'default'} concurrency={settings['concurrency']}")
+
+
+def search_parameter(name: str, candidates: List[int], best: Tuple[Dict, Dict],
+                     evaluate: Callable[[Dict], Dict]) -> Tuple[Dict, Dict]:
+    """
+    Search one parameter while the others stay at their best values.
+
+    Candidates are tried in order; the search stops once SEARCH_PATIENCE
+    candidates in a row failed to beat the fastest one so far by
+    MIN_IMPROVEMENT, so near-ties go to the earlier (cheaper) candidate. The
+    fastest candidate replaces `best` only if it also beats it by MIN_IMPROVEMENT.
+
+    Args:
+        name: Setting to vary
+        candidates: Values to try, in order
+        best: (settings, summary) of the best trial so far
+        evaluate: Runs (or recalls) the trial of a settings dictionary
+
+    Returns:
+        (settings, summary) of the best trial afterwards
+    """
+    # Throughput is assumed to rise and then fall along the candidates, so the
+    # search ends once it is past the peak
+    peak, misses = None, 0
+    for value in candidates:
+        settings = {**best[0], name: value}
+        summary = evaluate(settings)
+        if peak is None or summary['wall_time'] < peak[1]['wall_time'] * (1 - MIN_IMPROVEMENT):
+            peak, misses = (settings, summary), 0
+        else:
+            misses += 1
+            if misses >= SEARCH_PATIENCE:
+                break
+    if peak is not None and peak[1]['wall_time'] < best[1]['wall_time'] * (1 - MIN_IMPROVEMENT):
+        return peak
+    return best
+
+
+def tune(host: str, model: str, kind: str, entries: List[Dict[str, str]], num_threads: List[int],
+         num_batches: List[int], concurrencies: List[int], num_predict: int = AUTOTUNE_NUM_PREDICT,
+         grid: bool = False) -> Dict[str, Any]:
+    """
+    Tune one model on one endpoint.
+
+    Args:
+        host: Ollama server URL
+        model: Model name
+        kind: "generation" or "translation", which selects the prompts
+        entries: Sampled problems
+        num_threads: num_thread candidates
+        num_batches: num_batch candidates
+        concurrencies: Concurrency candidates
+        num_predict: Output tokens per request
+        grid: Try every combination instead of searching one parameter at a time
+
+    Returns:
+        Dictionary with the 'best' and 'baseline' (settings, summary) pairs, the
+        number of 'trials' run and the 'num_ctx' values the workload used
+    """
+    # Each request carries the num_ctx the pipelines would send for its prompt
+    budget = get_token_budget()
+    workload = [(prompt, {**TRIAL_OPTIONS, 'num_predict': num_predict,
+                          'num_ctx': budget.request_options(prompt, kind)['num_ctx']})
+                for prompt in build_workload(entries, kind, max(concurrencies))]
+
+    results: Dict[Tuple, Dict] = {}
+
+    def evaluate(settings: Dict) -> Dict:
+        key = (settings.get('num_thread'), settings.get('num_batch'), settings['concurrency'])
+        if key not in results:
+            results[key] = run_trial(host, model, workload, settings, len(results) + 1)
+            summary = results[key]
+            print(f"   {_describe(settings)}: {summary['wall_time']:.2f}s, "
+                  f"prefill {summary['prefill_tokens_per_sec']:.1f} tok/s, "
+                  f"decode {summary['decode_tokens_per_sec']:.1f} tok/s")
+        return results[key]
+
+    defaults = {'num_thread': None, 'num_batch': None, 'concurrency': 1}
+    baseline = (defaults, evaluate(defaults))
+    best = baseline
+
+    if grid:
+        for num_thread, num_batch, concurrency in itertools.product(num_threads, num_batches, concurrencies):
+            settings = {'num_thread': num_thread, 'num_batch': num_batch, 'concurrency': concurrency}
+            summary = evaluate(settings)
+            if summary['wall_time'] < best[1]['wall_time'] * (1 - MIN_IMPROVEMENT):
+                best = (settings, summary)
+    else:
+        best = search_parameter('num_thread', num_threads, best, evaluate)
+        best = search_parameter('num_batch', num_batches, best, evaluate)
+        best = search_parameter('concurrency', [c for c in concurrencies if c > 1], best, evaluate)
+
+    return {'best': best, 'baseline': baseline, 'trials': len(results),
+            'num_ctx': sorted({options['num_ctx'] for _, options in workload})}
+
+
+def build_profile(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Turn a tuning result into the profile stored for an endpoint and model.
+
+    Args:
+        result: Return value of tune()
+
+    Returns:
+        Profile dictionary (options left at Ollama's default are omitted)
+    """
+    settings, summary = result['best']
+    profile = {name: settings[name] for name in ('num_thread', 'num_batch') if settings.get(name)}
+    profile.update({
+        'concurrency': settings['concurrency'],
+        'prefill_tokens_per_sec': round(summary['prefill_tokens_per_sec'], 1),
+        'decode_tokens_per_sec': round(summary['decode_tokens_per_sec'], 1),
+        'output_tokens_per_sec': round(summary['output_tokens_per_sec'], 1),
+        'speedup': round(result['baseline'][1]['wall_time'] / summary['wall_time'], 2),
+        'tuned_num_ctx': result['num_ctx'],
+        'tuned_at': datetime.now().isoformat(timespec='seconds'),
+    })
+    return profile
+
+
+def _parse_candidates(value: str) -> List[int]:
+    """Parse a comma-separated list of positive integers."""
+    return [int(part) for part in value.split(',') if part.strip()]
+
+
+def main(argv=None):
+    """
+    Main function for the inference autotuner.
+
+    Args:
+        argv: Command line arguments (default: sys.argv[1:])
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Tune Ollama num_thread, num_batch and concurrency per endpoint and model")
+    parser.add_argument("--input", default="leetcode.jsonl", help="Input JSONL file with LeetCode problems")
+    parser.add_argument("--num-entries", type=int, default=4, help="Problems in the tuning workload")
+    parser.add_argument("--model", default="qwen3:8b", help="Ollama model for trace generation")
+    parser.add_argument("--skip-translation", action="store_true", help="Only tune the generation model")
+    parser.add_argument("--hosts", type=lambda value: value.split(','), default=None,
+                        help="Comma-separated endpoints to tune (default: every endpoint that passes preflight)")
+    parser.add_argument("--num-thread", type=_parse_candidates, default=AUTOTUNE_NUM_THREAD,
+                        help="Comma-separated num_thread candidates")
+    parser.add_argument("--num-batch", type=_parse_candidates, default=AUTOTUNE_NUM_BATCH,
+                        help="Comma-separated num_batch candidates")
+    parser.add_argument("--concurrency", type=_parse_candidates, default=AUTOTUNE_CONCURRENCY,
+                        help="Comma-separated concurrency candidates")
+    parser.add_argument("--num-predict", type=int, default=AUTOTUNE_NUM_PREDICT,
+                        help="Output tokens generated per trial request")
+    parser.add_argument("--grid", action="store_true", help="Try every combination instead of an adaptive search")
+    parser.add_argument("--profiles", default=INFERENCE_PROFILES_FILE,
+                        help="Profiles file to update (default: INFERENCE_PROFILES_FILE from config)")
+    parser.add_argument("--dry-run", action="store_true", help="Report the best settings without saving them")
+
+    args = parser.parse_args(argv)
+    if not args.profiles:
+        args.dry_run = True
+
+    # The same model may serve both kinds; it is tuned once, on generation prompts
+    models = {args.model: 'generation'}
+    if not args.skip_translation:
+        for model in translation_models():
+            models.setdefault(model, 'translation')
+
+    entries = sample_problems(args.input, args.num_entries)
+    if not entries:
+        print(f"No entries found in {args.input}")
+        return
+
+    if not run_preflight(list(models)):
+        print("Preflight failed: no Ollama endpoint has the required models")
+        return
+    hosts = [host for host in get_active_endpoints() if not args.hosts or host in args.hosts]
+    if not hosts:
+        print(f"None of {args.hosts} passed preflight")
+        return
+
+    print("=" * 60)
+    print(f"Autotune: {len(entries)} problems, {len(hosts)} endpoint(s), models {', '.join(models)}")
+    print("=" * 60)
+
+    for host in hosts:
+        for model, kind in models.items():
+            print(f"{host} {model} ({kind}):")
+            result = tune(host, model, kind, entries, args.num_thread, args.num_batch, args.concurrency,
+                          args.num_predict, args.grid)
+            profile = build_profile(result)
+            print(f"   Best after {result['trials']} trials: {_describe(result['best'][0])} "
+                  f"({profile['speedup']:.2f}x Ollama defaults)")
+            if not args.dry_run:
+                save_profile(host, model, profile, args.profiles)
+
+    print("=" * 60)
+    if args.dry_run:
+        print("Dry run: no profiles saved")
+    else:
+        print(f"Profiles saved to {args.profiles}; pipelines apply them automatically")
+
+
+if __name__ == "__main__":
+    main()
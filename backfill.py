@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Version-Aware Backfill
+Recompute only the rows that are stale under the current configuration.
+
+Every row is stamped with the model and prompt-template hash that produced
+its English trace (generation_model, generation_prompt_hash) and its Hindi
+translation (translation_model, translation_prompt_hash); see versions.py.
+A row is stale when
+
+- generation: its generation model is not --model, or build_trace_prompt
+  has changed since it was generated. The trace is regenerated and then
+  translated again.
+- translation: its translation model is not in the translation cascade, or
+  a translation prompt has changed. Only the translation is redone.
+
+Rows stored before stamping have no stamps and count as stale. If their
+outputs are known to match the current configuration, `--adopt` stamps them
+with the current versions without recomputing anything.
+
+The backfill can be limited to a subset (--ids, --match, --status, --limit)
+and ordered by priority (--order). Each row is stamped when its new output is
+stored, so an interrupted backfill continues where it stopped when run again.
+A row whose regeneration fails keeps its previous trace.
+"""
+
+import argparse
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Any, List, Tuple
+
+from concurrency import get_controller
+from inference_profiles import apply_concurrency_profiles
+from logging_setup import setup_logging, with_fields, LOG_LEVELS
+from metrics import flush_metrics
+from preflight import run_preflight
+from search_index import SEARCH_TABLE, search_index_exists
+from tracing import span, start_tracing, write_trace
+from translation import translate_trace_parts, translation_models, translation_prompt_hash
+from traceWithThink import (
+    setup_database, generate_entry_trace, translate_entry_trace, update_generated_trace,
+    save_translation_result, generation_prompt_hash
+)
+from warmup import warm_up_models
+
+BACKFILL_STAGES = ("generation", "translation")
+
+# Priority orders: cheapest problems first, most expensive first, or by row ID
+BACKFILL_ORDERS = {
+    'id': 'id',
+    'newest-first': 'id DESC',
+    'shortest-first': 'LENGTH(content), id',
+    'longest-first': 'LENGTH(content) DESC, id',
+}
+
+_ID_RANGE = re.compile(r"^(\d+)(?:-(\d+))?$")
+
+
+def parse_ids(value: str) -> List[int]:
+    """
+    Parse a list of row IDs such as "12,40-45".
+
+    Args:
+        value: Comma-separated IDs and inclusive ID ranges
+
+    Returns:
+        The row IDs
+
+    Raises:
+        ValueError: If a part is not an ID or range (argparse reports it as invalid)
+    """
+    ids = []
+    for part in value.split(","):
+        match = _ID_RANGE.match(part.strip())
+        if not match:
+            raise ValueError(f"invalid ID or range '{part}'")
+        first, last = int(match.group(1)), int(match.group(2) or match.group(1))
+        ids.extend(range(first, last + 1))
+    return ids
+
+
+def stale_conditions(model_name: str) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+    """
+    Build the SQL conditions that select stale rows under the current configuration.
+
+    Args:
+        model_name: Ollama model traces should be generated with
+
+    Returns:
+        Mapping of stage to (WHERE condition, named parameters)
+    """
+    models = translation_models()
+    model_params = {f'translation_model_{i}': model for i, model in enumerate(models)}
+    return {
+        'generation': (
+            "(trace_en_with_think IS NOT NULL AND "
+            "(generation_model IS NOT :generation_model OR generation_prompt_hash IS NOT :generation_prompt_hash))",
+            {'generation_model': model_name, 'generation_prompt_hash': generation_prompt_hash()},
+        ),
+        'translation': (
+            "(translation_status = 'completed' AND (translation_model IS NULL OR "
+            f"translation_model NOT IN ({', '.join(':' + name for name in model_params)}) OR "
+            "translation_prompt_hash IS NOT :translation_prompt_hash))",
+            {**model_params, 'translation_prompt_hash': translation_prompt_hash()},
+        ),
+    }
+
+
+def find_stale_rows(conn, model_name: str, stages: Tuple[str, ...] = BACKFILL_STAGES, ids: List[int] = None,
+                    match: str = None, status: str = None, order: str = 'id',
+                    limit: int = None) -> List[Dict[str, Any]]:
+    """
+    Select the stale rows to backfill, in priority order.
+
+    Args:
+        conn: SQLite connection object
+        model_name: Ollama model traces should be generated with
+        stages: Stages to check ("generation", "translation")
+        ids: Only consider these row IDs
+        match: Only consider rows matching this full-text query (FTS5 syntax)
+        status: Only consider rows with this translation_status
+        order: Key of BACKFILL_ORDERS
+        limit: Maximum number of rows
+
+    Returns:
+        Rows with id, title, content, think_en, answer_en and 'stage', the
+        first stage that must be recomputed ("generation" or "translation")
+
+    Raises:
+        sqlite3.OperationalError: If `match` is not valid FTS5 syntax
+    """
+    conditions = stale_conditions(model_name)
+    params: Dict[str, Any] = {}
+    for stage in stages:
+        params.update(conditions[stage][1])
+    generation_stale = conditions['generation'][0] if 'generation' in stages else "0"
+    where = [f"({' OR '.join(conditions[stage][0] for stage in stages)})"]
+
+    if ids:
+        where.append(f"id IN ({', '.join(str(int(row_id)) for row_id in ids)})")
+    if match:
+        if not search_index_exists(conn):
+            raise ValueError("--match needs the full-text search index; run the pipeline once to create it")
+        where.append(f"id IN (SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :match)")
+        params['match'] = match
+    if status:
+        where.append("translation_status = :status")
+        params['status'] = status
+
+    query = f'''
+        SELECT id, title, content, think_en, answer_en, {generation_stale} AS generation_stale
+        FROM leetcode_reasoning
+        WHERE {' AND '.join(where)}
+        ORDER BY {BACKFILL_ORDERS[order]}
+    '''
+    if limit:
+        query += " LIMIT :limit"
+        params['limit'] = limit
+
+    return [{'id': row[0], 'title': row[1], 'content': row[2], 'think_en': row[3], 'answer_en': row[4],
+             'stage': 'generation' if row[5] else 'translation'}
+            for row in conn.execute(query, params)]
+
+
+def adopt_unstamped(conn, model_name: str, logger=None) -> Dict[str, int]:
+    """
+    Stamp rows stored before version stamping with the current versions, without recomputing them.
+
+    Only missing stamps are filled in; rows that already carry a stamp keep it.
+
+    Args:
+        conn: SQLite connection object
+        model_name: Ollama model the stored traces were generated with
+        logger: Logger instance for logging
+
+    Returns:
+        Dictionary with the number of 'generation' and 'translation' stamps added
+    """
+    models = translation_models()
+    generation = conn.execute('''
+        UPDATE leetcode_reasoning
+        SET generation_model = COALESCE(generation_model, ?),
+            generation_prompt_hash = COALESCE(generation_prompt_hash, ?)
+        WHERE trace_en_with_think IS NOT NULL AND (generation_model IS NULL OR generation_prompt_hash IS NULL)
+    ''', (model_name, generation_prompt_hash())).rowcount
+    # Without a record of the tier, the translation is credited to the last (largest) model
+    translation = conn.execute('''
+        UPDATE leetcode_reasoning
+        SET translation_model = COALESCE(translation_model, ?),
+            translation_tier = COALESCE(translation_tier, ?),
+            translation_prompt_hash = COALESCE(translation_prompt_hash, ?)
+        WHERE translation_status = 'completed' AND (translation_model IS NULL OR translation_prompt_hash IS NULL)
+    ''', (models[-1], len(models) - 1, translation_prompt_hash())).rowcount
+    conn.commit()
+
+    if logger:
+        logger.info(f"Stamped {generation} traces and {translation} translations with the current versions")
+    return {'generation': generation, 'translation': translation}
+
+
+def backfill(db_file: str, model_name: str = "qwen3:8b", stages: Tuple[str, ...] = BACKFILL_STAGES,
+             ids: List[int] = None, match: str = None, status: str = None, order: str = 'id',
+             limit: int = None, dry_run: bool = False, logger=None) -> Dict[str, int]:
+    """
+    Recompute the stale rows of a database.
+
+    Args:
+        db_file: Path to the SQLite database file
+        model_name: Ollama model for regenerating traces
+        stages: Stages to check ("generation", "translation")
+        ids: Only backfill these row IDs
+        match: Only backfill rows matching this full-text query
+        status: Only backfill rows with this translation_status
+        order: Priority order, a key of BACKFILL_ORDERS
+        limit: Maximum number of rows to backfill
+        dry_run: Only report the stale rows
+        logger: Logger instance for logging
+
+    Returns:
+        Dictionary with 'stale', 'regenerated', 'retranslated', 'skipped' and 'failed' counts
+    """
+    conn = setup_database(db_file, logger)
+    counts = {'stale': 0, 'regenerated': 0, 'retranslated': 0, 'skipped': 0, 'failed': 0}
+
+    rows = find_stale_rows(conn, model_name, stages, ids, match, status, order, limit)
+    counts['stale'] = len(rows)
+    by_stage = {stage: sum(row['stage'] == stage for row in rows) for stage in BACKFILL_STAGES}
+    if logger:
+        logger.info(f"Stale rows: {len(rows)} ({by_stage['generation']} to regenerate and retranslate, "
+                    f"{by_stage['translation']} to retranslate)",
+                    extra={'generation_prompt_hash': generation_prompt_hash(),
+                           'translation_prompt_hash': translation_prompt_hash()})
+
+    if dry_run or not rows:
+        if dry_run and logger:
+            for row in rows[:20]:
+                logger.info(f"  {row['id']:>6}  {row['stage']:<11}  {row['title']}")
+            if len(rows) > 20:
+                logger.info(f"  ... and {len(rows) - 20} more")
+        conn.close()
+        return counts
+
+    required_models = translation_models()
+    if by_stage['generation']:
+        required_models.insert(0, model_name)
+    if not run_preflight(required_models, logger):
+        if logger:
+            logger.error("Preflight failed: no Ollama endpoint has the required models")
+        conn.close()
+        return counts
+    apply_concurrency_profiles('generation', [model_name], logger)
+    apply_concurrency_profiles('translation', translation_models(), logger)
+    warm_up_models(required_models, logger=logger)
+
+    workers = max(get_controller('generation', logger).max_limit, get_controller('translation', logger).max_limit)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='backfill') as pool:
+        pending = {}
+        # Submitted in priority order; the pool starts them first-in, first-out
+        for row in rows:
+            row_logger = with_fields(logger, problem=row['title'], trace_id=row['id'], stage=row['stage'])
+            if row['stage'] == 'generation':
+                future = pool.submit(generate_entry_trace, row, model_name, row_logger)
+                pending[future] = ('generate', row, row_logger)
+            else:
+                future = pool.submit(translate_trace_parts, row['think_en'], row['answer_en'], row['title'],
+                                     logger=row_logger)
+                pending[future] = ('translate', row, row_logger)
+
+        while pending:
+            with span("wait_for_workers", "idle", pending=len(pending)):
+                done, _ = wait(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+            flush_metrics(conn)
+            for future in done:
+                step, row, row_logger = pending.pop(future)
+                result = future.result()
+
+                if step == 'generate':
+                    if result['trace_en_with_think'] is None:
+                        # The previous trace and translation stay in place
+                        counts['failed'] += 1
+                        if row_logger:
+                            row_logger.error(f"❌ Regeneration of trace ID {row['id']} failed: {result['error']}")
+                        continue
+                    update_generated_trace(conn, row['id'], result['trace_en_with_think'], row_logger,
+                                           model=result['generation_model'], prompt_hash=result['generation_prompt_hash'])
+                    counts['regenerated'] += 1
+                    future = pool.submit(translate_entry_trace, result, row_logger)
+                    pending[future] = ('translate', row, row_logger)
+                else:
+                    outcome = save_translation_result(conn, row['id'], result, row_logger)
+                    if outcome == 'completed':
+                        counts['retranslated'] += 1
+                        if row_logger:
+                            row_logger.info(f"✅ Trace ID {row['id']} backfilled")
+                    elif outcome == 'skipped':
+                        counts['skipped'] += 1
+                    else:
+                        counts['failed'] += 1
+
+    flush_metrics(conn)
+    conn.close()
+    return counts
+
+
+def main(argv=None):
+    """
+    Main function for the version-aware backfill.
+
+    Args:
+        argv: Command line arguments (default: sys.argv[1:])
+    """
+    parser = argparse.ArgumentParser(description="Recompute only rows that are stale under the current "
+                                                 "models and prompt templates")
+    parser.add_argument("--db", default="leetcode_traces.db", help="Database file path")
+    parser.add_argument("--model", default="qwen3:8b", help="Ollama model traces should be generated with")
+    parser.add_argument("--stage", choices=BACKFILL_STAGES,
+                        help="Only check this stage (default: both; stale traces are always retranslated)")
+    parser.add_argument("--ids", type=parse_ids, metavar="IDS", help="Only these row IDs, e.g. 12,40-45")
+    parser.add_argument("--match", metavar="QUERY", help="Only rows matching this full-text query (FTS5 syntax)")
+    parser.add_argument("--status", help="Only rows with this translation_status")
+    parser.add_argument("--order", choices=BACKFILL_ORDERS, default='id', help="Priority order of the backfill")
+    parser.add_argument("--limit", type=int, help="Backfill at most this many rows")
+    parser.add_argument("--dry-run", action="store_true", help="Only report the stale rows")
+    parser.add_argument("--adopt", action="store_true",
+                        help="Stamp unstamped rows with the current versions instead of recomputing them")
+    parser.add_argument("--log-level", type=str.upper, choices=LOG_LEVELS,
+                        help="Log verbosity (default: LOG_LEVEL from config)")
+    parser.add_argument("--trace", metavar="FILE", default=None,
+                        help="Write a Chrome/Perfetto trace-event timeline of the run to FILE (default: TRACE_FILE from config)")
+    args = parser.parse_args(argv)
+
+    logger = setup_logging('backfill', "Version-Aware Backfill", args.log_level)
+    start_tracing(args.trace)
+
+    if args.adopt:
+        conn = setup_database(args.db, logger)
+        adopt_unstamped(conn, args.model, logger)
+        conn.close()
+        return
+
+    start_time = time.time()
+    stages = (args.stage,) if args.stage else BACKFILL_STAGES
+    counts = backfill(args.db, args.model, stages, args.ids, args.match, args.status, args.order,
+                      args.limit, args.dry_run, logger)
+    elapsed_time = time.time() - start_time
+
+    if args.dry_run:
+        return
+    logger.info("=" * 60)
+    logger.info("BACKFILL COMPLETED", extra={**counts, 'elapsed': round(elapsed_time, 3)})
+    logger.info(f"Stale rows: {counts['stale']}")
+    logger.info(f"Regenerated: {counts['regenerated']}")
+    logger.info(f"Retranslated: {counts['retranslated']}")
+    logger.info(f"Skipped (nothing to translate): {counts['skipped']}")
+    logger.info(f"Failed (left stale): {counts['failed']}")
+    logger.info(f"Total execution time: {elapsed_time:.2f} seconds")
+    logger.info("=" * 60)
+    write_trace(logger)
+
+
+if __name__ == "__main__":
+    main()
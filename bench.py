@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Throughput Benchmark
+Send a small, fixed set of problems through trace generation and translation
+at a fixed concurrency level and report latency and tokens/sec.
+"""
+
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
+
+import model_calls
+from concurrency import get_controller
+from think_parser import split_think_response
+from traceWithThink import iter_leetcode_entries, build_trace_prompt
+from translation import (build_translation_prompt, build_trace_context, trace_segments, TRANSLATION_MODEL_NAME,
+                         TRANSLATE_PARTS, VALID_TRANSLATE_PARTS)
+
+
+def _percentile(values: List[float], q: float) -> float:
+    """Return the q-th percentile of a non-empty list (nearest rank)."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(math.ceil(q * len(ordered))) - 1))]
+
+
+def _timed_generate(model: str, prompt: str, kind: str) -> Dict[str, Any]:
+    """Send one request and collect its latency and token statistics."""
+    start_time = time.time()
+    response = model_calls.generate(model, prompt, kind)
+    return {
+        'latency': time.time() - start_time,
+        'response': response['response'],
+        'prompt_tokens': response.get('prompt_eval_count') or 0,
+        'prompt_seconds': (response.get('prompt_eval_duration') or 0) / 1e9,
+        'output_tokens': response.get('eval_count') or 0,
+        'output_seconds': (response.get('eval_duration') or 0) / 1e9,
+    }
+
+
+def summarize_samples(samples: List[Dict[str, Any]], wall_time: float) -> Dict[str, Any]:
+    """
+    Aggregate per-request samples into latency and throughput figures.
+
+    Args:
+        samples: Results of _timed_generate
+        wall_time: Wall-clock time of the whole batch in seconds
+
+    Returns:
+        Dictionary with latency percentiles and prefill/decode tokens per second
+    """
+    latencies = [sample['latency'] for sample in samples]
+    prompt_tokens = sum(sample['prompt_tokens'] for sample in samples)
+    prompt_seconds = sum(sample['prompt_seconds'] for sample in samples)
+    output_tokens = sum(sample['output_tokens'] for sample in samples)
+    output_seconds = sum(sample['output_seconds'] for sample in samples)
+
+    return {
+        'requests': len(samples),
+        'wall_time': wall_time,
+        'latency_p50': _percentile(latencies, 0.5),
+        'latency_p95': _percentile(latencies, 0.95),
+        'prefill_tokens_per_sec': prompt_tokens / prompt_seconds if prompt_seconds else 0.0,
+        'decode_tokens_per_sec': output_tokens / output_seconds if output_seconds else 0.0,
+        'output_tokens_per_sec': output_tokens / wall_time if wall_time else 0.0,
+    }
+
+
+def run_batch(model: str, prompts: List[str], kind: str, concurrency: int) -> Dict[str, Any]:
+    """
+    Send a batch of prompts at a fixed concurrency level.
+
+    Args:
+        model: Ollama model name
+        prompts: Prompts to send
+        kind: Request kind, e.g. "generation" or "translation"
+        concurrency: Number of requests in flight at once
+
+    Returns:
+        Dictionary with 'summary' figures and the raw 'samples'
+    """
+    get_controller(kind).pin(concurrency)
+
+    start_time = time.time()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(lambda prompt: _timed_generate(model, prompt, kind), prompts))
+    wall_time = time.time() - start_time
+
+    return {'summary': summarize_samples(samples, wall_time), 'samples': samples}
+
+
+def print_summary(title: str, summary: Dict[str, Any]) -> None:
+    """Print one benchmark summary block."""
+    print(f"{title}:")
+    print(f"   Requests: {summary['requests']} in {summary['wall_time']:.2f} seconds")
+    print(f"   Latency p50 / p95: {summary['latency_p50']:.2f}s / {summary['latency_p95']:.2f}s")
+    print(f"   Prefill: {summary['prefill_tokens_per_sec']:.1f} tokens/sec")
+    print(f"   Decode: {summary['decode_tokens_per_sec']:.1f} tokens/sec per request")
+    print(f"   Aggregate output: {summary['output_tokens_per_sec']:.1f} tokens/sec")
+
+
+def main(argv=None):
+    """
+    Main function for the throughput benchmark.
+
+    Args:
+        argv: Command line arguments (default: sys.argv[1:])
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark trace generation and translation throughput")
+    parser.add_argument("--input", default="leetcode.jsonl", help="Input JSONL file with LeetCode problems")
+    parser.add_argument("--num-entries", type=int, default=4, help="Number of problems to send")
+    parser.add_argument("--model", default="qwen3:8b", help="Ollama model for trace generation")
+    parser.add_argument("--translation-model", default=TRANSLATION_MODEL_NAME, help="Ollama model for translation")
+    parser.add_argument("--concurrency", type=int, default=1, help="Requests in flight at once")
+    parser.add_argument("--skip-translation", action="store_true", help="Only benchmark generation")
+    parser.add_argument("--parts", choices=VALID_TRANSLATE_PARTS, default=TRANSLATE_PARTS,
+                        help="Trace sections to translate (default: TRANSLATE_PARTS from config)")
+
+    args = parser.parse_args(argv)
+
+    entries = list(iter_leetcode_entries(args.input, args.num_entries))
+    if not entries:
+        print(f"No entries found in {args.input}")
+        return
+
+    print("=" * 60)
+    print(f"Benchmark: {len(entries)} problems at concurrency {args.concurrency}")
+    print("=" * 60)
+
+    generation = run_batch(args.model, [build_trace_prompt(entry['content']) for entry in entries],
+                           'generation', args.concurrency)
+    print_summary(f"Generation ({args.model})", generation['summary'])
+
+    if not args.skip_translation:
+        # The same sections the pipeline translates, one request per section
+        prompts = []
+        for sample in generation['samples']:
+            sections = split_think_response(sample['response'])
+            item = {'think_text': sections['think'], 'answer_text': sections['answer'], 'parts': args.parts}
+            prompts.extend(build_translation_prompt(build_trace_context(text)) for _, text in trace_segments(item))
+        if prompts:
+            translation = run_batch(args.translation_model, prompts, 'translation', args.concurrency)
+            print_summary(f"Translation ({args.translation_model}, parts: {args.parts})", translation['summary'])
+        else:
+            print(f"Translation: no non-empty '{args.parts}' sections to translate")
+
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
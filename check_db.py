@@ -7,7 +7,12 @@ including trace counts and translation progress.
 
 import sqlite3
 import sys
+import time
+from collections import deque
 from datetime import datetime
+from typing import Optional
+
+from search_index import search_index_exists, search_traces
 
 def check_database_status(db_file: str = "leetcode_traces.db"):
     """
@@ -87,6 +92,24 @@ def check_database_status(db_file: str = "leetcode_traces.db"):
             print(f"   {status}: {count} ({percentage:.1f}%)")
         print()
         
+        # Which translation cascade tier produced the completed rows
+        if 'translation_tier' in {col[1] for col in columns}:
+            cursor.execute('''
+                SELECT translation_tier, translation_model, COUNT(*)
+                FROM leetcode_reasoning
+                WHERE translation_status = 'completed'
+                GROUP BY translation_tier, translation_model
+                ORDER BY translation_tier
+            ''')
+            tier_counts = cursor.fetchall()
+            if tier_counts:
+                completed = sum(count for _, _, count in tier_counts)
+                print("🪜 Translation Tiers:")
+                for tier, model, count in tier_counts:
+                    label = f"tier {tier} ({model})" if tier is not None else "unrecorded"
+                    print(f"   {label}: {count} ({count / completed * 100:.1f}%)")
+                print()
+        
         # Get recent entries
         cursor.execute('''
             SELECT title, translation_status, created_at, translated_at
@@ -106,38 +129,42 @@ def check_database_status(db_file: str = "leetcode_traces.db"):
         
         print()
         
-        # Check for errors or issues
-        cursor.execute('''
-            SELECT COUNT(*) 
-            FROM leetcode_reasoning 
-            WHERE trace_hi_with_think LIKE 'Translation error:%' 
-            OR trace_hi_with_think LIKE 'Translation timeout:%'
-            OR trace_hi_with_think LIKE 'Translation request error:%'
-            OR trace_hi_with_think LIKE 'Unexpected translation error:%'
-        ''')
-        error_count = cursor.fetchone()[0]
+        # Check for recorded failures
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='failures'")
+        if cursor.fetchone():
+            cursor.execute('''
+                SELECT stage, error_class, COUNT(*), MAX(attempts)
+                FROM failures
+                GROUP BY stage, error_class
+                ORDER BY stage, COUNT(*) DESC
+            ''')
+            failure_counts = cursor.fetchall()
+        else:
+            failure_counts = []
         
-        if error_count > 0:
-            print(f"⚠️  Warning: {error_count} traces have translation errors")
+        if failure_counts:
+            error_count = sum(count for _, _, count, _ in failure_counts)
+            print(f"⚠️  Warning: {error_count} traces have recorded failures")
+            for stage, error_class, count, max_attempts in failure_counts:
+                print(f"   {stage}/{error_class}: {count} (up to {max_attempts} attempts)")
             
             # Show error details
             cursor.execute('''
-                SELECT title, trace_hi_with_think 
-                FROM leetcode_reasoning 
-                WHERE trace_hi_with_think LIKE 'Translation error:%' 
-                OR trace_hi_with_think LIKE 'Translation timeout:%'
-                OR trace_hi_with_think LIKE 'Translation request error:%'
-                OR trace_hi_with_think LIKE 'Unexpected translation error:%'
+                SELECT r.title, f.stage, f.last_error
+                FROM failures f JOIN leetcode_reasoning r ON r.id = f.trace_id
+                ORDER BY f.last_failed_at DESC
                 LIMIT 3
             ''')
             error_entries = cursor.fetchall()
             
             print("   Error examples:")
-            for title, error in error_entries:
+            for title, stage, error in error_entries:
+                error = error or ""
                 error_short = error[:80] + "..." if len(error) > 80 else error
-                print(f"   - {title}: {error_short}")
+                print(f"   - {title} ({stage}): {error_short}")
+            print("   Run `python cli.py retry-failed` to reprocess them.")
         else:
-            print("✅ No translation errors found")
+            print("✅ No failures recorded")
         
         conn.close()
         
@@ -192,18 +219,251 @@ def list_problems(db_file: str = "leetcode_traces.db", limit: int = 10):
     except Exception as e:
         print(f"Error listing problems: {e}")
 
-def main():
+def search_database(db_file: str = "leetcode_traces.db", query: str = "", limit: int = 10):
+    """
+    Search titles, problems and English/Hindi traces with the full-text index.
+    
+    Args:
+        db_file: Path to the SQLite database file
+        query: FTS5 query, e.g. 'segment tree', '"dynamic programming"' or 'trace_hi_with_think: शब्द'
+        limit: Number of results to show
+    """
+    try:
+        conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+    except sqlite3.Error as e:
+        print(f"❌ Database error: {e}")
+        return
+    
+    try:
+        if not search_index_exists(conn):
+            print("❌ Full-text search index not found.")
+            print("Run the pipeline once (python cli.py generate) to build it.")
+            return
+        
+        start_time = time.time()
+        results = search_traces(conn, query, limit)
+        elapsed_ms = (time.time() - start_time) * 1000
+        
+        print(f"\n🔍 Search: {query} ({len(results)} results in {elapsed_ms:.1f} ms)")
+        print("-" * 80)
+        for result in results:
+            print(f"{result['id']:<6} {result['title'][:50]:<50} {result['translation_status'] or '':<10} "
+                  f"relevance {-result['score']:.3f}")
+            print(f"       {' '.join(result['snippet'].split())}")
+    except sqlite3.OperationalError as e:
+        print(f"❌ Invalid search query: {e}")
+        print('   Put phrases and words with punctuation in double quotes, e.g. "two-pointer".')
+    finally:
+        conn.close()
+
+class StatusWatcher:
+    """
+    Incrementally maintained progress counters for --watch.
+    
+    After one initial pass, each refresh only reads rows past two
+    watermarks: rows with an id above the highest id seen (new problems) and
+    rows with a translated_at after the latest one seen (finished
+    translations, found through idx_leetcode_reasoning_translated_at). The
+    cost of a refresh therefore depends on the work done since the last
+    refresh, not on the size of the database. Changes that touch neither
+    watermark, such as retry-failed regenerating a trace in place, show up
+    after restarting the watch.
+    """
+    
+    def __init__(self, conn: sqlite3.Connection, window: float = 300.0):
+        self.conn = conn
+        self.window = window
+        # (poll time, traces generated, translations completed) per refresh
+        self.samples = deque()
+        
+        total, generated, translated, duplicates, last_id, last_translated_at = conn.execute('''
+            SELECT COUNT(*), COUNT(trace_en_with_think), COALESCE(SUM(translation_status = 'completed'), 0),
+                   COALESCE(SUM(translation_status = 'duplicate'), 0), COALESCE(MAX(id), 0), MAX(translated_at)
+            FROM leetcode_reasoning
+        ''').fetchone()
+        self.total = total
+        self.generated = generated
+        self.translated = translated
+        self.duplicates = duplicates
+        self.last_id = last_id
+        self.last_translated_at = str(last_translated_at or '')
+        # Rows with a trace still waiting for a (re-)translation
+        self.untranslated = set(row[0] for row in conn.execute('''
+            SELECT id FROM leetcode_reasoning
+            WHERE trace_en_with_think IS NOT NULL AND translation_status IN ('pending', 'invalid')
+        '''))
+    
+    def refresh(self) -> None:
+        """Read the rows past the watermarks and update the counters and throughput samples."""
+        generated = translated = 0
+        previous_last_id = self.last_id
+        
+        for row_id, status, has_trace, translated_at in self.conn.execute('''
+            SELECT id, translation_status, trace_en_with_think IS NOT NULL, translated_at
+            FROM leetcode_reasoning WHERE id > ? ORDER BY id
+        ''', (self.last_id,)).fetchall():
+            self.total += 1
+            self.last_id = row_id
+            if status == 'duplicate':
+                self.duplicates += 1
+            if has_trace:
+                generated += 1
+                if status == 'completed':
+                    translated += 1
+                else:
+                    self.untranslated.add(row_id)
+        
+        for row_id, status, translated_at in self.conn.execute('''
+            SELECT id, translation_status, translated_at
+            FROM leetcode_reasoning WHERE translated_at > ? ORDER BY translated_at
+        ''', (self.last_translated_at,)).fetchall():
+            self.last_translated_at = str(translated_at)
+            # Rows inserted since the last refresh were counted above
+            if row_id <= previous_last_id and status == 'completed' and row_id in self.untranslated:
+                self.untranslated.discard(row_id)
+                translated += 1
+        
+        self.generated += generated
+        self.translated += translated
+        now = time.time()
+        self.samples.append((now, generated, translated))
+        while len(self.samples) > 2 and now - self.samples[1][0] >= self.window:
+            self.samples.popleft()
+    
+    def rates(self) -> tuple:
+        """
+        Return the rolling throughput over the refreshes in the window.
+        
+        Returns:
+            Tuple of (traces generated per minute, translations completed per minute)
+        """
+        if len(self.samples) < 2:
+            return 0.0, 0.0
+        # The oldest sample only marks the start of the window
+        elapsed = self.samples[-1][0] - self.samples[0][0]
+        recent = list(self.samples)[1:]
+        generated = sum(sample[1] for sample in recent)
+        translated = sum(sample[2] for sample in recent)
+        return generated / elapsed * 60, translated / elapsed * 60
+
+def format_eta(minutes: Optional[float]) -> str:
+    """
+    Format an ETA given in minutes.
+    
+    Args:
+        minutes: Remaining minutes, or None if unknown
+    
+    Returns:
+        String such as "1h 05m", "12m 30s" or "unknown"
+    """
+    if minutes is None:
+        return "unknown"
+    seconds = int(minutes * 60)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+    return f"{seconds // 60}m {seconds % 60:02d}s"
+
+def estimate_eta(pending_translations: int, remaining_generations: int, generation_rate: float,
+                 translation_rate: float) -> Optional[float]:
+    """
+    Estimate the minutes until all remaining work is done.
+    
+    Args:
+        pending_translations: Stored traces still waiting for a translation
+        remaining_generations: Problems not generated yet
+        generation_rate: Traces generated per minute
+        translation_rate: Translations completed per minute
+    
+    Returns:
+        Remaining minutes, or None while a needed rate is still unknown
+    """
+    if not pending_translations and not remaining_generations:
+        return 0.0
+    if not translation_rate or (remaining_generations and not generation_rate):
+        return None
+    # Every remaining problem is translated after it is generated
+    translation_eta = (pending_translations + remaining_generations) / translation_rate
+    generation_eta = remaining_generations / generation_rate if remaining_generations else 0.0
+    return max(generation_eta, translation_eta)
+
+def watch_database(db_file: str = "leetcode_traces.db", interval: float = 5.0, expected_total: int = None,
+                   window: float = 300.0):
+    """
+    Show live progress, throughput and ETA until interrupted with Ctrl-C.
+    
+    Args:
+        db_file: Path to the SQLite database file
+        interval: Seconds between refreshes
+        expected_total: Number of problems the run will store (e.g. its --num-entries), for the generation ETA
+        window: Seconds of history used for the rolling throughput
+    """
+    try:
+        conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+        watcher = StatusWatcher(conn, window)
+    except sqlite3.Error as e:
+        print(f"❌ Database error: {e}")
+        return
+    
+    clear = "\033[2J\033[H" if sys.stdout.isatty() else ""
+    try:
+        while True:
+            watcher.refresh()
+            generation_rate, translation_rate = watcher.rates()
+            pending_translations = len(watcher.untranslated)
+            remaining_generations = max(expected_total - watcher.total, 0) if expected_total else 0
+            eta = estimate_eta(pending_translations, remaining_generations, generation_rate, translation_rate)
+            
+            total_str = f" of {expected_total}" if expected_total else ""
+            print(f"{clear}📡 {db_file} at {datetime.now().strftime('%H:%M:%S')} "
+                  f"(refresh every {interval:g}s, Ctrl-C to stop)")
+            print(f"   Problems stored:      {watcher.total}{total_str}")
+            print(f"   Traces generated:     {watcher.generated} ({generation_rate:.1f}/min)")
+            print(f"   Translations done:    {watcher.translated} ({translation_rate:.1f}/min)")
+            print(f"   Awaiting translation: {pending_translations}")
+            if watcher.duplicates:
+                print(f"   Near-duplicates:      {watcher.duplicates}")
+            print(f"   ETA:                  {format_eta(eta)}")
+            if not clear:
+                print()
+            sys.stdout.flush()
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    except sqlite3.Error as e:
+        print(f"❌ Database error: {e}")
+    finally:
+        conn.close()
+
+def main(argv=None):
     """
     Main function for the database status checker.
+    
+    Args:
+        argv: Command line arguments (default: sys.argv[1:])
     """
     import argparse
     
     parser = argparse.ArgumentParser(description="Check LeetCode traces database status")
     parser.add_argument("--db", default="leetcode_traces.db", help="Database file path")
     parser.add_argument("--list", action="store_true", help="List problems in database")
-    parser.add_argument("--limit", type=int, default=10, help="Number of problems to list")
+    parser.add_argument("--limit", type=int, default=10, help="Number of problems to list or search results to show")
+    parser.add_argument("--watch", action="store_true",
+                        help="Refresh progress, throughput and ETA continuously (Ctrl-C to stop)")
+    parser.add_argument("--interval", type=float, default=5.0, help="Seconds between --watch refreshes")
+    parser.add_argument("--total", type=int, default=None,
+                        help="Problems the running job will store (its --num-entries), for the --watch ETA")
+    parser.add_argument("--search", metavar="QUERY",
+                        help="Full-text search over titles, problems and English/Hindi traces (FTS5 syntax)")
+    
+    args = parser.parse_args(argv)
+    
+    if args.search:
+        search_database(args.db, args.search, args.limit)
+        return
     
-    args = parser.parse_args()
+    if args.watch:
+        watch_database(args.db, args.interval, args.total)
+        return
     
     # Check database status
     check_database_status(args.db)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+LeetCode Trace Pipeline CLI
+Single entry point for all pipeline workflows:
+
+    python cli.py generate [options]   # generate and translate traces
+    python cli.py translate [options]  # translate pending traces only
+    python cli.py retry-failed [options]  # reprocess failed rows only
+    python cli.py backfill [options]   # recompute rows stale under the current models/prompts
+    python cli.py status [options]     # database status (read-only)
+    python cli.py export [options]     # export traces to JSONL
+    python cli.py merge [options]      # merge shard databases
+    python cli.py audit [options]      # validate stored translations
+    python cli.py bench [options]      # throughput benchmark
+    python cli.py autotune [options]   # tune Ollama options per endpoint and model
+
+Each subcommand imports its module only when it runs, so read-only commands
+like `status` never load the Ollama client or configure log files.
+Run `python cli.py <command> --help` for the options of a subcommand.
+"""
+
+import sys
+from importlib import import_module
+
+# Subcommand -> (module providing main(argv), help text)
+COMMANDS = {
+    'generate': ('traceWithThink', "Generate reasoning traces and translate them to Hindi"),
+    'translate': ('translate_pipeline', "Translate pending English traces to Hindi"),
+    'retry-failed': ('retry_failed', "Reprocess only rows recorded in the failures table"),
+    'backfill': ('backfill', "Recompute rows whose model or prompt version is out of date"),
+    'status': ('check_db', "Show database status and translation progress"),
+    'export': ('export', "Export traces to JSONL"),
+    'merge': ('merge_shards', "Merge shard databases, deduplicating problems by content hash"),
+    'audit': ('translation_validator', "Validate stored translations and mark failures for re-translation"),
+    'bench': ('bench', "Benchmark generation and translation throughput"),
+    'autotune': ('autotune', "Tune num_thread, num_batch and concurrency per endpoint and model"),
+}
+
+
+def print_usage() -> None:
+    """Print the list of available subcommands."""
+    print("usage: cli.py <command> [options]")
+    print()
+    print("commands:")
+    for name, (_, help_text) in COMMANDS.items():
+        print(f"  {name:<12} {help_text}")
+
+
+def main(argv=None) -> int:
+    """
+    Dispatch to a subcommand.
+
+    Args:
+        argv: Command line arguments (default: sys.argv[1:])
+
+    Returns:
+        Process exit code
+    """
+    argv = sys.argv[1:] if argv is None else argv
+
+    if not argv or argv[0] in ("-h", "--help"):
+        print_usage()
+        return 0
+
+    command, command_args = argv[0], argv[1:]
+    if command not in COMMANDS:
+        print(f"cli.py: unknown command '{command}'")
+        print_usage()
+        return 2
+
+    module_name, _ = COMMANDS[command]
+    import_module(module_name).main(command_args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+"""
+Adaptive Concurrency Control
+AIMD (additive-increase / multiplicative-decrease) limits for in-flight
+Ollama requests, driven by observed latency, error rate and overload errors.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+import numpy as np
+
+from tracing import span, counter
+
+# Try to import configuration, fall back to defaults if not found
+try:
+    from config import CONCURRENCY_LIMITS
+except ImportError:
+    # Per request kind: starting, minimum and maximum number of in-flight requests
+    CONCURRENCY_LIMITS = {
+        "generation": {"initial": 1, "min": 1, "max": 4},
+        "translation": {"initial": 1, "min": 1, "max": 4},
+    }
+
+# Requests completed before each adjustment decision
+ADJUST_WINDOW = 20
+# Number of recent windows whose best p95 forms the latency baseline
+BASELINE_WINDOWS = 10
+# A window is "slow" when its p95 exceeds the baseline by this factor
+LATENCY_TOLERANCE = 1.5
+# A window is "failing" when more than this fraction of requests errored
+ERROR_TOLERANCE = 0.1
+# Multiplicative decrease applied on slow/failing windows and overloads
+DECREASE_FACTOR = 0.5
+
+OVERLOAD_STATUS_CODES = (429, 503)
+OVERLOAD_MESSAGES = ("overload", "server busy", "too many requests", "503", "429")
+
+
+def is_overload_error(error: Exception) -> bool:
+    """
+    Check whether an exception means the Ollama server is overloaded.
+
+    Args:
+        error: Exception raised by an Ollama call
+
+    Returns:
+        bool: True if the server reported overload or rate limiting
+    """
+    if getattr(error, 'status_code', None) in OVERLOAD_STATUS_CODES:
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in OVERLOAD_MESSAGES)
+
+
+def _p95(values) -> float:
+    """
+    Return the 95th percentile of a non-empty sequence.
+
+    The percentile is interpolated between neighbouring samples, so a single
+    outlier in a window moves it only part of the way towards the maximum.
+    """
+    return float(np.quantile(np.asarray(values, dtype=float), 0.95))
+
+
+class AdaptiveConcurrencyController:
+    """
+    Limit in-flight requests and adapt the limit with AIMD.
+
+    The limit grows by one after every window of requests in which the limit
+    was actually reached while p95 latency and error rate stayed flat, and is
+    halved when latency rises, errors increase or the server reports overload.
+    """
+
+    def __init__(self, name: str, initial: int = 1, min_limit: int = 1, max_limit: int = 4,
+                 window: int = ADJUST_WINDOW, logger=None):
+        self.name = name
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = min(self.max_limit, max(self.min_limit, initial))
+        self.window = window
+        self.logger = logger or logging.getLogger(__name__)
+
+        self.in_flight = 0
+        self._condition = threading.Condition()
+        self._latencies = []
+        self._requests = 0
+        self._errors = 0
+        self._saturated = False
+        self._window_p95s = deque(maxlen=BASELINE_WINDOWS)
+
+    @contextmanager
+    def slot(self):
+        """
+        Hold one concurrency slot for the duration of a request.
+
+        Yields:
+            A dictionary; set 'tokens' to normalise the recorded latency per token
+        """
+        with span("slot_wait", "idle", kind=self.name), self._condition:
+            while self.in_flight >= self.limit:
+                self._saturated = True
+                self._condition.wait()
+            self.in_flight += 1
+            if self.in_flight >= self.limit:
+                self._saturated = True
+            self._record_usage()
+
+        sample = {'tokens': None}
+        start_time = time.time()
+        try:
+            yield sample
+        except Exception as e:
+            self._release(time.time() - start_time, sample, error=e)
+            raise
+        else:
+            self._release(time.time() - start_time, sample)
+
+    def pin(self, limit: int) -> None:
+        """
+        Fix the limit at a single value, disabling adaptation (used for benchmarks).
+
+        Args:
+            limit: Number of in-flight requests to allow
+        """
+        with self._condition:
+            self.min_limit = self.max_limit = self.limit = max(1, limit)
+            self._record_usage()
+            self._condition.notify_all()
+
+    def raise_limits(self, limit: int) -> None:
+        """
+        Start from a known-good limit (e.g. a tuned inference profile).
+
+        The current limit and, if needed, the maximum are raised to `limit`;
+        AIMD keeps adapting from there.
+
+        Args:
+            limit: Number of in-flight requests known to perform well
+        """
+        with self._condition:
+            self.max_limit = max(self.max_limit, limit)
+            self.limit = max(self.limit, min(self.max_limit, limit))
+            self._record_usage()
+            self._condition.notify_all()
+
+    def _release(self, elapsed: float, sample: Dict, error: Optional[Exception] = None) -> None:
+        """Free a slot and feed the request outcome into the controller."""
+        with self._condition:
+            self.in_flight -= 1
+            self._record_usage()
+            if error is not None and is_overload_error(error):
+                self._decrease(f"overload error: {error}")
+            else:
+                self._requests += 1
+                if error is not None:
+                    # Failed requests count towards the error rate only; their
+                    # durations say nothing about latency per token
+                    self._errors += 1
+                else:
+                    tokens = sample.get('tokens')
+                    self._latencies.append(elapsed / tokens if tokens else elapsed)
+                if self._requests >= self.window:
+                    self._adjust()
+            self._condition.notify_all()
+
+    def _record_usage(self) -> None:
+        """Record in-flight requests and the limit as a trace counter (lock held)."""
+        counter(f"{self.name} concurrency", in_flight=self.in_flight, limit=self.limit)
+
+    def _adjust(self) -> None:
+        """Apply the AIMD rule to the window that just completed (lock held)."""
+        error_rate = self._errors / self._requests
+        p95 = _p95(self._latencies) if self._latencies else None
+        baseline = min(self._window_p95s) if self._window_p95s else p95
+        saturated = self._saturated
+
+        if p95 is not None:
+            self._window_p95s.append(p95)
+        self._reset_window()
+
+        if error_rate > ERROR_TOLERANCE:
+            self._decrease(f"error rate {error_rate:.0%}")
+        elif p95 is None:
+            return
+        elif p95 > baseline * LATENCY_TOLERANCE:
+            self._decrease(f"p95 latency {p95:.4g}s vs baseline {baseline:.4g}s")
+        elif saturated and self.limit < self.max_limit:
+            self._set_limit(self.limit + 1, f"p95 latency {p95:.4g}s, error rate {error_rate:.0%}")
+
+    def _reset_window(self) -> None:
+        """Start a new adjustment window (lock held)."""
+        self._latencies = []
+        self._requests = 0
+        self._errors = 0
+        self._saturated = False
+
+    def _decrease(self, reason: str) -> None:
+        """Multiplicatively decrease the limit (lock held)."""
+        new_limit = max(self.min_limit, int(self.limit * DECREASE_FACTOR))
+        self._reset_window()
+        if new_limit != self.limit:
+            self._set_limit(new_limit, reason)
+
+    def _set_limit(self, new_limit: int, reason: str) -> None:
+        """Change the limit and log the new concurrency level (lock held)."""
+        old_limit = self.limit
+        self.limit = new_limit
+        self._record_usage()
+        self.logger.info(f"{self.name} concurrency {old_limit} -> {new_limit} ({reason})")
+
+
+_controllers = {}
+_controllers_lock = threading.Lock()
+
+
+def get_controller(kind: str, logger=None) -> AdaptiveConcurrencyController:
+    """
+    Return the shared concurrency controller for a request kind.
+
+    Args:
+        kind: Request kind, e.g. "generation" or "translation"
+        logger: Logger instance used for concurrency changes
+
+    Returns:
+        The process-wide controller for that kind
+    """
+    with _controllers_lock:
+        if kind not in _controllers:
+            limits = CONCURRENCY_LIMITS.get(kind, {"initial": 1, "min": 1, "max": 1})
+            _controllers[kind] = AdaptiveConcurrencyController(
+                kind, limits["initial"], limits["min"], limits["max"], logger=logger
+            )
+        elif logger is not None:
+            _controllers[kind].logger = logger
+        return _controllers[kind]
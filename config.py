@@ -16,3 +16,78 @@ ENABLE_LOGGING = True
 
 # Ollama Configuration
 OLLAMA_HOST = "http://localhost:11434"  # Default Ollama server URL
+OLLAMA_HOSTS = [OLLAMA_HOST]  # All endpoints requests are spread across
+PREFLIGHT_TIMEOUT = 3.0  # Seconds to wait for each endpoint during preflight
+MODEL_INVENTORY_TTL = 30.0  # Seconds a fetched model list is reused
+
+# Think/Answer Split Configuration
+TRANSLATE_PARTS = "both"  # Which trace sections to translate: "think", "answer" or "both"
+
+# Token Budget Configuration (per-request num_ctx / num_predict sizing)
+TOKENIZER_PATH = None  # Optional tokenizer.json for exact token counts (requires 'tokenizers')
+MIN_NUM_CTX = 2048  # Smallest context window requested; num_ctx is this doubled until the request fits
+MAX_NUM_CTX = 32768  # Largest context window requested
+DEFAULT_NUM_PREDICT = {"generation": 8192, "translation": 8192}  # Used until enough outputs are observed
+OUTPUT_LENGTH_QUANTILE = 0.99  # Quantile of observed output lengths used for num_predict
+OUTPUT_LENGTH_HEADROOM = 1.25  # Multiplier applied on top of that quantile
+
+# Adaptive Concurrency Configuration (AIMD limits on in-flight Ollama requests)
+CONCURRENCY_LIMITS = {
+    "generation": {"initial": 1, "min": 1, "max": 4},
+    "translation": {"initial": 1, "min": 1, "max": 4},
+}
+
+# Hedged Request Configuration (duplicate late requests on another endpoint; needs 2+ OLLAMA_HOSTS)
+HEDGE_REQUESTS = False  # True enables hedging
+HEDGE_TRIGGER = "first_token"  # "first_token" hedges on a late first token, "completion" on a late response
+HEDGE_QUANTILE = 0.95  # A request is late after this quantile of recent latencies (per kind and model)
+HEDGE_BUDGET = 0.05  # Hedges allowed as a fraction of all requests
+
+# Inference Profile Configuration (CPU runner options tuned per endpoint and model; python cli.py autotune)
+INFERENCE_PROFILES_FILE = "inference_profiles.json"  # Written by autotune, applied to every request; None disables profiles
+AUTOTUNE_NUM_THREAD = [4, 8, 12, 16, 24, 32]  # num_thread candidates (physical cores are usually best)
+AUTOTUNE_NUM_BATCH = [128, 256, 512, 1024]  # num_batch candidates
+AUTOTUNE_CONCURRENCY = [1, 2, 3, 4]  # In-flight request candidates per endpoint
+AUTOTUNE_NUM_PREDICT = 256  # Output tokens generated per trial request
+
+# Scheduling Configuration (order in which problems are sent for generation)
+SCHEDULE_POLICY = "file"  # "file", "longest-first", "shortest-first" or "interleaved"
+SCHEDULE_WINDOW = 64  # Lookahead window of upcoming problems used for reordering
+
+# Near-Duplicate Detection Configuration (MinHash/LSH over problem content)
+DEDUP_MODE = "flag"  # "flag" records duplicate_of, "skip" also skips generation, "off" disables the check
+DEDUP_THRESHOLD = 0.85  # Estimated Jaccard similarity of word 3-grams
+
+# Time Budget Configuration (stop taking new problems in time to drain before the deadline)
+TIME_BUDGET = None  # Seconds per generation run, e.g. 8 * 3600; None means no deadline (override with --time-budget)
+DRAIN_RESERVE = 120.0  # Seconds kept free at the end of the budget for in-flight problems
+
+# Model Warm-up Configuration
+KEEP_ALIVE = "30m"  # How long Ollama keeps models resident after their last request
+
+# Translation Packing Configuration (short trace sections share one translation request)
+PACK_TRANSLATIONS = True  # False sends every section in its own request
+PACK_MAX_CHARS = 6000  # English characters per packed request
+PACK_MAX_SEGMENT_CHARS = 1500  # Longer sections are always translated on their own
+PACK_MAX_SEGMENTS = 8  # Sections per packed request
+
+# Translation Cascade Configuration (small model first, escalate outputs that fail validation)
+TRANSLATION_CASCADE = None  # e.g. ["qwen3:1.7b", "qwen3:8b"]; None uses TRANSLATION_MODEL_NAME only
+CASCADE_TIER_ATTEMPTS = 1  # Attempts per tier before escalating; the last tier gets MAX_RETRIES
+
+# Translation Validation Configuration (outputs outside these bounds are rejected and retried)
+MIN_DEVANAGARI_RATIO = 0.25  # Devanagari letters / (Devanagari + Latin letters)
+MIN_LENGTH_RATIO = 0.3  # Hindi chars / English chars, code blocks excluded
+MAX_LENGTH_RATIO = 3.0
+
+# Retry Configuration (python cli.py retry-failed)
+RETRY_CONCURRENCY = 1  # Requests in flight while retrying failed rows
+RETRY_MAX_ATTEMPTS = 5  # Give up on a row after this many failures
+RETRY_BACKOFF_BASE = 30.0  # Seconds before the first retry, doubled after every failure
+RETRY_BACKOFF_MAX = 1800.0  # Upper bound of the backoff delay in seconds
+
+# Logging Configuration
+LOG_LEVEL = "INFO"  # "DEBUG" adds per-request detail; "WARNING" for quiet production runs
+
+# Tracing Configuration
+TRACE_FILE = None  # e.g. "logs/trace.json"; open it in https://ui.perfetto.dev (override with --trace)
@@ -8,5 +8,97 @@ SARVAM_MODEL_NAME = "sarvam"  # Change this to your actual Sarvam model name in
 MAX_RETRIES = 3
 RETRY_DELAY = 2  # seconds between retries
 
+# Which sections of a '/think' trace to translate: "think", "answer" or "both"
+TRANSLATE_PARTS = "both"
+
+# Token budget: num_ctx / num_predict are chosen per request from the prompt size;
+# num_ctx is MIN_NUM_CTX doubled until the request fits (capped at MAX_NUM_CTX)
+TOKENIZER_PATH = None  # Optional tokenizer.json for exact token counts (requires 'tokenizers')
+MIN_NUM_CTX = 2048
+MAX_NUM_CTX = 32768
+DEFAULT_NUM_PREDICT = {"generation": 8192, "translation": 8192}
+OUTPUT_LENGTH_QUANTILE = 0.99
+OUTPUT_LENGTH_HEADROOM = 1.25
+
+# Adaptive concurrency: in-flight requests per kind start at "initial" and move
+# between "min" and "max" based on observed latency and errors
+CONCURRENCY_LIMITS = {
+    "generation": {"initial": 1, "min": 1, "max": 4},
+    "translation": {"initial": 1, "min": 1, "max": 4},
+}
+
+# Scheduling: order problems by estimated length within a lookahead window
+SCHEDULE_POLICY = "file"  # "file", "longest-first", "shortest-first" or "interleaved"
+SCHEDULE_WINDOW = 64
+
+# Ollama endpoints (requests rotate over those that pass preflight)
+OLLAMA_HOSTS = ["http://localhost:11434"]
+PREFLIGHT_TIMEOUT = 3.0  # seconds per endpoint
+MODEL_INVENTORY_TTL = 30.0  # seconds a fetched model list is reused
+
+# Near-duplicate problems (estimated similarity >= DEDUP_THRESHOLD) are flagged
+# with duplicate_of ("flag"), not generated at all ("skip"), or not checked ("off")
+DEDUP_MODE = "flag"
+DEDUP_THRESHOLD = 0.85
+
+# Wall-clock budget of a generation run in seconds (None = no deadline). New
+# problems stop DRAIN_RESERVE seconds (or one average problem) before the end
+TIME_BUDGET = None
+DRAIN_RESERVE = 120.0
+
+# Models are preloaded before each run and kept resident for this long
+KEEP_ALIVE = "30m"
+
+# Hedged requests (needs two or more OLLAMA_HOSTS): a request that is later
+# than the HEDGE_QUANTILE of recent latencies is duplicated on another
+# endpoint; the first attempt to stream ("first_token") or to finish
+# ("completion") wins and the other is cancelled. At most HEDGE_BUDGET of all
+# requests are hedged.
+HEDGE_REQUESTS = False
+HEDGE_TRIGGER = "first_token"
+HEDGE_QUANTILE = 0.95
+HEDGE_BUDGET = 0.05
+
+# CPU inference profiles: `python cli.py autotune` measures the num_thread,
+# num_batch and concurrency that give the best throughput on each endpoint and
+# model (searching the candidates below) and writes them to
+# INFERENCE_PROFILES_FILE; every pipeline applies them automatically
+INFERENCE_PROFILES_FILE = "inference_profiles.json"  # None disables profiles
+AUTOTUNE_NUM_THREAD = [4, 8, 12, 16, 24, 32]
+AUTOTUNE_NUM_BATCH = [128, 256, 512, 1024]
+AUTOTUNE_CONCURRENCY = [1, 2, 3, 4]
+AUTOTUNE_NUM_PREDICT = 256  # output tokens per trial request
+
+# Short trace sections are translated together in one request with numbered
+# [[n]] markers; misaligned or rejected sections fall back to individual calls
+PACK_TRANSLATIONS = True
+PACK_MAX_CHARS = 6000
+PACK_MAX_SEGMENT_CHARS = 1500
+PACK_MAX_SEGMENTS = 8
+
+# Translation model cascade, smallest first: each trace is translated by the
+# first model whose output passes validation. Earlier tiers get
+# CASCADE_TIER_ATTEMPTS attempts, the last one MAX_RETRIES. None translates
+# everything with TRANSLATION_MODEL_NAME.
+TRANSLATION_CASCADE = None  # e.g. ["qwen3:1.7b", "qwen3:8b"]
+CASCADE_TIER_ATTEMPTS = 1
+
+# Translation validation: outputs outside these bounds are rejected and retried
+MIN_DEVANAGARI_RATIO = 0.25
+MIN_LENGTH_RATIO = 0.3
+MAX_LENGTH_RATIO = 3.0
+
+# Failed rows are retried with `python cli.py retry-failed` using these settings
+RETRY_CONCURRENCY = 1
+RETRY_MAX_ATTEMPTS = 5
+RETRY_BACKOFF_BASE = 30.0  # seconds, doubled after every failure
+RETRY_BACKOFF_MAX = 1800.0
+
+# Logging verbosity ("DEBUG", "INFO", "WARNING" or "ERROR"); override per run with --log-level
+LOG_LEVEL = "INFO"
+
+# Write a Chrome/Perfetto trace-event timeline of each run to this file (None disables tracing)
+TRACE_FILE = None
+
 # Optional: You can also configure other models if you have multiple translation models
 # BACKUP_TRANSLATION_MODEL = "another-model-name"
@@ -0,0 +1,141 @@
+"""
+Database Writer
+A dedicated thread that owns the SQLite connection. sqlite3 connections
+cannot be shared across threads, and separate connections writing at the
+same time fail with "database is locked", so every insert and update goes
+through this one thread instead.
+
+Commands are functions that take the connection as their first argument (the
+existing helpers such as save_to_database and save_translation_result all
+do). They are sent over a queue and executed in order, and each submit()
+returns a Future with the function's result, e.g. the saved row IDs:
+
+    with DatabaseWriter("leetcode_traces.db", logger) as writer:
+        trace_id = writer.submit(save_to_database, [entry], logger).result()[0]
+
+Any number of worker threads can submit at once. Process-based workers send
+their results back to a thread of the parent process, which submits them.
+Buffered request metrics are flushed after every batch of commands.
+"""
+
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable
+
+from metrics import flush_metrics
+
+_STOP = object()
+
+
+class DatabaseWriter:
+    """
+    Run database commands on a single thread that owns the connection.
+
+    The connection is opened by setup_database on the writer thread, in WAL
+    mode so readers such as check_db are never blocked by the writer.
+    """
+
+    def __init__(self, db_file: str, logger=None):
+        self.db_file = db_file
+        self.logger = logger
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+        self._ready = Future()
+        self._closed = False
+        self._thread.start()
+        # Surface schema setup errors in the caller
+        self._ready.result()
+
+    def submit(self, func: Callable[..., Any], *args, **kwargs) -> Future:
+        """
+        Queue a command for the writer thread.
+
+        Args:
+            func: Function called as func(conn, *args, **kwargs) on the writer thread
+            *args, **kwargs: Remaining arguments for func
+
+        Returns:
+            Future resolving to func's return value (or raising its exception)
+        """
+        if self._closed:
+            raise RuntimeError("DatabaseWriter is closed")
+        future = Future()
+        self._queue.put((future, func, args, kwargs))
+        return future
+
+    def call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a command on the writer thread and wait for its result.
+
+        Args:
+            func: Function called as func(conn, *args, **kwargs) on the writer thread
+            *args, **kwargs: Remaining arguments for func
+
+        Returns:
+            func's return value
+        """
+        return self.submit(func, *args, **kwargs).result()
+
+    def close(self) -> None:
+        """Finish the queued commands, flush metrics and close the connection."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _run(self) -> None:
+        # Imported here: traceWithThink imports this module
+        from traceWithThink import setup_database
+
+        try:
+            conn = setup_database(self.db_file, self.logger)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+        except Exception as e:
+            self._ready.set_exception(e)
+            return
+        self._ready.set_result(None)
+
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            # Drain whatever else is queued, so metrics are flushed once per batch
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for command in batch:
+                if command is _STOP:
+                    stopping = True
+                    continue
+                self._execute(conn, *command)
+            flush_metrics(conn)
+
+        conn.close()
+        if self.logger:
+            self.logger.debug("Database writer closed")
+
+    def _execute(self, conn: sqlite3.Connection, future: Future, func: Callable[..., Any],
+                 args: tuple, kwargs: dict) -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            result = func(conn, *args, **kwargs)
+        except BaseException as e:
+            # Leave the connection usable for the next command
+            if conn.in_transaction:
+                conn.rollback()
+            future.set_exception(e)
+        else:
+            future.set_result(result)
@@ -0,0 +1,74 @@
+"""
+Ollama Endpoints
+The set of Ollama servers requests are spread across, with one cached
+client per host. Preflight narrows the set to endpoints that have the
+required models; requests then rotate over the remaining endpoints.
+"""
+
+import itertools
+import threading
+from functools import lru_cache
+from typing import List
+
+# Try to import configuration, fall back to defaults if not found
+try:
+    from config import OLLAMA_HOSTS
+except ImportError:
+    try:
+        from config import OLLAMA_HOST
+        OLLAMA_HOSTS = [OLLAMA_HOST]
+    except ImportError:
+        OLLAMA_HOSTS = ["http://localhost:11434"]
+
+_active_hosts = list(OLLAMA_HOSTS)
+_rotation = itertools.cycle(_active_hosts)
+_lock = threading.Lock()
+
+
+def get_endpoints() -> List[str]:
+    """Return every configured Ollama host."""
+    return list(OLLAMA_HOSTS)
+
+
+def get_active_endpoints() -> List[str]:
+    """Return the hosts requests are currently sent to."""
+    with _lock:
+        return list(_active_hosts)
+
+
+def set_active_endpoints(hosts: List[str]) -> None:
+    """
+    Restrict requests to a subset of the configured hosts.
+
+    Args:
+        hosts: Hosts that passed preflight (ignored if empty)
+    """
+    global _active_hosts, _rotation
+    if not hosts:
+        return
+    with _lock:
+        _active_hosts = list(hosts)
+        _rotation = itertools.cycle(_active_hosts)
+
+
+def next_endpoint() -> str:
+    """Return the next active host in round-robin order."""
+    with _lock:
+        return next(_rotation)
+
+
+@lru_cache(maxsize=None)
+def get_client(host: str):
+    """
+    Return a cached Ollama client for a host.
+
+    Args:
+        host: Ollama server URL
+
+    Returns:
+        ollama.Client bound to that host
+    """
+    # Imported on first use: the client library is slow to import and most
+    # read-only entry points never send a request
+    import ollama
+    return ollama.Client(host=host)
@@ -0,0 +1,270 @@
+"""
+Run Estimator
+Predict generation/translation time, token counts and database growth for a
+slice of the input before launching it, using per-request timings recorded
+in the request_metrics table by earlier runs.
+"""
+
+import math
+import sqlite3
+from typing import Dict, Any, Iterable, Optional
+
+from metrics import least_squares_from_sums
+from scheduling import OutputLengthPredictor
+from token_budget import estimate_tokens, DEFAULT_OUTPUT_RATIO
+
+# z-score for the reported two-sided 90% confidence bounds
+CONFIDENCE_Z = 1.645
+
+# Approximate prompt template overhead in tokens
+GENERATION_PROMPT_TOKENS = 70
+TRANSLATION_PROMPT_TOKENS = 90
+
+# Fallbacks used when a database has no history yet (seconds per request)
+DEFAULT_REQUEST_SECONDS = {"generation": 20.0, "translation": 10.0}
+DEFAULT_RELATIVE_ERROR = 0.5
+DEFAULT_BYTES_PER_OUTPUT_TOKEN = 12
+
+# Text columns whose stored size makes up the per-row database growth
+STORED_TEXT_COLUMNS = ('title', 'content', 'trace_en_with_think', 'trace_hi_with_think',
+                       'think_en', 'answer_en', 'think_hi', 'answer_hi')
+
+
+def _table_columns(conn: sqlite3.Connection, table: str) -> set:
+    """Return the column names of a table (empty if the table doesn't exist)."""
+    cursor = conn.cursor()
+    cursor.execute(f"PRAGMA table_info({table})")
+    return {row[1] for row in cursor.fetchall()}
+
+
+def fit_request_durations(conn: sqlite3.Connection, kind: str) -> Dict[str, Any]:
+    """
+    Fit request duration against total tokens for one request kind.
+
+    Only samples taken at the lowest observed concurrency level are used, so
+    the fit approximates uncontended per-request latency.
+
+    Args:
+        conn: SQLite connection object
+        kind: Request kind, e.g. "generation" or "translation"
+
+    Returns:
+        Least-squares fit dictionary (see metrics.least_squares_from_sums)
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT COUNT(*), SUM(x), SUM(y), SUM(x * x), SUM(x * y), SUM(y * y)
+        FROM (
+            SELECT COALESCE(prompt_tokens, 0) + COALESCE(output_tokens, 0) AS x, duration AS y
+            FROM request_metrics
+            WHERE kind = ? AND success = 1
+              AND concurrency = (SELECT MIN(concurrency) FROM request_metrics WHERE kind = ? AND success = 1)
+        )
+    ''', (kind, kind))
+    return least_squares_from_sums(*cursor.fetchone())
+
+
+def concurrency_slowdown(conn: sqlite3.Connection, kind: str, concurrency: int) -> float:
+    """
+    Estimate how much slower each request gets at a concurrency level.
+
+    Args:
+        conn: SQLite connection object
+        kind: Request kind, e.g. "generation" or "translation"
+        concurrency: Concurrency level the run will use
+
+    Returns:
+        Ratio of per-token latency at that level to the lowest observed level
+        (uses the nearest observed level; 1.0 if there is no history)
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT concurrency, SUM(duration) / SUM(COALESCE(prompt_tokens, 0) + COALESCE(output_tokens, 0))
+        FROM request_metrics
+        WHERE kind = ? AND success = 1 AND COALESCE(prompt_tokens, 0) + COALESCE(output_tokens, 0) > 0
+        GROUP BY concurrency
+        ORDER BY concurrency
+    ''', (kind,))
+    levels = cursor.fetchall()
+    if not levels:
+        return 1.0
+
+    base_latency = levels[0][1]
+    nearest = min(levels, key=lambda level: abs(level[0] - concurrency))
+    return max(1.0, nearest[1] / base_latency) if base_latency else 1.0
+
+
+def _interval(value: float, spread: float) -> Dict[str, float]:
+    """Build a point estimate with lower/upper confidence bounds."""
+    return {'estimate': value, 'low': max(0.0, value - spread), 'high': value + spread}
+
+
+def estimate_run(conn: Optional[sqlite3.Connection], entries: Iterable[Dict[str, Any]], concurrency: int,
+                 translate_parts: str = "both", logger=None) -> Dict[str, Any]:
+    """
+    Estimate time, tokens and database growth for a slice of problems.
+
+    Args:
+        conn: Read-only SQLite connection to a database with history (or None)
+        entries: Iterable of entry dictionaries for the slice
+        concurrency: Concurrency level the run will use
+        translate_parts: Which trace sections will be translated
+        logger: Logger instance for logging
+
+    Returns:
+        Dictionary with per-stage estimates and 90% confidence bounds
+    """
+    trace_columns = _table_columns(conn, 'leetcode_reasoning') if conn is not None else set()
+    has_traces = bool(trace_columns)
+    # Databases from before the think/answer split have no token counts to learn from
+    has_token_counts = 'think_token_count' in trace_columns
+    has_metrics = conn is not None and bool(_table_columns(conn, 'request_metrics'))
+
+    predictor = OutputLengthPredictor()
+    think_fraction = 0.8
+    if has_token_counts:
+        predictor.fit_from_database(conn, logger)
+        cursor = conn.cursor()
+        cursor.execute('SELECT SUM(think_token_count), SUM(answer_token_count) FROM leetcode_reasoning')
+        think_total, answer_total = cursor.fetchone()
+        if think_total or answer_total:
+            think_fraction = (think_total or 0) / ((think_total or 0) + (answer_total or 0))
+
+    # Per-problem features of the slice
+    problems = 0
+    generation_prompt_tokens = 0
+    generation_output_tokens = 0.0
+    for entry in entries:
+        problems += 1
+        generation_prompt_tokens += estimate_tokens(entry.get('content', '')) + GENERATION_PROMPT_TOKENS
+        generation_output_tokens += predictor.predict(len(entry.get('content', '')))
+
+    translated_fraction = {"think": think_fraction, "answer": 1 - think_fraction, "both": 1.0}[translate_parts]
+    translation_requests = problems * (2 if translate_parts == "both" else 1)
+    translation_prompt_tokens = generation_output_tokens * translated_fraction + \
+        translation_requests * TRANSLATION_PROMPT_TOKENS
+
+    translation_ratio = DEFAULT_OUTPUT_RATIO
+    if has_metrics:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT SUM(output_tokens) * 1.0 / SUM(prompt_tokens)
+            FROM request_metrics
+            WHERE kind = 'translation' AND success = 1 AND prompt_tokens > 0
+        ''')
+        observed_ratio = cursor.fetchone()[0]
+        if observed_ratio:
+            translation_ratio = observed_ratio
+    translation_output_tokens = translation_prompt_tokens * translation_ratio
+
+    stages = {}
+    stage_inputs = {
+        'generation': (problems, generation_prompt_tokens, generation_output_tokens),
+        'translation': (translation_requests, translation_prompt_tokens, translation_output_tokens),
+    }
+    for kind, (requests, prompt_tokens, output_tokens) in stage_inputs.items():
+        fit = fit_request_durations(conn, kind) if has_metrics else {'n': 0}
+        total_tokens = prompt_tokens + output_tokens
+
+        if fit['n'] >= 3:
+            sequential = requests * fit['intercept'] + fit['slope'] * total_tokens
+            spread = CONFIDENCE_Z * math.sqrt(requests) * (fit['residual_std'] or 0.0)
+            if kind == 'generation' and predictor.residual_std:
+                # Uncertainty of the predicted output length feeds into the time estimate
+                token_spread = CONFIDENCE_Z * math.sqrt(requests) * predictor.residual_std
+                spread = math.sqrt(spread ** 2 + (fit['slope'] * token_spread) ** 2)
+            slowdown = concurrency_slowdown(conn, kind, concurrency)
+            source = f"{fit['n']} recorded requests"
+        else:
+            sequential = requests * DEFAULT_REQUEST_SECONDS[kind]
+            spread = sequential * DEFAULT_RELATIVE_ERROR
+            slowdown = 1.0
+            source = "defaults (no recorded requests)"
+
+        wall_factor = slowdown / max(1, concurrency)
+        stages[kind] = {
+            'requests': requests,
+            'prompt_tokens': int(prompt_tokens),
+            'output_tokens': int(output_tokens),
+            'seconds': _interval(sequential * wall_factor, spread * wall_factor),
+            'source': source,
+        }
+
+    # Database growth from the average stored row size
+    growth = None
+    if has_traces:
+        cursor = conn.cursor()
+        row_bytes = " + ".join(f"COALESCE(LENGTH(CAST({column} AS BLOB)), 0)"
+                               for column in STORED_TEXT_COLUMNS if column in trace_columns)
+        cursor.execute(f'''
+            SELECT COUNT(*), SUM(b), SUM(b * b)
+            FROM (SELECT {row_bytes} AS b FROM leetcode_reasoning)
+        ''')
+        rows, sum_bytes, sum_squares = cursor.fetchone()
+        if rows:
+            mean = sum_bytes / rows
+            std = math.sqrt(max(0.0, sum_squares / rows - mean ** 2))
+            growth = _interval(problems * mean, CONFIDENCE_Z * math.sqrt(problems) * std)
+    if growth is None:
+        bytes_estimate = (generation_output_tokens + translation_output_tokens) * DEFAULT_BYTES_PER_OUTPUT_TOKEN
+        growth = _interval(bytes_estimate, bytes_estimate * DEFAULT_RELATIVE_ERROR)
+
+    total_seconds = {
+        bound: stages['generation']['seconds'][bound] + stages['translation']['seconds'][bound]
+        for bound in ('estimate', 'low', 'high')
+    }
+
+    return {
+        'problems': problems,
+        'concurrency': concurrency,
+        'translate_parts': translate_parts,
+        'stages': stages,
+        'total_seconds': total_seconds,
+        'db_growth_bytes': growth,
+    }
+
+
+def _format_duration(seconds: float) -> str:
+    """Format seconds as hours/minutes for the report."""
+    hours, remainder = divmod(int(round(seconds)), 3600)
+    minutes, secs = divmod(remainder, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m"
+    if minutes:
+        return f"{minutes}m {secs:02d}s"
+    return f"{secs}s"
+
+
+def print_estimate(estimate: Dict[str, Any]) -> None:
+    """
+    Print a run estimate in a human-readable form.
+
+    Args:
+        estimate: Dictionary returned by estimate_run
+    """
+    print("=" * 60)
+    print("Run Estimate (dry run - no requests sent)")
+    print("=" * 60)
+    print(f"Problems in slice: {estimate['problems']}")
+    print(f"Concurrency: {estimate['concurrency']}")
+    print(f"Translated parts: {estimate['translate_parts']}")
+    print()
+
+    for kind, stage in estimate['stages'].items():
+        seconds = stage['seconds']
+        print(f"{kind.capitalize()}:")
+        print(f"   Requests: {stage['requests']}")
+        print(f"   Prompt tokens: ~{stage['prompt_tokens']:,}")
+        print(f"   Output tokens: ~{stage['output_tokens']:,}")
+        print(f"   Time: {_format_duration(seconds['estimate'])} "
+              f"(90% range {_format_duration(seconds['low'])} - {_format_duration(seconds['high'])})")
+        print(f"   Based on: {stage['source']}")
+        print()
+
+    total = estimate['total_seconds']
+    growth = estimate['db_growth_bytes']
+    print(f"Total time: {_format_duration(total['estimate'])} "
+          f"(90% range {_format_duration(total['low'])} - {_format_duration(total['high'])})")
+    print(f"Database growth: {growth['estimate'] / 1e6:.1f} MB "
+          f"(90% range {growth['low'] / 1e6:.1f} - {growth['high'] / 1e6:.1f} MB)")
+    print("=" * 60)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Trace Exporter
+Export stored traces from the database to JSONL for training or review.
+"""
+
+import json
+import sqlite3
+import sys
+
+# Columns written for every exported row, in output order
+EXPORT_COLUMNS = (
+    'id', 'title', 'content', 'trace_en_with_think', 'think_en', 'answer_en',
+    'trace_hi_with_think', 'think_hi', 'answer_hi', 'translation_status',
+    'translation_model', 'translation_tier', 'created_at', 'translated_at'
+)
+
+
+def export_traces(db_file: str = "leetcode_traces.db", output_file: str = "-",
+                  status: str = None, limit: int = None) -> int:
+    """
+    Stream traces from the database into a JSONL file.
+
+    Rows are read with a cursor and written one at a time, so memory use does
+    not grow with the size of the database.
+
+    Args:
+        db_file: Path to the SQLite database file
+        output_file: Output JSONL path, or "-" for standard output
+        status: Only export rows with this translation_status (default: all)
+        limit: Maximum number of rows to export (default: all)
+
+    Returns:
+        Number of rows exported
+    """
+    conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+    cursor = conn.cursor()
+
+    cursor.execute("PRAGMA table_info(leetcode_reasoning)")
+    available = {row[1] for row in cursor.fetchall()}
+    columns = [column for column in EXPORT_COLUMNS if column in available]
+
+    query = f"SELECT {', '.join(columns)} FROM leetcode_reasoning"
+    params = []
+    if status:
+        query += " WHERE translation_status = ?"
+        params.append(status)
+    query += " ORDER BY id ASC"
+    if limit:
+        query += " LIMIT ?"
+        params.append(limit)
+
+    output = sys.stdout if output_file == "-" else open(output_file, 'w', encoding='utf-8')
+    count = 0
+    try:
+        for row in cursor.execute(query, params):
+            output.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n")
+            count += 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        conn.close()
+
+    return count
+
+
+def main(argv=None):
+    """
+    Main function for the trace exporter.
+
+    Args:
+        argv: Command line arguments (default: sys.argv[1:])
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export LeetCode traces to JSONL")
+    parser.add_argument("--db", default="leetcode_traces.db", help="Database file path")
+    parser.add_argument("--output", "-o", default="-", help="Output JSONL file ('-' for stdout)")
+    parser.add_argument("--status", default=None, help="Only export rows with this translation status")
+    parser.add_argument("--limit", type=int, default=None, help="Maximum number of rows to export")
+
+    args = parser.parse_args(argv)
+
+    count = export_traces(args.db, args.output, args.status, args.limit)
+    if args.output != "-":
+        print(f"Exported {count} traces to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
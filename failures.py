@@ -0,0 +1,231 @@
+"""
+Failure Queue
+Generation and translation failures are recorded in a dedicated `failures`
+table instead of being written into the data columns. Each row keeps the
+stage that failed, a coarse error class, how many times the trace has failed
+and the last error message. The data columns of a failed trace stay NULL, and
+`python cli.py retry-failed` reprocesses exactly these rows.
+"""
+
+import sqlite3
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Union
+
+from translation import TRANSLATION_ERROR_PREFIXES
+
+FAILURE_STAGES = ("generation", "translation")
+
+# Checked in order; the first class with a matching marker wins
+ERROR_CLASS_MARKERS = (
+    ('validation', ("invalid translation response", "failed validation")),
+    ('overload', ("overloaded", "too many requests", "server busy", "503", "429")),
+    ('timeout', ("timed out", "timeout")),
+    ('connection', ("connection", "refused", "unreachable", "name or service not known")),
+    ('not_found', ("not found", "404")),
+    ('empty_response', ("empty response",)),
+)
+
+# Error string that older versions stored in trace_en_with_think (translation
+# errors were stored in trace_hi_with_think with TRANSLATION_ERROR_PREFIXES)
+LEGACY_GENERATION_ERROR_PREFIX = "Error generating WITH THINK reasoning trace"
+
+
+def ensure_failures_table(conn: sqlite3.Connection) -> None:
+    """
+    Create the failures table if it doesn't exist.
+
+    Args:
+        conn: SQLite connection object
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS failures (
+            trace_id INTEGER NOT NULL,
+            stage TEXT NOT NULL,
+            error_class TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 1,
+            last_error TEXT,
+            first_failed_at TIMESTAMP,
+            last_failed_at TIMESTAMP,
+            PRIMARY KEY (trace_id, stage)
+        )
+    ''')
+
+
+def classify_error(error: Union[Exception, str, None]) -> str:
+    """
+    Map an exception or error message to a coarse error class.
+
+    Args:
+        error: Exception raised by a model call, or an error message
+
+    Returns:
+        One of the ERROR_CLASS_MARKERS classes, or 'model_error'
+    """
+    message = str(error or "").lower()
+    for error_class, markers in ERROR_CLASS_MARKERS:
+        if any(marker in message for marker in markers):
+            return error_class
+    return 'model_error'
+
+
+def record_failure(conn: sqlite3.Connection, trace_id: int, stage: str, error: Union[Exception, str],
+                   error_class: Optional[str] = None, commit: bool = True) -> None:
+    """
+    Record a failure of one stage of a trace, incrementing its attempt count.
+
+    Args:
+        conn: SQLite connection object
+        trace_id: ID of the leetcode_reasoning row
+        stage: "generation" or "translation"
+        error: Exception or error message
+        error_class: Error class (default: classified from the error)
+        commit: Commit immediately
+    """
+    if stage not in FAILURE_STAGES:
+        raise ValueError(f"Invalid failure stage '{stage}', expected one of {FAILURE_STAGES}")
+
+    now = datetime.now()
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO failures (trace_id, stage, error_class, attempts, last_error, first_failed_at, last_failed_at)
+        VALUES (?, ?, ?, 1, ?, ?, ?)
+        ON CONFLICT (trace_id, stage) DO UPDATE SET
+            error_class = excluded.error_class,
+            attempts = attempts + 1,
+            last_error = excluded.last_error,
+            last_failed_at = excluded.last_failed_at
+    ''', (trace_id, stage, error_class or classify_error(error), str(error), now, now))
+
+    if commit:
+        conn.commit()
+
+
+def clear_failure(conn: sqlite3.Connection, trace_id: int, stage: str, commit: bool = True) -> None:
+    """
+    Remove a failure once its stage has succeeded.
+
+    Args:
+        conn: SQLite connection object
+        trace_id: ID of the leetcode_reasoning row
+        stage: "generation" or "translation"
+        commit: Commit immediately
+    """
+    conn.execute('DELETE FROM failures WHERE trace_id = ? AND stage = ?', (trace_id, stage))
+    if commit:
+        conn.commit()
+
+
+def get_failures(conn: sqlite3.Connection, stage: Optional[str] = None,
+                 max_attempts: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Get recorded failures, fewest attempts first.
+
+    Args:
+        conn: SQLite connection object
+        stage: Only failures of this stage (default: all)
+        max_attempts: Skip failures that already failed this many times
+
+    Returns:
+        List of dictionaries with the failure fields plus the trace title
+    """
+    query = '''
+        SELECT f.trace_id, f.stage, f.error_class, f.attempts, f.last_error, f.last_failed_at, r.title
+        FROM failures f JOIN leetcode_reasoning r ON r.id = f.trace_id
+        WHERE 1 = 1
+    '''
+    params: List[Any] = []
+    if stage:
+        query += ' AND f.stage = ?'
+        params.append(stage)
+    if max_attempts:
+        query += ' AND f.attempts < ?'
+        params.append(max_attempts)
+    query += ' ORDER BY f.attempts ASC, f.trace_id ASC'
+
+    columns = ('trace_id', 'stage', 'error_class', 'attempts', 'last_error', 'last_failed_at', 'title')
+    return [dict(zip(columns, row)) for row in conn.execute(query, params)]
+
+
+def summarize_failures(conn: sqlite3.Connection) -> Dict[str, Dict[str, int]]:
+    """
+    Count failures by stage and error class.
+
+    Args:
+        conn: SQLite connection object
+
+    Returns:
+        Dictionary mapping stage to {error_class: count}
+    """
+    summary: Dict[str, Dict[str, int]] = {}
+    for stage, error_class, count in conn.execute(
+            'SELECT stage, error_class, COUNT(*) FROM failures GROUP BY stage, error_class ORDER BY stage'):
+        summary.setdefault(stage, {})[error_class] = count
+    return summary
+
+
+def migrate_error_strings(conn: sqlite3.Connection, logger=None) -> int:
+    """
+    Move error messages that older versions stored in the data columns into the failures table.
+
+    Generation errors clear the whole trace; translation errors clear the Hindi
+    columns and mark the row 'invalid' so it is translated again.
+
+    Args:
+        conn: SQLite connection object (leetcode_reasoning and failures tables exist)
+        logger: Logger instance for logging
+
+    Returns:
+        Number of rows migrated
+    """
+    cursor = conn.cursor()
+    migrated = 0
+
+    cursor.execute('''
+        SELECT id, trace_en_with_think FROM leetcode_reasoning
+        WHERE trace_en_with_think LIKE ? || '%'
+    ''', (LEGACY_GENERATION_ERROR_PREFIX,))
+    for trace_id, error in cursor.fetchall():
+        record_failure(conn, trace_id, 'generation', error, commit=False)
+        conn.execute('''
+            UPDATE leetcode_reasoning
+            SET trace_en_with_think = NULL, think_en = NULL, answer_en = NULL,
+                think_token_count = NULL, answer_token_count = NULL,
+                trace_hi_with_think = NULL, think_hi = NULL, answer_hi = NULL,
+                translation_status = 'pending', translated_at = NULL
+            WHERE id = ?
+        ''', (trace_id,))
+        migrated += 1
+
+    like_clauses = " OR ".join("trace_hi_with_think LIKE ? || '%'" for _ in TRANSLATION_ERROR_PREFIXES)
+    cursor.execute(f'''
+        SELECT id, trace_hi_with_think, think_hi, answer_hi FROM leetcode_reasoning
+        WHERE {like_clauses}
+    ''', TRANSLATION_ERROR_PREFIXES)
+    for trace_id, error, think_hi, answer_hi in cursor.fetchall():
+        record_failure(conn, trace_id, 'translation', error, commit=False)
+        think_failed = bool(think_hi) and think_hi.startswith(TRANSLATION_ERROR_PREFIXES)
+        answer_failed = bool(answer_hi) and answer_hi.startswith(TRANSLATION_ERROR_PREFIXES)
+        # Re-translate only the failed section when the other one is a real translation
+        if think_failed and not answer_failed and answer_hi:
+            parts = 'think'
+        elif answer_failed and not think_failed and think_hi:
+            parts = 'answer'
+        else:
+            parts = None
+        conn.execute('''
+            UPDATE leetcode_reasoning
+            SET trace_hi_with_think = NULL,
+                think_hi = CASE WHEN ? THEN NULL ELSE think_hi END,
+                answer_hi = CASE WHEN ? THEN NULL ELSE answer_hi END,
+                translation_status = 'invalid', translation_issue = ?, retranslate_parts = ?,
+                translated_at = NULL
+            WHERE id = ?
+        ''', (think_failed or parts is None, answer_failed or parts is None, error, parts, trace_id))
+        migrated += 1
+
+    if migrated:
+        conn.commit()
+        if logger:
+            logger.info(f"Moved {migrated} stored error messages into the failures table")
+    return migrated
@@ -0,0 +1,280 @@
+"""
+Hedged Requests
+Cuts the latency tail caused by one slow or overloaded Ollama endpoint.
+
+When hedging is enabled and more than one endpoint is active, a request that
+is late is duplicated on another endpoint and the two race:
+
+- trigger "first_token": the request is late when it has not streamed its
+  first token within the HEDGE_QUANTILE of recent times to first token. The
+  first attempt to stream a token wins.
+- trigger "completion": the request is late when it has not finished within
+  the HEDGE_QUANTILE of recent request durations. The first attempt to
+  finish wins.
+
+Thresholds are kept per request kind and model, and adapt as samples arrive;
+no request is hedged until HEDGE_MIN_SAMPLES have been seen. The loser is
+cancelled by closing its stream, which makes Ollama stop generating; an
+attempt still waiting for its first token notices the cancel when that token
+arrives. Hedges are bounded by HEDGE_BUDGET, a fraction of all requests, so
+a slow cluster does not double its own load.
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from endpoints import get_active_endpoints, get_client, next_endpoint
+from inference_profiles import profile_options
+from tracing import counter
+from warmup import KEEP_ALIVE
+
+# Try to import configuration, fall back to defaults if not found
+try:
+    from config import HEDGE_REQUESTS, HEDGE_TRIGGER, HEDGE_QUANTILE, HEDGE_BUDGET
+except ImportError:
+    HEDGE_REQUESTS = False  # Duplicate late requests on another endpoint (needs 2+ endpoints)
+    HEDGE_TRIGGER = "first_token"  # "first_token" or "completion"
+    HEDGE_QUANTILE = 0.95  # Quantile of recent latencies after which a request is late
+    HEDGE_BUDGET = 0.05  # Hedges allowed as a fraction of all requests
+
+HEDGE_TRIGGERS = ("first_token", "completion")
+
+# Latency samples required per kind and model before any request is hedged
+HEDGE_MIN_SAMPLES = 20
+# Recent latency samples kept per kind and model
+HEDGE_WINDOW = 200
+
+
+class HedgePolicy:
+    """
+    Adaptive hedge thresholds and the hedge budget, shared by all request threads.
+    """
+
+    def __init__(self, trigger: str = HEDGE_TRIGGER, quantile: float = HEDGE_QUANTILE,
+                 budget: float = HEDGE_BUDGET, min_samples: int = HEDGE_MIN_SAMPLES, window: int = HEDGE_WINDOW):
+        if trigger not in HEDGE_TRIGGERS:
+            raise ValueError(f"Invalid hedge trigger '{trigger}', expected one of {HEDGE_TRIGGERS}")
+        self.trigger = trigger
+        self.quantile = quantile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.window = window
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._samples: Dict[Tuple[str, str], deque] = {}
+        self._lock = threading.Lock()
+
+    def threshold(self, kind: str, model: str) -> Optional[float]:
+        """
+        Return the seconds after which a request of this kind and model is late.
+
+        Args:
+            kind: Request kind, e.g. "generation" or "translation"
+            model: Model the request is sent to
+
+        Returns:
+            Threshold in seconds, or None until enough samples have been seen
+        """
+        with self._lock:
+            samples = self._samples.get((kind, model))
+            if samples is None or len(samples) < self.min_samples:
+                return None
+            return float(np.quantile(np.fromiter(samples, dtype=float), self.quantile))
+
+    def record_latency(self, kind: str, model: str, seconds: float) -> None:
+        """
+        Add a time to first token (or request duration, for the completion trigger).
+
+        Args:
+            kind: Request kind
+            model: Model the request was sent to
+            seconds: Observed latency
+        """
+        with self._lock:
+            self._samples.setdefault((kind, model), deque(maxlen=self.window)).append(seconds)
+
+    def record_request(self) -> None:
+        """Count a request against which the hedge budget is measured."""
+        with self._lock:
+            self.requests += 1
+
+    def try_hedge(self) -> bool:
+        """
+        Take one hedge from the budget.
+
+        Returns:
+            bool: True if the hedge may be sent
+        """
+        with self._lock:
+            if self.hedges + 1 > self.budget * self.requests:
+                return False
+            self.hedges += 1
+            counter("hedges", sent=self.hedges, won=self.hedge_wins)
+            return True
+
+    def record_hedge_win(self) -> None:
+        """Count a hedge that beat its primary request."""
+        with self._lock:
+            self.hedge_wins += 1
+            counter("hedges", sent=self.hedges, won=self.hedge_wins)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the request, hedge and hedge-win counts."""
+        with self._lock:
+            return {'requests': self.requests, 'hedges': self.hedges, 'hedge_wins': self.hedge_wins}
+
+
+_policy: Optional[HedgePolicy] = None
+_policy_lock = threading.Lock()
+
+
+def get_hedge_policy() -> HedgePolicy:
+    """Return the process-wide hedge policy."""
+    global _policy
+    with _policy_lock:
+        if _policy is None:
+            _policy = HedgePolicy()
+        return _policy
+
+
+def hedging_active() -> bool:
+    """Check whether requests are hedged: enabled, with at least two active endpoints."""
+    return HEDGE_REQUESTS and len(get_active_endpoints()) > 1
+
+
+def _other_endpoint(endpoint: str) -> str:
+    """Return the next active endpoint in rotation that differs from `endpoint`."""
+    for _ in range(len(get_active_endpoints())):
+        candidate = next_endpoint()
+        if candidate != endpoint:
+            return candidate
+    return endpoint
+
+
+def _stream_attempt(index: int, endpoint: str, model: str, prompt: str, options: Dict[str, Any],
+                    cancel: threading.Event, events: queue.Queue) -> None:
+    """
+    Run one attempt as a streaming request, reporting its progress on `events`.
+
+    Events are (kind, attempt index, value) tuples: ('first_token', i, seconds),
+    ('done', i, response dict) or ('error', i, exception).
+    """
+    start_time = time.monotonic()
+    try:
+        stream = get_client(endpoint).generate(model=model, prompt=prompt,
+                                               options={**profile_options(endpoint, model), **options},
+                                               keep_alive=KEEP_ALIVE, stream=True)
+        parts: List[str] = []
+        final = None
+        try:
+            for chunk in stream:
+                if cancel.is_set():
+                    return
+                if not parts:
+                    events.put(('first_token', index, time.monotonic() - start_time))
+                parts.append(chunk.get('response') or '')
+                if chunk.get('done'):
+                    final = chunk
+        finally:
+            # Closing the stream drops the connection, so Ollama stops generating
+            stream.close()
+        if final is None:
+            raise RuntimeError(f"Ollama stream from {endpoint} ended without a final response")
+        response = final.model_dump() if hasattr(final, 'model_dump') else dict(final)
+        response['response'] = ''.join(parts)
+        events.put(('done', index, response))
+    except Exception as e:
+        events.put(('error', index, e))
+
+
+def hedged_generate(model: str, prompt: str, options: Dict[str, Any], kind: str, endpoint: str,
+                    logger=None) -> Tuple[Any, str]:
+    """
+    Send a generate request, hedging it on another endpoint if it is late.
+
+    Args:
+        model: Name of the Ollama model to use
+        prompt: The full prompt to send
+        options: Request options (num_ctx, num_predict); each attempt adds the
+            inference profile of its own endpoint
+        kind: Request kind, e.g. "generation" or "translation"
+        endpoint: Endpoint of the primary attempt
+        logger: Logger instance for logging
+
+    Returns:
+        Tuple of (the winning response, the endpoint that produced it)
+
+    Raises:
+        Exception: The error of the primary attempt, or of the last attempt when both failed
+    """
+    policy = get_hedge_policy()
+    policy.record_request()
+    threshold = policy.threshold(kind, model)
+
+    events: queue.Queue = queue.Queue()
+    endpoints = [endpoint]
+    cancels = [threading.Event()]
+    start_time = time.monotonic()
+    threading.Thread(target=_stream_attempt, args=(0, endpoint, model, prompt, options, cancels[0], events),
+                     daemon=True).start()
+
+    deadline = start_time + threshold if threshold is not None else None
+    failed = 0
+    winner = None
+    while True:
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            event, index, value = events.get(timeout=timeout)
+        except queue.Empty:
+            # The primary is late: hedge it once, if the budget allows
+            deadline = None
+            if policy.try_hedge():
+                endpoints.append(_other_endpoint(endpoint))
+                cancels.append(threading.Event())
+                threading.Thread(target=_stream_attempt,
+                                 args=(1, endpoints[1], model, prompt, options, cancels[1], events),
+                                 daemon=True).start()
+                if logger:
+                    logger.debug(f"Hedging {kind} request on {endpoints[1]}: no "
+                                 f"{'first token' if policy.trigger == 'first_token' else 'response'} from "
+                                 f"{endpoint} after {threshold:.2f}s",
+                                 extra={'endpoint': endpoint, 'hedge_endpoint': endpoints[1],
+                                        'threshold': round(threshold, 3)})
+            continue
+
+        if event == 'first_token':
+            if policy.trigger == 'first_token':
+                policy.record_latency(kind, model, value)
+                if winner is None:
+                    # First attempt to stream wins; the other is cancelled
+                    winner = index
+                    deadline = None
+                    for other, cancel in enumerate(cancels):
+                        if other != index:
+                            cancel.set()
+            continue
+
+        if event == 'error':
+            failed += 1
+            # Wait for the other attempt unless it was cancelled or already failed
+            if index == winner or failed == len(endpoints):
+                raise value
+            continue
+
+        # event == 'done'
+        if winner is not None and index != winner:
+            continue
+        for other, cancel in enumerate(cancels):
+            if other != index:
+                cancel.set()
+        if policy.trigger == 'completion':
+            policy.record_latency(kind, model, time.monotonic() - start_time)
+        if index == 1:
+            policy.record_hedge_win()
+        return value, endpoints[index]
@@ -0,0 +1,149 @@
+"""
+Inference Profiles
+Per-endpoint, per-model Ollama runner options measured by
+`python cli.py autotune` (see autotune.py) and stored in
+INFERENCE_PROFILES_FILE.
+
+Every request sent through model_calls picks up the num_thread and num_batch
+of the profile for its endpoint and model; num_ctx and num_predict still come
+from the token budget. The pipelines also start each adaptive concurrency
+controller at the concurrency the profiles measured, summed over the active
+endpoints, so no run has to rediscover it through AIMD.
+
+The file is plain JSON:
+
+    {"profiles": {"http://localhost:11434": {"qwen3:8b": {
+        "num_thread": 16, "num_batch": 512, "concurrency": 2,
+        "prefill_tokens_per_sec": 95.1, "decode_tokens_per_sec": 11.8,
+        "tuned_at": "2026-10-18T09:30:00"}}}}
+"""
+
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from concurrency import get_controller
+from endpoints import get_active_endpoints
+
+# Try to import configuration, fall back to defaults if not found
+try:
+    from config import INFERENCE_PROFILES_FILE
+except ImportError:
+    INFERENCE_PROFILES_FILE = "inference_profiles.json"  # Written by `python cli.py autotune`; None disables profiles
+
+# Profile fields sent to Ollama as request options
+PROFILE_OPTIONS = ("num_thread", "num_batch")
+
+_profiles_cache: Dict[str, Any] = {'path': None, 'mtime': None, 'profiles': {}}
+_profiles_lock = threading.Lock()
+
+
+def load_profiles(path: Optional[str] = INFERENCE_PROFILES_FILE) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """
+    Load the stored profiles, re-reading the file only when it changed.
+
+    Args:
+        path: Profiles file (None disables profiles)
+
+    Returns:
+        Dictionary mapping endpoint -> model -> profile (empty if there is no file)
+    """
+    if not path or not os.path.exists(path):
+        return {}
+
+    mtime = os.path.getmtime(path)
+    with _profiles_lock:
+        if _profiles_cache['path'] != path or _profiles_cache['mtime'] != mtime:
+            with open(path, 'r', encoding='utf-8') as f:
+                _profiles_cache['profiles'] = json.load(f).get('profiles', {})
+            _profiles_cache['path'] = path
+            _profiles_cache['mtime'] = mtime
+        return _profiles_cache['profiles']
+
+
+def get_profile(endpoint: str, model: str, path: Optional[str] = INFERENCE_PROFILES_FILE) -> Optional[Dict[str, Any]]:
+    """
+    Return the profile of one endpoint and model.
+
+    Args:
+        endpoint: Ollama server URL
+        model: Model name as configured (a missing ":latest" tag is tolerated)
+        path: Profiles file
+
+    Returns:
+        The stored profile, or None if that pair was never tuned
+    """
+    models = load_profiles(path).get(endpoint.rstrip('/'), {})
+    return models.get(model) or models.get(model if ':' in model else f"{model}:latest")
+
+
+def profile_options(endpoint: str, model: str) -> Dict[str, int]:
+    """
+    Return the tuned request options for one endpoint and model.
+
+    Args:
+        endpoint: Ollama server URL
+        model: Model name
+
+    Returns:
+        Dictionary with the profile's num_thread / num_batch (empty if untuned)
+    """
+    profile = get_profile(endpoint, model) or {}
+    return {name: profile[name] for name in PROFILE_OPTIONS if profile.get(name)}
+
+
+def save_profile(endpoint: str, model: str, profile: Dict[str, Any],
+                 path: str = INFERENCE_PROFILES_FILE) -> None:
+    """
+    Store the profile of one endpoint and model, keeping all other profiles.
+
+    The file is replaced atomically so a running pipeline never reads a
+    half-written profile.
+
+    Args:
+        endpoint: Ollama server URL
+        model: Model name
+        profile: Options and measured throughput to store
+        path: Profiles file
+    """
+    payload = {'profiles': {}}
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            payload = json.load(f)
+    payload.setdefault('profiles', {}).setdefault(endpoint.rstrip('/'), {})[model] = profile
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+        f.write('\n')
+    os.replace(temp_path, path)
+
+
+def apply_concurrency_profiles(kind: str, models: List[str], logger=None) -> Optional[int]:
+    """
+    Start a concurrency controller at the concurrency the profiles measured.
+
+    Each active endpoint contributes the highest tuned concurrency among
+    `models`; the sum becomes the controller's starting limit and, if larger,
+    its maximum. Call this after preflight and before sizing worker pools.
+
+    Args:
+        kind: Request kind, e.g. "generation" or "translation"
+        models: Models used for requests of this kind
+        logger: Logger instance for logging
+
+    Returns:
+        The profiled concurrency, or None if no active endpoint was tuned
+    """
+    total = 0
+    for endpoint in get_active_endpoints():
+        tuned = [(get_profile(endpoint, model) or {}).get('concurrency') or 0 for model in models]
+        total += max(tuned, default=0)
+    if not total:
+        return None
+
+    get_controller(kind, logger).raise_limits(total)
+    if logger:
+        logger.info(f"Inference profiles: starting {kind} concurrency at {total}")
+    return total
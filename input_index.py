@@ -0,0 +1,311 @@
+"""
+Input Offset Index
+Sidecar index of the input JSONL file (leetcode.jsonl.idx next to
+leetcode.jsonl) holding the byte offset and content hash of every line.
+
+With the index, counting problems is a length lookup, a slice such as
+`--start 20000 --num-entries 500` seeks straight to its first line, and
+`--shard i/N` picks its lines from the stored hashes without parsing the
+other shards' problems. Lines are read through mmap.
+
+Compressed dumps (.jsonl.gz, .jsonl.zst) are detected by extension or magic
+bytes and decompressed as a stream with large buffered reads, never to disk.
+Their offsets refer to the decompressed stream, so counting and shard
+selection stay instant; reading a slice decompresses up to its last line
+but parses only the selected lines. Reading .zst files needs the optional
+zstandard package.
+
+The index is built by one pass over the file and rebuilt only when the
+file's size or modification time no longer match the ones recorded in it.
+If the sidecar cannot be written (e.g. a read-only directory), the index is
+kept in memory for the current run.
+"""
+
+import gzip
+import io
+import json
+import mmap
+import os
+import time
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+import numpy as np
+
+from sharding import content_hash
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+INDEX_SUFFIX = ".idx"
+# Bump when the sidecar layout changes; older sidecars are then rebuilt
+INDEX_VERSION = 1
+# Bytes per read from compressed input
+READ_BUFFER_SIZE = 4 * 1024 * 1024
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+
+def index_path(file_path: str) -> str:
+    """
+    Return the sidecar index path of an input file.
+
+    Args:
+        file_path: Path to the JSONL file
+
+    Returns:
+        Path such as "leetcode.jsonl.idx"
+    """
+    return file_path + INDEX_SUFFIX
+
+
+def hash_key(content: str) -> int:
+    """
+    Return the 64-bit prefix of content_hash, which is what shard_of uses.
+
+    Args:
+        content: The problem content/description
+
+    Returns:
+        Unsigned 64-bit integer
+    """
+    return int(content_hash(content)[:16], 16)
+
+
+def detect_compression(file_path: str) -> Optional[str]:
+    """
+    Detect whether an input file is compressed, by extension or magic bytes.
+
+    Args:
+        file_path: Path to the input file
+
+    Returns:
+        "gzip", "zstd", or None for plain text
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == '.gz':
+        return 'gzip'
+    if extension in ('.zst', '.zstd'):
+        return 'zstd'
+    with open(file_path, 'rb') as file:
+        magic = file.read(4)
+    if magic.startswith(GZIP_MAGIC):
+        return 'gzip'
+    if magic == ZSTD_MAGIC:
+        return 'zstd'
+    return None
+
+
+def open_input(file_path: str, compression: Optional[str] = None) -> BinaryIO:
+    """
+    Open an input file for buffered reading, decompressing it as a stream.
+
+    Args:
+        file_path: Path to the input file
+        compression: "gzip", "zstd" or None, as returned by detect_compression
+
+    Returns:
+        Binary file object yielding the decompressed lines
+
+    Raises:
+        ImportError: If the file is zstd-compressed and zstandard is not installed
+    """
+    if compression == 'gzip':
+        return io.BufferedReader(gzip.open(file_path, 'rb'), buffer_size=READ_BUFFER_SIZE)
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ImportError(f"Reading {file_path} requires the zstandard package: pip install zstandard")
+        reader = zstandard.ZstdDecompressor().stream_reader(open(file_path, 'rb'), read_size=READ_BUFFER_SIZE)
+        return io.BufferedReader(reader, buffer_size=READ_BUFFER_SIZE)
+    return open(file_path, 'rb', buffering=READ_BUFFER_SIZE)
+
+
+class InputIndex:
+    """
+    Byte offsets and content hash keys of the lines of a JSONL file.
+
+    offsets has one more element than there are lines: line i spans
+    offsets[i]:offsets[i + 1] (of the decompressed stream for compressed files).
+    """
+
+    def __init__(self, file_path: str, offsets: np.ndarray, hash_keys: np.ndarray,
+                 compression: Optional[str] = None):
+        self.file_path = file_path
+        self.offsets = offsets
+        self.hash_keys = hash_keys
+        self.compression = compression
+
+    def __len__(self) -> int:
+        return len(self.hash_keys)
+
+    def select(self, start: int = 0, num_entries: Optional[int] = None,
+               shard: Optional[Tuple[int, int]] = None, exclude_keys: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Return the line numbers of a slice of the input, optionally restricted to one shard.
+
+        Args:
+            start: First line of the slice (0-based)
+            num_entries: Number of lines in the slice (default: to the end of the file)
+            shard: Optional (shard number, number of shards); lines of other shards are dropped
+            exclude_keys: Optional hash keys of problems to drop (e.g. those already stored)
+
+        Returns:
+            Array of line numbers in file order
+        """
+        stop = len(self) if num_entries is None else min(len(self), start + num_entries)
+        line_numbers = np.arange(min(start, stop), stop)
+        if shard:
+            index, total = shard
+            # Same assignment as sharding.shard_of
+            keys = self.hash_keys[line_numbers]
+            line_numbers = line_numbers[keys % np.uint64(total) + np.uint64(1) == np.uint64(index)]
+        if exclude_keys is not None and len(exclude_keys):
+            line_numbers = line_numbers[~np.isin(self.hash_keys[line_numbers], exclude_keys)]
+        return line_numbers
+
+    def read_lines(self, line_numbers: np.ndarray) -> Iterator[Tuple[int, bytes]]:
+        """
+        Read lines by number, through mmap for plain files.
+
+        Compressed files cannot be seeked, so they are decompressed from the
+        start up to the last requested line; the lines in between are skipped
+        without being parsed.
+
+        Args:
+            line_numbers: Line numbers to read in increasing order (e.g. from select)
+
+        Yields:
+            Tuples of (line number, raw line bytes)
+        """
+        if len(line_numbers) == 0:
+            return
+        if self.compression:
+            wanted = iter(line_numbers)
+            next_line = next(wanted)
+            with open_input(self.file_path, self.compression) as file:
+                for line_number, line in enumerate(file):
+                    if line_number == next_line:
+                        yield line_number, line
+                        next_line = next(wanted, None)
+                        if next_line is None:
+                            return
+            return
+        with open(self.file_path, 'rb') as file, \
+                mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for line_number in line_numbers:
+                yield int(line_number), data[self.offsets[line_number]:self.offsets[line_number + 1]]
+
+
+def build_input_index(file_path: str, logger=None) -> InputIndex:
+    """
+    Index a JSONL file with one pass over it.
+
+    Lines that are not valid JSON are indexed by the hash of the raw line;
+    reading them still raises json.JSONDecodeError.
+
+    Args:
+        file_path: Path to the JSONL file
+        logger: Logger instance for logging
+
+    Returns:
+        The new InputIndex
+    """
+    start_time = time.time()
+    compression = detect_compression(file_path)
+    offsets = [0]
+    hash_keys = []
+    with open_input(file_path, compression) as file:
+        for line in file:
+            offsets.append(offsets[-1] + len(line))
+            try:
+                content = json.loads(line).get('content', '')
+            except (ValueError, AttributeError):
+                content = line.decode('utf-8', errors='replace')
+            hash_keys.append(hash_key(content))
+
+    index = InputIndex(file_path, np.array(offsets, dtype=np.uint64), np.array(hash_keys, dtype=np.uint64),
+                       compression)
+    if logger:
+        source = f"{file_path} ({compression})" if compression else file_path
+        logger.info(f"Indexed {len(index)} problems in {source} in {time.time() - start_time:.2f} seconds")
+    return index
+
+
+def save_input_index(index: InputIndex, logger=None) -> bool:
+    """
+    Write the sidecar index, stamped with the input file's size and modification time.
+
+    Args:
+        index: Index to save
+        logger: Logger instance for logging
+
+    Returns:
+        bool: True if the sidecar was written
+    """
+    stat = os.stat(index.file_path)
+    path = index_path(index.file_path)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        # Written under a temporary name so concurrent runs never read a partial index
+        with open(temp_path, 'wb') as file:
+            np.savez(file, version=np.int64(INDEX_VERSION), source_size=np.int64(stat.st_size),
+                     source_mtime_ns=np.int64(stat.st_mtime_ns), offsets=index.offsets, hash_keys=index.hash_keys)
+        os.replace(temp_path, path)
+        return True
+    except OSError as e:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        if logger:
+            logger.warning(f"Could not write input index {path}: {e}; it will be rebuilt next run")
+        return False
+
+
+def load_input_index(file_path: str, logger=None) -> InputIndex:
+    """
+    Load the sidecar index of an input file, (re)building it if missing or stale.
+
+    Args:
+        file_path: Path to the JSONL file
+        logger: Logger instance for logging
+
+    Returns:
+        InputIndex matching the current file contents
+
+    Raises:
+        FileNotFoundError: If the input file does not exist
+    """
+    stat = os.stat(file_path)
+    path = index_path(file_path)
+    try:
+        with np.load(path) as sidecar:
+            if (int(sidecar['version']) == INDEX_VERSION and int(sidecar['source_size']) == stat.st_size
+                    and int(sidecar['source_mtime_ns']) == stat.st_mtime_ns):
+                return InputIndex(file_path, sidecar['offsets'], sidecar['hash_keys'],
+                                  detect_compression(file_path))
+        if logger:
+            logger.info(f"Input index {path} is out of date, rebuilding it")
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, KeyError) as e:
+        if logger:
+            logger.warning(f"Ignoring unreadable input index {path}: {e}")
+
+    index = build_input_index(file_path, logger)
+    save_input_index(index, logger)
+    return index
+
+
+def count_entries(file_path: str, logger=None) -> int:
+    """
+    Count the problems in an input file using its sidecar index.
+
+    Args:
+        file_path: Path to the JSONL file
+        logger: Logger instance for logging
+
+    Returns:
+        Number of lines (problems) in the file
+    """
+    return len(load_input_index(file_path, logger))
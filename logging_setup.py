@@ -0,0 +1,126 @@
+"""
+Logging Setup
+One logging configuration shared by every pipeline entry point.
+
+Log calls only put the record on an in-memory queue (QueueHandler); a single
+QueueListener thread formats and writes it, so worker threads never wait on
+file or console I/O. The log file is JSON lines: one object per record with
+the standard fields plus any per-problem fields passed via `extra`, e.g.
+
+    logger.info("Completed translation", extra={'problem': title, 'trace_id': 7, 'elapsed': 1.92})
+
+The console gets a short human-readable line. LOG_LEVEL (or --log-level)
+controls verbosity: DEBUG includes per-step chatter (request timings, retry
+attempts, lengths), INFO keeps one line per problem and stage, WARNING only
+reports problems.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+from datetime import datetime
+
+# Try to import configuration, fall back to defaults if not found
+try:
+    from config import LOG_LEVEL
+except ImportError:
+    LOG_LEVEL = "INFO"  # "DEBUG", "INFO" or "WARNING"
+
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR")
+
+# Attributes every LogRecord has; anything else was passed via `extra`
+_STANDARD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener = None
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Format a record as one JSON object including its `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class FieldsAdapter(logging.LoggerAdapter):
+    """Logger adapter that adds fixed fields to every record, merged with per-call `extra`."""
+
+    def process(self, msg, kwargs):
+        kwargs['extra'] = {**self.extra, **kwargs.get('extra', {})}
+        return msg, kwargs
+
+
+def with_fields(logger, **fields):
+    """
+    Return a logger that adds per-problem fields to every record.
+
+    Args:
+        logger: Logger or adapter (None is passed through, so callers keep the
+            `if logger:` convention)
+        **fields: Fields to add, e.g. problem="Two Sum", stage="generation"
+
+    Returns:
+        FieldsAdapter wrapping the logger, or None
+    """
+    if logger is None:
+        return None
+    return FieldsAdapter(logger, fields)
+
+
+def setup_logging(name: str, title: str = None, level: str = None) -> logging.Logger:
+    """
+    Configure asynchronous logging for an entry point and return its logger.
+
+    Safe to call more than once; only the first call installs the handlers.
+
+    Args:
+        name: Session name, used for the log file (logs/<name>_<timestamp>.jsonl)
+        title: Session title logged at startup (default: name)
+        level: Log level name (default: LOG_LEVEL)
+
+    Returns:
+        Logger for the entry point
+    """
+    global _listener
+
+    root = logging.getLogger()
+    root.setLevel((level or LOG_LEVEL).upper())
+
+    if _listener is None:
+        # Create logs directory if it doesn't exist
+        if not os.path.exists('logs'):
+            os.makedirs('logs')
+        log_filename = f"logs/{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+
+        file_handler = logging.FileHandler(log_filename, encoding='utf-8')
+        file_handler.setFormatter(JsonLinesFormatter())
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', '%H:%M:%S'))
+
+        log_queue = queue.SimpleQueue()
+        root.addHandler(logging.handlers.QueueHandler(log_queue))
+        _listener = logging.handlers.QueueListener(log_queue, file_handler, console_handler,
+                                                   respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+    # httpx logs every request at INFO; keep that for DEBUG runs only
+    logging.getLogger('httpx').setLevel(logging.NOTSET if root.level <= logging.DEBUG else logging.WARNING)
+
+    logger = logging.getLogger(name)
+    logger.info("=" * 60)
+    logger.info(f"{title or name} - Session Started")
+    logger.info("=" * 60)
+    return logger
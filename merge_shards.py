@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Shard Merger
+Combine the per-shard databases written by `python cli.py generate --shard i/N`
+(or any other trace databases) into one database.
+
+Rows are streamed from each source with a cursor and written in batches, so
+memory use does not depend on database size. Problems are deduplicated by
+content_hash. When the same problem appears more than once, the better row
+is kept:
+
+1. a generated trace beats a failed generation
+2. a completed translation beats a pending or invalid one
+3. otherwise the most recently translated (then created) row wins
+
+The failures recorded for the kept row move with it, and request_metrics
+samples are copied so run estimates use every node's history.
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+from failures import migrate_error_strings
+from logging_setup import setup_logging, LOG_LEVELS
+from sharding import content_hash
+from traceWithThink import setup_database
+
+# Rows written per transaction
+MERGE_BATCH_SIZE = 500
+
+FAILURE_COLUMNS = ('stage', 'error_class', 'attempts', 'last_error', 'first_failed_at', 'last_failed_at')
+METRICS_COLUMNS = ('kind', 'model', 'input_chars', 'prompt_tokens', 'output_tokens', 'duration',
+                   'concurrency', 'success', 'created_at')
+
+
+def table_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    """
+    Return the column names of a table (empty if the table does not exist).
+
+    Args:
+        conn: SQLite connection object
+        table: Table name
+
+    Returns:
+        List of column names
+    """
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def row_rank(row: Dict[str, Any]) -> Tuple:
+    """
+    Rank a row for conflict resolution; the higher rank is kept.
+
+    Args:
+        row: Row values with trace_en_with_think, translation_status, translated_at and created_at
+
+    Returns:
+        Sortable rank tuple
+    """
+    return (
+        row.get('trace_en_with_think') is not None,
+        row.get('translation_status') == 'completed' and row.get('trace_hi_with_think') is not None,
+        str(row.get('translated_at') or ''),
+        str(row.get('created_at') or ''),
+    )
+
+
+def copy_failures(source: sqlite3.Connection, target: sqlite3.Connection, source_id: int, target_id: int) -> None:
+    """
+    Replace the failures of a target row with those of a source row.
+
+    Args:
+        source: Source database connection
+        target: Target database connection
+        source_id: Row ID in the source database
+        target_id: Row ID in the target database
+    """
+    target.execute('DELETE FROM failures WHERE trace_id = ?', (target_id,))
+    if 'trace_id' not in table_columns(source, 'failures'):
+        return
+    rows = source.execute(f"SELECT {', '.join(FAILURE_COLUMNS)} FROM failures WHERE trace_id = ?", (source_id,))
+    target.executemany(f"INSERT INTO failures (trace_id, {', '.join(FAILURE_COLUMNS)}) "
+                       f"VALUES (?, {', '.join('?' for _ in FAILURE_COLUMNS)})",
+                       [(target_id, *row) for row in rows])
+
+
+def copy_metrics(source: sqlite3.Connection, target: sqlite3.Connection) -> int:
+    """
+    Append the request_metrics samples of a source database.
+
+    Args:
+        source: Source database connection
+        target: Target database connection
+
+    Returns:
+        Number of samples copied
+    """
+    columns = [column for column in METRICS_COLUMNS if column in table_columns(source, 'request_metrics')]
+    if 'kind' not in columns:
+        return 0
+
+    copied = 0
+    cursor = source.execute(f"SELECT {', '.join(columns)} FROM request_metrics ORDER BY id")
+    while True:
+        rows = cursor.fetchmany(MERGE_BATCH_SIZE)
+        if not rows:
+            break
+        target.executemany(f"INSERT INTO request_metrics ({', '.join(columns)}) "
+                           f"VALUES ({', '.join('?' for _ in columns)})", rows)
+        target.commit()
+        copied += len(rows)
+    return copied
+
+
+def merge_database(source_db: str, target: sqlite3.Connection, counts: Dict[str, int], logger=None) -> None:
+    """
+    Merge one source database into the target, deduplicating by content hash.
+
+    Args:
+        source_db: Path to the source database (opened read-only)
+        target: Target database connection (schema set up by setup_database)
+        counts: Running 'inserted', 'replaced', 'duplicates' and 'metrics' counts, updated in place
+        logger: Logger instance for logging
+    """
+    source = sqlite3.connect(f"file:{source_db}?mode=ro", uri=True)
+    source.row_factory = sqlite3.Row
+    source_columns = table_columns(source, 'leetcode_reasoning')
+    target_columns = set(table_columns(target, 'leetcode_reasoning'))
+    data_columns = [column for column in source_columns
+                    if column in target_columns and column not in ('id', 'content_hash')]
+    # Older databases have no content_hash; it is computed while streaming
+    hash_column = 'content_hash' if 'content_hash' in source_columns else 'NULL AS content_hash'
+    columns = data_columns + ['content_hash']
+    rank_columns = ('id', 'trace_en_with_think', 'trace_hi_with_think', 'translation_status',
+                    'translated_at', 'created_at')
+
+    pending_writes = 0
+    for row in source.execute(f"SELECT id, {', '.join(data_columns)}, {hash_column} "
+                              f"FROM leetcode_reasoning ORDER BY id"):
+        values = dict(row)
+        source_id = values.pop('id')
+        values['content_hash'] = values['content_hash'] or content_hash(values['content'])
+
+        existing = target.execute(f"SELECT {', '.join(rank_columns)} FROM leetcode_reasoning "
+                                  f"WHERE content_hash = ? ORDER BY id LIMIT 1", (values['content_hash'],)).fetchone()
+        if existing is None:
+            cursor = target.execute(f"INSERT INTO leetcode_reasoning ({', '.join(columns)}) "
+                                    f"VALUES ({', '.join('?' for _ in columns)})",
+                                    [values[column] for column in columns])
+            copy_failures(source, target, source_id, cursor.lastrowid)
+            counts['inserted'] += 1
+        elif row_rank(values) > row_rank(dict(zip(rank_columns, existing))):
+            target.execute(f"UPDATE leetcode_reasoning SET {', '.join(f'{column} = ?' for column in columns)} "
+                           f"WHERE id = ?", [values[column] for column in columns] + [existing[0]])
+            copy_failures(source, target, source_id, existing[0])
+            counts['replaced'] += 1
+        else:
+            counts['duplicates'] += 1
+            continue
+
+        pending_writes += 1
+        if pending_writes >= MERGE_BATCH_SIZE:
+            target.commit()
+            pending_writes = 0
+    target.commit()
+
+    counts['metrics'] += copy_metrics(source, target)
+    source.close()
+    if logger:
+        logger.info(f"Merged {source_db}: {counts}")
+
+
+def merge_databases(output_db: str, source_dbs: List[str], logger=None) -> Dict[str, int]:
+    """
+    Merge several trace databases into one.
+
+    The output database is created (or migrated) with setup_database, so
+    merging into an existing database adds to it.
+
+    Args:
+        output_db: Path to the merged database
+        source_dbs: Paths of the databases to merge, in order
+        logger: Logger instance for logging
+
+    Returns:
+        Dictionary with 'inserted', 'replaced', 'duplicates' and 'metrics' counts
+    """
+    counts = {'inserted': 0, 'replaced': 0, 'duplicates': 0, 'metrics': 0}
+    target = setup_database(output_db, logger)
+
+    try:
+        for source_db in source_dbs:
+            if os.path.abspath(source_db) == os.path.abspath(output_db):
+                raise ValueError(f"Cannot merge {source_db} into itself")
+            if not os.path.exists(source_db):
+                raise FileNotFoundError(f"Database {source_db} not found")
+            merge_database(source_db, target, counts, logger)
+        # Sources are read-only, so error strings stored by older versions are moved now
+        migrate_error_strings(target, logger)
+    finally:
+        target.close()
+    return counts
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Main function for merging shard databases.
+
+    Args:
+        argv: Command line arguments (default: sys.argv[1:])
+    """
+    parser = argparse.ArgumentParser(description="Merge shard databases into one, deduplicating problems by content hash")
+    parser.add_argument("sources", nargs="+", help="Shard database files to merge")
+    parser.add_argument("--output", "-o", default="leetcode_traces.db",
+                        help="Merged database (created if missing, otherwise added to)")
+    parser.add_argument("--log-level", type=str.upper, choices=LOG_LEVELS,
+                        help="Log verbosity (default: LOG_LEVEL from config)")
+    args = parser.parse_args(argv)
+
+    logger = setup_logging('merge_shards', "Merge Shard Databases", args.log_level)
+
+    start_time = time.time()
+    counts = merge_databases(args.output, args.sources, logger)
+    elapsed_time = time.time() - start_time
+
+    logger.info("=" * 60)
+    logger.info("MERGE COMPLETED", extra={**counts, 'elapsed': round(elapsed_time, 3)})
+    logger.info(f"Sources merged: {len(args.sources)}")
+    logger.info(f"New problems: {counts['inserted']}")
+    logger.info(f"Replaced by a better copy: {counts['replaced']}")
+    logger.info(f"Duplicates skipped: {counts['duplicates']}")
+    logger.info(f"Request metrics copied: {counts['metrics']}")
+    logger.info(f"Merged database: {args.output} ({elapsed_time:.2f} seconds)")
+    logger.info("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
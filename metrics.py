@@ -0,0 +1,121 @@
+"""
+Request Metrics
+Per-request timing and token counts for Ollama calls. Worker threads buffer
+samples in memory; the thread that owns the database connection flushes them
+into the `request_metrics` table, which the run estimator reads back.
+"""
+
+import math
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+_buffer: List[tuple] = []
+_buffer_lock = threading.Lock()
+
+
+def ensure_metrics_table(conn: sqlite3.Connection) -> None:
+    """
+    Create the request_metrics table if it doesn't exist.
+
+    Args:
+        conn: SQLite connection object
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS request_metrics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            model TEXT NOT NULL,
+            input_chars INTEGER,
+            prompt_tokens INTEGER,
+            output_tokens INTEGER,
+            duration REAL NOT NULL,
+            concurrency INTEGER,
+            success INTEGER NOT NULL DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_request_metrics_kind ON request_metrics (kind, success)')
+
+
+def record_request(kind: str, model: str, input_chars: int, prompt_tokens: Optional[int],
+                   output_tokens: Optional[int], duration: float, concurrency: int, success: bool = True) -> None:
+    """
+    Buffer one request sample (safe to call from any thread).
+
+    Args:
+        kind: Request kind, e.g. "generation" or "translation"
+        model: Model the request was sent to
+        input_chars: Length of the prompt in characters
+        prompt_tokens: Prompt tokens reported by Ollama
+        output_tokens: Generated tokens reported by Ollama
+        duration: Wall-clock request time in seconds
+        concurrency: Concurrency limit in effect when the request started
+        success: Whether the request succeeded
+    """
+    with _buffer_lock:
+        _buffer.append((kind, model, input_chars, prompt_tokens, output_tokens,
+                        duration, concurrency, 1 if success else 0, datetime.now()))
+
+
+def flush_metrics(conn: sqlite3.Connection) -> int:
+    """
+    Write buffered samples to the database (call from the connection's thread).
+
+    Args:
+        conn: SQLite connection object
+
+    Returns:
+        Number of samples written
+    """
+    global _buffer
+    with _buffer_lock:
+        rows, _buffer = _buffer, []
+
+    if rows:
+        conn.executemany('''
+            INSERT INTO request_metrics (kind, model, input_chars, prompt_tokens, output_tokens,
+                                         duration, concurrency, success, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        conn.commit()
+    return len(rows)
+
+
+def least_squares_from_sums(n: int, sum_x: float, sum_y: float, sum_xx: float, sum_xy: float,
+                            sum_yy: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Fit y = intercept + slope * x from aggregate sums (as returned by SQL SUMs).
+
+    Args:
+        n: Number of samples
+        sum_x, sum_y, sum_xx, sum_xy: Aggregate sums of the samples
+        sum_yy: Sum of y squared; needed for the residual standard deviation
+
+    Returns:
+        Dictionary with n, intercept, slope and residual_std (None if unknown)
+    """
+    if not n:
+        return {'n': 0, 'intercept': 0.0, 'slope': 0.0, 'residual_std': None}
+
+    denominator = n * sum_xx - sum_x * sum_x
+    if n >= 2 and denominator > 0:
+        slope = max(0.0, (n * sum_xy - sum_x * sum_y) / denominator)
+    else:
+        slope = 0.0
+    intercept = (sum_y - slope * sum_x) / n
+    if intercept < 0:
+        # Keep predictions non-negative: refit through the origin instead
+        intercept = 0.0
+        slope = sum_xy / sum_xx if sum_xx else 0.0
+
+    residual_std = None
+    if sum_yy is not None and n >= 3:
+        # Sum of squared residuals expanded in terms of the aggregate sums
+        sse = (sum_yy - 2 * intercept * sum_y - 2 * slope * sum_xy
+               + n * intercept ** 2 + 2 * intercept * slope * sum_x + slope ** 2 * sum_xx)
+        residual_std = math.sqrt(max(0.0, sse) / (n - 2))
+
+    return {'n': n, 'intercept': intercept, 'slope': slope, 'residual_std': residual_std}
@@ -0,0 +1,74 @@
+"""
+Model Calls
+Single entry point for Ollama generate requests, shared by trace generation
+and translation. Applies the per-request token budget, holds a slot of the
+adaptive concurrency controller for the request kind and rotates requests
+over the active Ollama endpoints. Every request carries the configured
+keep_alive so warmed-up models stay resident for the whole run.
+Each request is recorded as a trace span with its endpoint and token counts.
+Endpoints tuned with `python cli.py autotune` also get their profile's
+num_thread and num_batch (see inference_profiles.py).
+With HEDGE_REQUESTS, late requests are duplicated on another endpoint (see
+hedging.py).
+"""
+
+import time
+from typing import Any
+
+from concurrency import get_controller
+from endpoints import get_client, next_endpoint
+from hedging import hedged_generate, hedging_active
+from inference_profiles import profile_options
+from metrics import record_request
+from token_budget import get_token_budget
+from tracing import span
+from warmup import KEEP_ALIVE
+
+
+def generate(model: str, prompt: str, kind: str, logger=None) -> Any:
+    """
+    Send a generate request to Ollama.
+
+    Every request is also buffered as a request_metrics sample.
+
+    Args:
+        model: Name of the Ollama model to use
+        prompt: The full prompt to send
+        kind: Request kind, e.g. "generation" or "translation"
+        logger: Logger instance for logging
+
+    Returns:
+        The Ollama generate response
+    """
+    token_budget = get_token_budget()
+    options = token_budget.request_options(prompt, kind, logger)
+
+    controller = get_controller(kind, logger)
+    with controller.slot() as sample:
+        concurrency = controller.limit
+        start_time = time.time()
+        endpoint = next_endpoint()
+        try:
+            with span("ollama_request", "model", kind=kind, model=model, endpoint=endpoint,
+                      concurrency=concurrency) as span_args:
+                if hedging_active():
+                    response, span_args['endpoint'] = hedged_generate(model, prompt, options, kind, endpoint, logger)
+                else:
+                    response = get_client(endpoint).generate(
+                        model=model,
+                        prompt=prompt,
+                        options={**profile_options(endpoint, model), **options},
+                        keep_alive=KEEP_ALIVE
+                    )
+                span_args['prompt_tokens'] = response.get('prompt_eval_count')
+                span_args['output_tokens'] = response.get('eval_count')
+        except Exception:
+            record_request(kind, model, len(prompt), None, None, time.time() - start_time, concurrency, success=False)
+            raise
+        sample['tokens'] = (response.get('prompt_eval_count') or 0) + (response.get('eval_count') or 0)
+
+    record_request(kind, model, len(prompt), response.get('prompt_eval_count'), response.get('eval_count'),
+                   time.time() - start_time, concurrency)
+
+    token_budget.record_response(kind, prompt, response, options, logger)
+    return response
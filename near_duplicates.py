@@ -0,0 +1,241 @@
+"""
+Near-Duplicate Detection
+MinHash signatures with locality-sensitive hashing (LSH) over problem
+content, so variants that are almost identical (premium copies, "II"
+versions with the same statement, formatting differences) are not generated
+and translated twice.
+
+The index is first seeded with the problems already stored in the database
+(see index_stored_problems), so a later run, --resume or --start window does
+not process variants of problems an earlier run stored. It then grows
+incrementally while the input streams: every problem is compared with the
+problems seen before it, and the first one of a group is the canonical
+problem. Depending on DEDUP_MODE, a near-duplicate is
+
+- "flag": processed as usual, with duplicate_of set to the canonical
+  problem's content_hash
+- "skip": saved without a trace (translation_status 'duplicate') and never
+  sent to the model
+- "off": not checked at all
+
+Signatures are computed with NumPy. LSH only yields candidates; each one is
+confirmed by its estimated Jaccard similarity against DEDUP_THRESHOLD.
+"""
+
+import re
+import sqlite3
+import time
+import zlib
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from sharding import content_hash
+
+# Try to import configuration, fall back to defaults if not found
+try:
+    from config import DEDUP_MODE, DEDUP_THRESHOLD
+except ImportError:
+    DEDUP_MODE = "flag"  # "flag", "skip" or "off"
+    DEDUP_THRESHOLD = 0.85  # Estimated Jaccard similarity of word shingles
+
+DEDUP_MODES = ("flag", "skip", "off")
+
+# Words per shingle
+SHINGLE_SIZE = 3
+# Signature length = LSH_BANDS * LSH_ROWS; with 16 bands of 8 rows the LSH
+# threshold is about (1/16)^(1/8) = 0.71, and pairs at 0.85 similarity become
+# candidates more than 99% of the time
+LSH_BANDS = 16
+LSH_ROWS = 8
+# Fixed seed: signatures must not change between runs
+MINHASH_SEED = 20240601
+# Stored rows read per batch when seeding the index
+SEED_BATCH_SIZE = 500
+
+_MARKUP = re.compile(r"<[^>]+>|&[a-z]+;|[`*_#>|\\-]")
+_WORD = re.compile(r"\w+")
+
+
+def normalize_content(content: str) -> List[str]:
+    """
+    Reduce problem content to lowercase words, ignoring markup and punctuation.
+
+    Args:
+        content: The problem content/description
+
+    Returns:
+        List of words
+    """
+    return _WORD.findall(_MARKUP.sub(" ", (content or "").lower()))
+
+
+def shingle_hashes(content: str, size: int = SHINGLE_SIZE) -> np.ndarray:
+    """
+    Hash the word shingles of a problem.
+
+    Args:
+        content: The problem content/description
+        size: Words per shingle
+
+    Returns:
+        Unique 32-bit shingle hashes as a uint64 array
+    """
+    words = normalize_content(content)
+    if len(words) < size:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return np.unique(np.fromiter((zlib.crc32(shingle.encode('utf-8')) for shingle in shingles),
+                                 dtype=np.uint64, count=len(shingles)))
+
+
+class NearDuplicateIndex:
+    """
+    Incremental MinHash/LSH index over problem content.
+
+    Each signature value is min over shingles of ((a * x + b) mod 2^64) >> 32,
+    a multiply-shift hash that NumPy evaluates for all permutations at once.
+    """
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD, bands: int = LSH_BANDS, rows: int = LSH_ROWS,
+                 seed: int = MINHASH_SEED):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        rng = np.random.default_rng(seed)
+        num_perm = bands * rows
+        # Odd multipliers keep the multiply-shift family universal
+        self._a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+        self._buckets: Dict[Tuple[int, bytes], List[str]] = {}
+        self._signatures: Dict[str, np.ndarray] = {}
+        # Titles of the canonical problems, for log messages
+        self.titles: Dict[str, str] = {}
+        # Keys added with stored=True that have not reappeared in the input yet
+        self._stored = set()
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def signature(self, content: str) -> np.ndarray:
+        """
+        Compute the MinHash signature of a problem.
+
+        Args:
+            content: The problem content/description
+
+        Returns:
+            uint32 array of bands * rows values
+        """
+        shingles = shingle_hashes(content)
+        with np.errstate(over='ignore'):
+            hashed = (self._a[:, None] * shingles[None, :] + self._b[:, None]) >> np.uint64(32)
+        return hashed.min(axis=1).astype(np.uint32)
+
+    def add(self, key: str, content: str, title: Optional[str] = None,
+            stored: bool = False) -> Optional[Tuple[str, float]]:
+        """
+        Check a problem against the index, then add it if it is not a near-duplicate.
+
+        Args:
+            key: Identifier of the problem (its content_hash)
+            content: The problem content/description
+            title: Problem title, shown when a later problem matches this one
+            stored: The problem is already in the database (seeding); the
+                first time the same problem reappears in the input it is
+                processed again rather than reported as its own duplicate
+
+        Returns:
+            (canonical key, estimated similarity) of the most similar earlier
+            problem above the threshold, or None if the problem is new
+        """
+        if key in self._signatures:
+            if not stored and key in self._stored:
+                self._stored.discard(key)
+                return None
+            return key, 1.0
+
+        signature = self.signature(content)
+        band_keys = [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+                     for band in range(self.bands)]
+
+        candidates = {candidate for band_key in band_keys for candidate in self._buckets.get(band_key, ())}
+        best = None
+        for candidate in candidates:
+            similarity = float(np.mean(self._signatures[candidate] == signature))
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (candidate, similarity)
+        if best is not None:
+            return best
+
+        # Only canonical problems are indexed, so groups do not chain
+        self._signatures[key] = signature
+        if title is not None:
+            self.titles[key] = title
+        if stored:
+            self._stored.add(key)
+        for band_key in band_keys:
+            self._buckets.setdefault(band_key, []).append(key)
+        return None
+
+
+def index_stored_problems(conn: sqlite3.Connection, index: NearDuplicateIndex, logger=None) -> int:
+    """
+    Seed the index with the canonical problems already stored in the database.
+
+    Rows flagged or skipped as near-duplicates (duplicate_of set) are left out,
+    so groups do not chain. Rows are read in batches, so only the signatures
+    are held in memory.
+
+    Args:
+        conn: SQLite connection object (content_hash and duplicate_of columns already exist)
+        index: Index to seed
+        logger: Logger instance for logging
+
+    Returns:
+        Number of stored problems added to the index
+    """
+    start_time = time.time()
+    seeded = 0
+    cursor = conn.execute('SELECT content_hash, title, content FROM leetcode_reasoning '
+                          'WHERE duplicate_of IS NULL ORDER BY id')
+    while True:
+        rows = cursor.fetchmany(SEED_BATCH_SIZE)
+        if not rows:
+            break
+        for key, title, content in rows:
+            if index.add(key or content_hash(content), content, title, stored=True) is None:
+                seeded += 1
+
+    if seeded and logger:
+        logger.info(f"Near-duplicate index seeded with {seeded} stored problems "
+                    f"in {time.time() - start_time:.2f} seconds")
+    return seeded
+
+
+def mark_near_duplicates(entries: Iterable[Dict[str, Any]], index: NearDuplicateIndex,
+                         logger=None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream entries through the index, setting 'duplicate_of' on near-duplicates.
+
+    Args:
+        entries: Entries with 'title' and 'content' (e.g. from iter_leetcode_entries)
+        index: Index shared by the whole run (seeded with index_stored_problems)
+        logger: Logger instance for logging
+
+    Yields:
+        Every entry, with 'content_hash' set and 'duplicate_of' / 'similarity'
+        set when it is a near-duplicate of an earlier entry
+    """
+    for entry in entries:
+        entry['content_hash'] = entry.get('content_hash') or content_hash(entry['content'])
+        match = index.add(entry['content_hash'], entry['content'], entry['title'])
+        if match is not None:
+            entry['duplicate_of'], entry['similarity'] = match
+            if logger:
+                logger.info(f"Near-duplicate: '{entry['title']}' matches '{index.titles.get(match[0], match[0])}' "
+                            f"(similarity {match[1]:.2f})",
+                            extra={'problem': entry['title'], 'duplicate_of': match[0],
+                                   'similarity': round(match[1], 3)})
+        yield entry
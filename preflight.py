@@ -0,0 +1,150 @@
+"""
+Preflight Checks
+Query every configured Ollama endpoint over HTTP (concurrently, with a
+timeout) and verify the required models are present before a run starts.
+The model inventory is cached for a short TTL so repeated checks within a
+process cost nothing.
+"""
+
+import json
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+from endpoints import get_endpoints, set_active_endpoints
+
+# Try to import configuration, fall back to defaults if not found
+try:
+    from config import PREFLIGHT_TIMEOUT, MODEL_INVENTORY_TTL
+except ImportError:
+    PREFLIGHT_TIMEOUT = 3.0  # seconds per endpoint request
+    MODEL_INVENTORY_TTL = 30.0  # seconds a fetched model list stays valid
+
+_inventory_cache: Dict[str, Dict[str, Any]] = {}
+_cache_lock = threading.Lock()
+
+
+def fetch_models(host: str, timeout: float = PREFLIGHT_TIMEOUT) -> List[str]:
+    """
+    Fetch the model names installed on an Ollama endpoint.
+
+    Args:
+        host: Ollama server URL
+        timeout: Request timeout in seconds
+
+    Returns:
+        List of model names (e.g. "qwen3:8b")
+
+    Raises:
+        OSError: If the endpoint cannot be reached or returns an error
+    """
+    with urllib.request.urlopen(f"{host.rstrip('/')}/api/tags", timeout=timeout) as response:
+        payload = json.loads(response.read().decode('utf-8'))
+    return [model.get('name') or model.get('model') for model in payload.get('models', [])]
+
+
+def _fetch_inventory_entry(host: str, timeout: float) -> Dict[str, Any]:
+    """Fetch one endpoint's models, capturing failures instead of raising."""
+    start_time = time.time()
+    try:
+        models = fetch_models(host, timeout)
+        error = None
+    except Exception as e:
+        models = []
+        error = str(e)
+    return {
+        'models': models,
+        'error': error,
+        'latency': time.time() - start_time,
+        'fetched_at': time.time(),
+    }
+
+
+def get_model_inventory(hosts: Optional[List[str]] = None, timeout: float = PREFLIGHT_TIMEOUT,
+                        max_age: float = MODEL_INVENTORY_TTL, refresh: bool = False) -> Dict[str, Dict[str, Any]]:
+    """
+    Return the model inventory of each endpoint, using the TTL cache.
+
+    Endpoints whose cached entry is missing or stale are queried concurrently.
+
+    Args:
+        hosts: Endpoints to check (default: all configured endpoints)
+        timeout: Request timeout in seconds
+        max_age: Maximum age of a cached entry in seconds
+        refresh: Ignore the cache and query every endpoint
+
+    Returns:
+        Dictionary mapping host to {'models', 'error', 'latency', 'fetched_at'}
+    """
+    hosts = hosts or get_endpoints()
+    now = time.time()
+
+    with _cache_lock:
+        stale = [host for host in hosts
+                 if refresh or host not in _inventory_cache or now - _inventory_cache[host]['fetched_at'] > max_age]
+
+    if stale:
+        with ThreadPoolExecutor(max_workers=len(stale)) as pool:
+            results = dict(zip(stale, pool.map(lambda host: _fetch_inventory_entry(host, timeout), stale)))
+        with _cache_lock:
+            _inventory_cache.update(results)
+
+    with _cache_lock:
+        return {host: _inventory_cache[host] for host in hosts}
+
+
+def model_available(model_name: str, models: List[str]) -> bool:
+    """
+    Check whether a model is in an inventory, treating "name" as "name:latest".
+
+    Args:
+        model_name: Model name as configured
+        models: Model names reported by an endpoint
+
+    Returns:
+        bool: True if the model is installed
+    """
+    wanted = model_name if ':' in model_name else f"{model_name}:latest"
+    return any(model == wanted or model == model_name for model in models)
+
+
+def run_preflight(required_models: List[str], logger=None, refresh: bool = False) -> List[str]:
+    """
+    Verify every endpoint is reachable and has the required models.
+
+    Endpoints that pass become the active set used for requests.
+
+    Args:
+        required_models: Models that must be present (e.g. trace and translation models)
+        logger: Logger instance for logging
+        refresh: Ignore cached inventories
+
+    Returns:
+        List of endpoints that passed (empty if none did)
+    """
+    required_models = list(dict.fromkeys(required_models))
+    inventory = get_model_inventory(refresh=refresh)
+    ready = []
+
+    for host, entry in inventory.items():
+        if entry['error']:
+            if logger:
+                logger.warning(f"❌ Ollama endpoint {host} unreachable: {entry['error']}")
+            continue
+
+        missing = [model for model in required_models if not model_available(model, entry['models'])]
+        if missing:
+            if logger:
+                logger.warning(f"❌ Ollama endpoint {host} is missing models: {missing} "
+                               f"(run: ollama pull {' '.join(missing)})")
+            continue
+
+        ready.append(host)
+        if logger:
+            logger.info(f"✅ Ollama endpoint {host} ready in {entry['latency'] * 1000:.0f} ms "
+                        f"(models: {', '.join(required_models)})")
+
+    set_active_endpoints(ready)
+    return ready
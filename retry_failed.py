@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Retry Failed Traces
+Reprocess only the rows recorded in the failures table: failed generations
+are regenerated (and then translated), failed translations are translated
+again. Retries use their own fixed concurrency and an exponential backoff:
+
+- a row is retried only once its backoff delay since the last failure has
+  passed (RETRY_BACKOFF_BASE * 2^(attempts - 1), capped at RETRY_BACKOFF_MAX)
+- rows that failed RETRY_MAX_ATTEMPTS times are left alone
+- overload, timeout and connection errors pause new retries with the same
+  exponential delay, so a struggling server is not hammered
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from typing import Dict, Any, List
+
+from concurrency import get_controller
+from failures import get_failures, classify_error, record_failure, clear_failure
+from logging_setup import setup_logging, with_fields, LOG_LEVELS
+from metrics import flush_metrics
+from preflight import run_preflight
+from tracing import span, instant, start_tracing, write_trace
+from translation import translate_trace_parts, translation_models
+from traceWithThink import (
+    setup_database, generate_entry_trace, translate_entry_trace, update_generated_trace,
+    get_untranslated_traces, save_translation_result
+)
+from warmup import warm_up_models
+
+# Try to import configuration, fall back to defaults if not found
+try:
+    from config import RETRY_CONCURRENCY, RETRY_MAX_ATTEMPTS, RETRY_BACKOFF_BASE, RETRY_BACKOFF_MAX
+except ImportError:
+    RETRY_CONCURRENCY = 1  # Requests in flight while retrying
+    RETRY_MAX_ATTEMPTS = 5  # Give up on a row after this many failures
+    RETRY_BACKOFF_BASE = 30.0  # seconds; doubled with every failure
+    RETRY_BACKOFF_MAX = 1800.0  # seconds
+
+# Error classes that mean the server, not the row, is the problem
+TRANSIENT_ERROR_CLASSES = ("overload", "timeout", "connection")
+
+
+def backoff_delay(attempts: int, base: float = RETRY_BACKOFF_BASE, maximum: float = RETRY_BACKOFF_MAX) -> float:
+    """
+    Return the exponential backoff delay after a number of failures.
+
+    Args:
+        attempts: Number of failures so far
+        base: Delay after the first failure in seconds
+        maximum: Upper bound in seconds
+
+    Returns:
+        Delay in seconds
+    """
+    return min(maximum, base * 2 ** max(0, attempts - 1))
+
+
+def due_failures(failures: List[Dict[str, Any]], ignore_backoff: bool = False) -> List[Dict[str, Any]]:
+    """
+    Keep the failures whose backoff delay has passed.
+
+    Args:
+        failures: Rows returned by get_failures
+        ignore_backoff: Return every failure regardless of its last failure time
+
+    Returns:
+        The failures that are due for a retry
+    """
+    if ignore_backoff:
+        return failures
+    now = datetime.now()
+    due = []
+    for failure in failures:
+        last_failed_at = datetime.fromisoformat(str(failure['last_failed_at']))
+        if (now - last_failed_at).total_seconds() >= backoff_delay(failure['attempts']):
+            due.append(failure)
+    return due
+
+
+def retry_failures(db_file: str, stage: str = None, concurrency: int = RETRY_CONCURRENCY,
+                   max_attempts: int = RETRY_MAX_ATTEMPTS, ignore_backoff: bool = False,
+                   model_name: str = "qwen3:8b", logger=None) -> Dict[str, int]:
+    """
+    Reprocess the failed rows of a database.
+
+    Args:
+        db_file: Path to the SQLite database file
+        stage: Only retry this stage ("generation" or "translation"; default: both)
+        concurrency: Requests in flight at once
+        max_attempts: Skip rows that already failed this many times
+        ignore_backoff: Retry rows even if their backoff delay has not passed
+        model_name: Ollama model for regenerating traces
+        logger: Logger instance for logging
+
+    Returns:
+        Dictionary with 'retried', 'succeeded', 'skipped', 'failed' and 'waiting' counts
+    """
+    conn = setup_database(db_file, logger)
+    counts = {'retried': 0, 'succeeded': 0, 'skipped': 0, 'failed': 0, 'waiting': 0}
+
+    failures = get_failures(conn, stage, max_attempts)
+    due = due_failures(failures, ignore_backoff)
+    counts['waiting'] = len(failures) - len(due)
+    if logger:
+        logger.info(f"Failed rows: {len(failures)} ({len(due)} due for retry, {counts['waiting']} still backing off)")
+
+    if not due:
+        conn.close()
+        return counts
+
+    required_models = translation_models()
+    if any(failure['stage'] == 'generation' for failure in due):
+        required_models.insert(0, model_name)
+    if not run_preflight(required_models, logger):
+        if logger:
+            logger.error("Preflight failed: no Ollama endpoint has the required models")
+        conn.close()
+        return counts
+    warm_up_models(required_models, logger=logger)
+
+    # Retries run at a fixed concurrency instead of the adaptive limits
+    for kind in ('generation', 'translation'):
+        get_controller(kind, logger).pin(concurrency)
+
+    translations = {trace['id']: trace for trace in get_untranslated_traces(conn, logger)}
+    queue = list(due)
+    pause_until = 0.0
+    transient_streak = 0
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='retry') as pool:
+        pending = {}
+
+        while queue or pending:
+            # Keep at most `concurrency` rows in flight, unless the server asked us to back off
+            while queue and len(pending) < concurrency and time.time() >= pause_until:
+                failure = queue.pop(0)
+                trace_id = failure['trace_id']
+                counts['retried'] += 1
+                row_logger = with_fields(logger, problem=failure['title'], trace_id=trace_id,
+                                         stage=failure['stage'], attempt=failure['attempts'] + 1)
+                if row_logger:
+                    row_logger.info(f"Retrying {failure['stage']} of '{failure['title']}' "
+                                    f"(attempt {failure['attempts'] + 1}, last error: {failure['error_class']})",
+                                    extra={'error_class': failure['error_class'], 'last_error': failure['last_error']})
+
+                if failure['stage'] == 'generation':
+                    title, content = conn.execute('SELECT title, content FROM leetcode_reasoning WHERE id = ?',
+                                                  (trace_id,)).fetchone()
+                    future = pool.submit(generate_entry_trace, {'title': title, 'content': content}, model_name, row_logger)
+                    pending[future] = ('generate', trace_id, row_logger)
+                elif trace_id in translations:
+                    trace = translations[trace_id]
+                    future = pool.submit(translate_trace_parts, trace['think_en'], trace['answer_en'], trace['title'],
+                                         parts=trace['retranslate_parts'], logger=row_logger,
+                                         think_hi=trace['think_hi'], answer_hi=trace['answer_hi'])
+                    pending[future] = ('translate', trace_id, row_logger)
+                else:
+                    # The row was translated since the failure was recorded
+                    clear_failure(conn, trace_id, 'translation')
+                    counts['retried'] -= 1
+
+            if not pending:
+                with span("backoff_sleep", "sleep"):
+                    time.sleep(max(0.0, min(1.0, pause_until - time.time())))
+                continue
+
+            with span("wait_for_workers", "idle", pending=len(pending)):
+                done, _ = wait(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+            flush_metrics(conn)
+            for future in done:
+                step, trace_id, row_logger = pending.pop(future)
+                result = future.result()
+
+                if step == 'generate' and result['trace_en_with_think'] is None:
+                    error = result['error']
+                    record_failure(conn, trace_id, 'generation', error)
+                elif step == 'generate':
+                    # Regenerated: store it and translate it in the same run
+                    update_generated_trace(conn, trace_id, result['trace_en_with_think'], row_logger,
+                                           model=result['generation_model'], prompt_hash=result['generation_prompt_hash'])
+                    future = pool.submit(translate_entry_trace, result, row_logger)
+                    pending[future] = ('translate', trace_id, row_logger)
+                    continue
+                else:
+                    outcome = save_translation_result(conn, trace_id, result, row_logger)
+                    if outcome == 'skipped':
+                        # Nothing to translate; the row left the failures table
+                        counts['skipped'] += 1
+                        if row_logger:
+                            row_logger.info(f"Trace ID {trace_id} has nothing to translate: {result['skipped']}")
+                        continue
+                    error = None if outcome == 'completed' else result['issue']
+
+                if error is None:
+                    counts['succeeded'] += 1
+                    transient_streak = 0
+                    if row_logger:
+                        row_logger.info(f"✅ Trace ID {trace_id} reprocessed")
+                    continue
+
+                counts['failed'] += 1
+                if row_logger:
+                    row_logger.error(f"❌ Retry of trace ID {trace_id} failed: {error}",
+                                     extra={'error_class': classify_error(error)})
+
+                if classify_error(error) in TRANSIENT_ERROR_CLASSES:
+                    transient_streak += 1
+                    delay = backoff_delay(transient_streak)
+                    pause_until = time.time() + delay
+                    instant("backoff", "sleep", trace_id=trace_id, streak=transient_streak, delay=delay)
+                    if logger:
+                        logger.warning(f"Transient error streak {transient_streak}; pausing new retries for {delay:.0f} seconds")
+
+    flush_metrics(conn)
+    conn.close()
+    return counts
+
+
+def main(argv=None):
+    """
+    Main function for retrying failed traces.
+
+    Args:
+        argv: Command line arguments (default: sys.argv[1:])
+    """
+    parser = argparse.ArgumentParser(description="Reprocess only the rows recorded in the failures table")
+    parser.add_argument("--db", default="leetcode_traces.db", help="Database file path")
+    parser.add_argument("--stage", choices=("generation", "translation"), help="Only retry this stage (default: both)")
+    parser.add_argument("--model", default="qwen3:8b", help="Ollama model for regenerating traces")
+    parser.add_argument("--concurrency", type=int, default=RETRY_CONCURRENCY, help="Requests in flight at once")
+    parser.add_argument("--max-attempts", type=int, default=RETRY_MAX_ATTEMPTS,
+                        help="Skip rows that already failed this many times")
+    parser.add_argument("--now", action="store_true", help="Ignore the backoff delay since the last failure")
+    parser.add_argument("--log-level", type=str.upper, choices=LOG_LEVELS,
+                        help="Log verbosity (default: LOG_LEVEL from config)")
+    parser.add_argument("--trace", metavar="FILE", default=None,
+                        help="Write a Chrome/Perfetto trace-event timeline of the run to FILE (default: TRACE_FILE from config)")
+    args = parser.parse_args(argv)
+
+    logger = setup_logging('retry_failed', "Retry Failed Traces", args.log_level)
+    start_tracing(args.trace)
+
+    start_time = time.time()
+    counts = retry_failures(args.db, args.stage, max(1, args.concurrency), args.max_attempts,
+                            args.now, args.model, logger)
+    elapsed_time = time.time() - start_time
+
+    logger.info("=" * 60)
+    logger.info("RETRY RUN COMPLETED", extra={**counts, 'elapsed': round(elapsed_time, 3)})
+    logger.info(f"Retried: {counts['retried']}")
+    logger.info(f"Succeeded: {counts['succeeded']}")
+    logger.info(f"Skipped (nothing to translate): {counts['skipped']}")
+    logger.info(f"Failed again: {counts['failed']}")
+    logger.info(f"Still backing off: {counts['waiting']}")
+    logger.info(f"Total execution time: {elapsed_time:.2f} seconds")
+    logger.info("=" * 60)
+    write_trace(logger)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Run Budget and Graceful Stop
+Lets a generation run end cleanly, either at a wall-clock deadline
+(`--time-budget 7h30m`) or on SIGINT/SIGTERM.
+
+When the budget is close to running out, or a signal arrives, the pipeline
+stops taking new problems. Queued generations that have not started are
+cancelled. In-flight generations and their translations are drained, and the
+pending database writes are flushed. The first signal starts the drain; a
+second SIGINT aborts immediately.
+
+"Close to running out" means the remaining time is less than DRAIN_RESERVE,
+or less than the time an average problem has taken so far (generation plus
+translation), whichever is larger.
+
+A checkpoint next to the database (leetcode_traces.checkpoint.json) records
+the slice being processed and why the run stopped. `--resume` reads the same
+slice again and skips every problem already stored in the database.
+"""
+
+import json
+import os
+import re
+import signal
+import sqlite3
+import time
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+# Try to import configuration, fall back to defaults if not found
+try:
+    from config import TIME_BUDGET, DRAIN_RESERVE
+except ImportError:
+    TIME_BUDGET = None  # Wall-clock budget of a generation run in seconds; None means no deadline
+    DRAIN_RESERVE = 120.0  # Seconds kept free at the end of the budget to drain in-flight problems
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)([hms])")
+_DURATION_UNITS = {'h': 3600, 'm': 60, 's': 1}
+
+
+def parse_duration(value: str) -> float:
+    """
+    Parse a duration such as "3600", "90m", "7h30m" or "1h15m30s".
+
+    Args:
+        value: Plain seconds or a combination of h/m/s parts
+
+    Returns:
+        Duration in seconds
+
+    Raises:
+        ValueError: If the value is not a positive duration (argparse reports it as invalid)
+    """
+    value = value.strip().lower()
+    try:
+        seconds = float(value)
+    except ValueError:
+        parts = _DURATION_PART.findall(value)
+        if not parts or "".join(number + unit for number, unit in parts) != value:
+            raise ValueError(f"invalid duration '{value}'")
+        seconds = sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+    if seconds <= 0:
+        raise ValueError(f"invalid duration '{value}'")
+    return seconds
+
+
+def checkpoint_path(db_file: str) -> str:
+    """
+    Return the checkpoint path of a database.
+
+    Args:
+        db_file: Path to the SQLite database
+
+    Returns:
+        Path such as "leetcode_traces.checkpoint.json"
+    """
+    return os.path.splitext(db_file)[0] + ".checkpoint.json"
+
+
+def write_checkpoint(db_file: str, checkpoint: Dict[str, Any], logger=None) -> str:
+    """
+    Write the resume checkpoint of a run.
+
+    Args:
+        db_file: Path to the SQLite database the run writes to
+        checkpoint: Slice and outcome of the run (input, start, num_entries, stopped, ...)
+        logger: Logger instance for logging
+
+    Returns:
+        Path of the checkpoint file
+    """
+    path = checkpoint_path(db_file)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump({**checkpoint, 'updated_at': datetime.now().isoformat(timespec='seconds')}, file, indent=2)
+    os.replace(temp_path, path)
+    if logger:
+        logger.info(f"Checkpoint written to {path}")
+    return path
+
+
+def read_checkpoint(db_file: str) -> Optional[Dict[str, Any]]:
+    """
+    Read the resume checkpoint of a database.
+
+    Args:
+        db_file: Path to the SQLite database
+
+    Returns:
+        The checkpoint, or None if there is none
+    """
+    try:
+        with open(checkpoint_path(db_file), 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def stored_hash_keys(conn: sqlite3.Connection) -> np.ndarray:
+    """
+    Return the hash keys (64-bit content_hash prefixes) of every stored problem.
+
+    Args:
+        conn: SQLite connection object
+
+    Returns:
+        uint64 array comparable with InputIndex.hash_keys
+    """
+    rows = conn.execute('SELECT DISTINCT content_hash FROM leetcode_reasoning WHERE content_hash IS NOT NULL')
+    return np.array([int(row[0][:16], 16) for row in rows], dtype=np.uint64)
+
+
+class RunBudget:
+    """
+    Decide when a run must stop taking new problems.
+
+    Stops on SIGINT/SIGTERM, or when the remaining time budget can no longer
+    fit another problem plus the drain reserve.
+    """
+
+    def __init__(self, time_budget: Optional[float] = TIME_BUDGET, drain_reserve: float = DRAIN_RESERVE,
+                 logger=None):
+        self.time_budget = time_budget
+        self.drain_reserve = drain_reserve
+        self.logger = logger
+        self.started = time.monotonic()
+        self.stop_reason: Optional[str] = None
+        self._problem_seconds = 0.0
+        self._problems = 0
+        self._previous_handlers = {}
+
+    def install_signal_handlers(self) -> None:
+        """Handle SIGINT/SIGTERM by draining; must be called from the main thread."""
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            self._previous_handlers[signum] = signal.signal(signum, self._handle_signal)
+
+    def restore_signal_handlers(self) -> None:
+        """Restore the handlers replaced by install_signal_handlers."""
+        for signum, handler in self._previous_handlers.items():
+            signal.signal(signum, handler)
+        self._previous_handlers.clear()
+
+    def _handle_signal(self, signum, frame) -> None:
+        name = signal.Signals(signum).name
+        if self.stop_reason is not None and signum == signal.SIGINT:
+            # Second Ctrl-C: give up on the drain
+            self.restore_signal_handlers()
+            raise KeyboardInterrupt
+        if self.stop_reason is None:
+            self.stop_reason = name
+            if self.logger:
+                self.logger.warning(f"Received {name}: no new problems will be started, draining in-flight work "
+                                    f"(press Ctrl-C again to abort)")
+
+    def record_problem(self, seconds: float) -> None:
+        """
+        Record how long a finished problem took, used to predict the drain time.
+
+        Args:
+            seconds: Generation plus translation time of the problem
+        """
+        self._problem_seconds += seconds
+        self._problems += 1
+
+    def elapsed(self) -> float:
+        """Return the seconds since the run started."""
+        return time.monotonic() - self.started
+
+    def remaining(self) -> Optional[float]:
+        """Return the seconds left in the budget, or None without a budget."""
+        if self.time_budget is None:
+            return None
+        return self.time_budget - self.elapsed()
+
+    def should_stop(self) -> bool:
+        """
+        Check whether the run must stop taking new problems.
+
+        Returns:
+            bool: True after a signal, or when the budget is nearly used up
+        """
+        if self.stop_reason is None and self.time_budget is not None:
+            average = self._problem_seconds / self._problems if self._problems else 0.0
+            if self.remaining() < max(self.drain_reserve, average):
+                self.stop_reason = 'time budget'
+                if self.logger:
+                    self.logger.warning(f"Time budget nearly used ({self.elapsed():.0f}s of {self.time_budget:.0f}s): "
+                                        f"no new problems will be started, draining in-flight work")
+        return self.stop_reason is not None
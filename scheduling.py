@@ -0,0 +1,165 @@
+"""
+Work Scheduling
+Length-aware ordering of problems over a lookahead window of the input
+stream, so long problems do not end up as a single-request tail.
+"""
+
+import sqlite3
+from typing import Dict, Any, Iterable, Iterator
+
+from metrics import least_squares_from_sums
+from token_budget import estimate_tokens
+
+# Try to import configuration, fall back to defaults if not found
+try:
+    from config import SCHEDULE_POLICY, SCHEDULE_WINDOW
+except ImportError:
+    SCHEDULE_POLICY = "file"  # "file", "longest-first", "shortest-first" or "interleaved"
+    SCHEDULE_WINDOW = 64  # Number of upcoming problems considered when picking the next one
+
+SCHEDULE_POLICIES = ("file", "longest-first", "shortest-first", "interleaved")
+
+# Output tokens assumed per problem before any traces have been stored
+DEFAULT_OUTPUT_TOKENS = 2000
+
+
+class OutputLengthPredictor:
+    """
+    Predict the output length of a generation from its input length with a
+    least-squares line fitted over traces already stored in the database.
+    """
+
+    def __init__(self, intercept: float = DEFAULT_OUTPUT_TOKENS, slope: float = 0.0):
+        self.intercept = intercept
+        self.slope = slope
+        self.residual_std = None
+
+    def fit_from_database(self, conn: sqlite3.Connection, logger=None) -> int:
+        """
+        Fit the predictor from stored content lengths and output token counts.
+
+        Only aggregate sums are read, so the cost does not depend on row count
+        beyond a single table scan.
+
+        Args:
+            conn: SQLite connection object
+            logger: Logger instance for logging
+
+        Returns:
+            Number of rows the fit was based on
+        """
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT COUNT(*), SUM(x), SUM(y), SUM(x * x), SUM(x * y), SUM(y * y)
+            FROM (
+                SELECT LENGTH(content) AS x,
+                       COALESCE(think_token_count, 0) + COALESCE(answer_token_count, 0) AS y
+                FROM leetcode_reasoning
+                WHERE think_token_count IS NOT NULL OR answer_token_count IS NOT NULL
+            )
+        ''')
+        fit = least_squares_from_sums(*cursor.fetchone())
+        n = fit['n']
+        if not n:
+            return 0
+
+        self.intercept = fit['intercept']
+        self.slope = fit['slope']
+        self.residual_std = fit['residual_std']
+
+        if logger:
+            logger.info(f"Output length model from {n} traces: "
+                        f"{self.intercept:.0f} + {self.slope:.3f} x content characters")
+        return n
+
+    def predict(self, content_chars: int) -> float:
+        """
+        Predict the number of output tokens for a problem.
+
+        Args:
+            content_chars: Length of the problem content in characters
+
+        Returns:
+            Predicted output token count
+        """
+        return self.intercept + self.slope * content_chars
+
+
+def estimate_entry_cost(entry: Dict[str, Any], predictor: OutputLengthPredictor) -> float:
+    """
+    Estimate the relative cost of processing an entry, in tokens.
+
+    Args:
+        entry: Dictionary with the problem title and content
+        predictor: Output length predictor
+
+    Returns:
+        Estimated input plus predicted output tokens
+    """
+    content = entry.get('content', '')
+    return estimate_tokens(content) + predictor.predict(len(content))
+
+
+def schedule_entries(entries: Iterable[Dict[str, Any]], policy: str = None, window: int = None,
+                     predictor: OutputLengthPredictor = None, logger=None) -> Iterator[Dict[str, Any]]:
+    """
+    Reorder a stream of entries by estimated cost within a lookahead window.
+
+    Policies:
+        file: keep input order
+        longest-first: always emit the most expensive entry in the window
+        shortest-first: always emit the cheapest entry in the window
+        interleaved: alternate between the most and least expensive entries
+
+    Args:
+        entries: Iterable of entry dictionaries (consumed lazily)
+        policy: Scheduling policy (default: SCHEDULE_POLICY)
+        window: Lookahead window size (default: SCHEDULE_WINDOW)
+        predictor: Output length predictor (default: an unfitted predictor)
+        logger: Logger instance for logging
+
+    Yields:
+        Entry dictionaries in scheduled order, each with an added 'estimated_cost'
+    """
+    policy = policy or SCHEDULE_POLICY
+    window = max(1, window or SCHEDULE_WINDOW)
+    predictor = predictor or OutputLengthPredictor()
+
+    if policy not in SCHEDULE_POLICIES:
+        raise ValueError(f"Invalid schedule policy '{policy}', expected one of {SCHEDULE_POLICIES}")
+
+    if logger:
+        logger.info(f"Scheduling policy: {policy} (lookahead window: {window})")
+
+    if policy == "file":
+        for entry in entries:
+            entry['estimated_cost'] = estimate_entry_cost(entry, predictor)
+            yield entry
+        return
+
+    buffer = []  # Kept sorted by estimated cost, cheapest first
+    pick_longest = policy != "shortest-first"
+    iterator = iter(entries)
+    exhausted = False
+
+    while True:
+        while not exhausted and len(buffer) < window:
+            try:
+                entry = next(iterator)
+            except StopIteration:
+                exhausted = True
+                break
+            entry['estimated_cost'] = estimate_entry_cost(entry, predictor)
+            # Insertion keeps the buffer sorted; the window is small so this stays cheap
+            index = len(buffer)
+            while index > 0 and buffer[index - 1]['estimated_cost'] > entry['estimated_cost']:
+                index -= 1
+            buffer.insert(index, entry)
+
+        if not buffer:
+            return
+
+        yield buffer.pop() if pick_longest else buffer.pop(0)
+
+        if policy == "interleaved":
+            pick_longest = not pick_longest
@@ -0,0 +1,130 @@
+"""
+Full-Text Search Index
+An SQLite FTS5 index over the title, problem content and English/Hindi
+traces of every row, so curation queries ("which traces mention a segment
+tree?", "which translations contain this bad phrase?") are index lookups
+instead of LIKE '%...%' scans over large TEXT columns.
+
+The index is an external-content FTS5 table (leetcode_search) that stores
+only the index, not a second copy of the text. Triggers keep it in sync with
+leetcode_reasoning on every insert, delete and update of an indexed column,
+and it is built once for existing rows when it is created.
+
+The tokenizer is unicode61 with Unicode mark categories (M*) treated as
+token characters. By default unicode61 splits words at Devanagari vowel
+signs and viramas, so "हिन्दी" would be indexed as fragments. Zero-width
+joiners/non-joiners, which appear inside Hindi words, are token characters
+too. Search from the command line with `python check_db.py --search QUERY`.
+"""
+
+import sqlite3
+from typing import Dict, Any, List
+
+SEARCH_TABLE = 'leetcode_search'
+SEARCH_COLUMNS = ('title', 'content', 'trace_en_with_think', 'trace_hi_with_think')
+SEARCH_TOKENIZER = "unicode61 remove_diacritics 2 categories 'L* N* Co M*' tokenchars '\u200c\u200d'"
+# bm25 weight per column: a match in the title counts most
+SEARCH_WEIGHTS = (10.0, 2.0, 1.0, 1.0)
+# Tokens of context around each match in a snippet
+SNIPPET_TOKENS = 16
+
+
+def search_index_exists(conn: sqlite3.Connection) -> bool:
+    """
+    Check whether the full-text index has been created.
+
+    Args:
+        conn: SQLite connection object
+
+    Returns:
+        bool: True if the index table exists
+    """
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                        (SEARCH_TABLE,)).fetchone() is not None
+
+
+def ensure_search_index(conn: sqlite3.Connection, logger=None) -> bool:
+    """
+    Create the FTS5 index and its sync triggers, indexing existing rows once.
+
+    Args:
+        conn: SQLite connection object (leetcode_reasoning already exists)
+        logger: Logger instance for logging
+
+    Returns:
+        bool: True if the index is available (False if SQLite lacks FTS5)
+    """
+    columns = ', '.join(SEARCH_COLUMNS)
+    new_values = ', '.join(f'new.{column}' for column in SEARCH_COLUMNS)
+    old_values = ', '.join(f'old.{column}' for column in SEARCH_COLUMNS)
+
+    created = not search_index_exists(conn)
+    try:
+        conn.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+                {columns},
+                content='leetcode_reasoning', content_rowid='id',
+                tokenize="{SEARCH_TOKENIZER}"
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        if logger:
+            logger.warning(f"Full-text search index not available ({e}); check_db --search is disabled")
+        return False
+
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_insert AFTER INSERT ON leetcode_reasoning BEGIN
+            INSERT INTO {SEARCH_TABLE} (rowid, {columns}) VALUES (new.id, {new_values});
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_delete AFTER DELETE ON leetcode_reasoning BEGIN
+            INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_update AFTER UPDATE OF {columns} ON leetcode_reasoning BEGIN
+            INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {SEARCH_TABLE} (rowid, {columns}) VALUES (new.id, {new_values});
+        END
+    ''')
+
+    if created:
+        conn.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('rebuild')")
+        conn.commit()
+        indexed = conn.execute('SELECT COUNT(*) FROM leetcode_reasoning').fetchone()[0]
+        if indexed and logger:
+            logger.info(f"Built full-text search index over {indexed} existing rows")
+    return True
+
+
+def search_traces(conn: sqlite3.Connection, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """
+    Run a full-text query, best matches first.
+
+    The query uses FTS5 syntax: words, "exact phrases", prefix*, AND/OR/NOT,
+    NEAR(...), and column filters such as `trace_hi_with_think: शब्द`.
+
+    Args:
+        conn: SQLite connection object
+        query: FTS5 query string
+        limit: Maximum number of results
+
+    Returns:
+        List of dictionaries with id, title, translation_status, score and snippet
+        (matches wrapped in [ ])
+
+    Raises:
+        sqlite3.OperationalError: If the query is not valid FTS5 syntax
+    """
+    weights = ', '.join(str(weight) for weight in SEARCH_WEIGHTS)
+    rows = conn.execute(f'''
+        SELECT r.id, r.title, r.translation_status, bm25({SEARCH_TABLE}, {weights}) AS score,
+               snippet({SEARCH_TABLE}, -1, '[', ']', '...', {SNIPPET_TOKENS})
+        FROM {SEARCH_TABLE} JOIN leetcode_reasoning r ON r.id = {SEARCH_TABLE}.rowid
+        WHERE {SEARCH_TABLE} MATCH ?
+        ORDER BY score
+        LIMIT ?
+    ''', (query, limit)).fetchall()
+    return [{'id': row[0], 'title': row[1], 'translation_status': row[2], 'score': row[3], 'snippet': row[4]}
+            for row in rows]
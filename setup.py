@@ -20,7 +20,7 @@ def check_python_version():
 
 def check_dependencies():
     """Check if required dependencies are installed."""
-    required_packages = ['requests', 'sqlite3']
+    required_packages = ['requests', 'sqlite3', 'numpy']
     missing_packages = []
     
     for package in required_packages:
@@ -39,36 +39,35 @@ def check_dependencies():
     return True
 
 def check_ollama():
-    """Check if Ollama is available and has required models."""
-    try:
-        import subprocess
-        result = subprocess.run(['ollama', 'list'], capture_output=True, text=True)
-        if result.returncode == 0:
-            print("✅ Ollama is installed and running")
-            models = result.stdout
-            if 'qwen3:8b' in models:
-                print("✅ qwen3:8b model is available")
-            else:
-                print("⚠️  qwen3:8b model not found. Run: ollama pull qwen3:8b")
-            
-            # Check for Sarvam model
-            if 'sarvam' in models:
-                print("✅ Sarvam model is available")
-            else:
-                print("⚠️  Sarvam model not found. Ensure your local Sarvam model is available in Ollama")
-                print("   If you have a different model name, update SARVAM_MODEL_NAME in config.py")
-            
-            return True
+    """Check if the configured Ollama endpoints are reachable and have the required models."""
+    from preflight import get_model_inventory, model_available
+    
+    inventory = get_model_inventory()
+    reachable = False
+    
+    for host, entry in inventory.items():
+        if entry['error']:
+            print(f"❌ Ollama endpoint {host} is not accessible: {entry['error']}")
+            continue
+        
+        reachable = True
+        print(f"✅ Ollama is running at {host}")
+        models = entry['models']
+        if model_available('qwen3:8b', models):
+            print("✅ qwen3:8b model is available")
         else:
-            print("❌ Ollama is not running or not accessible")
-            return False
-    except FileNotFoundError:
-        print("❌ Ollama is not installed")
-        print("   Install from: https://ollama.ai/")
-        return False
-    except Exception as e:
-        print(f"❌ Error checking Ollama: {e}")
-        return False
+            print("⚠️  qwen3:8b model not found. Run: ollama pull qwen3:8b")
+        
+        # Check for Sarvam model
+        if any('sarvam' in model for model in models):
+            print("✅ Sarvam model is available")
+        else:
+            print("⚠️  Sarvam model not found. Ensure your local Sarvam model is available in Ollama")
+            print("   If you have a different model name, update SARVAM_MODEL_NAME in config.py")
+    
+    if not reachable:
+        print("   Start Ollama with: ollama serve (install from https://ollama.ai/)")
+    return reachable
 
 def setup_config():
     """Set up configuration file."""
@@ -112,10 +111,10 @@ def check_input_file():
     if os.path.exists(input_file):
         print(f"✅ {input_file} exists")
         
-        # Check file size and format
+        # Count problems from the sidecar offset index (built on first use)
         try:
-            with open(input_file, 'r', encoding='utf-8') as f:
-                line_count = sum(1 for _ in f)
+            from input_index import count_entries
+            line_count = count_entries(input_file)
             print(f"   Contains {line_count} problems")
             return True
         except Exception as e:
@@ -0,0 +1,117 @@
+"""
+Sharding
+Deterministic split of the input across machines. Every problem is assigned
+to a shard by the hash of its content (stored per line in the input offset
+index, see input_index.py), so `--shard i/N` selects the same problems on
+every node regardless of input order, and each node writes its
+own database (leetcode_traces.shard-i-of-N.db). The shard databases are
+combined afterwards with `python cli.py merge`.
+
+The same content hash is stored in the content_hash column of every row and
+is the key used to deduplicate problems when merging.
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+from typing import Tuple
+
+# Rows hashed per transaction when backfilling content_hash
+BACKFILL_BATCH_SIZE = 500
+
+
+def content_hash(content: str) -> str:
+    """
+    Return the hash that identifies a problem across shards and databases.
+
+    Args:
+        content: The problem content/description
+
+    Returns:
+        Hex SHA-256 of the content with surrounding whitespace removed
+    """
+    return hashlib.sha256((content or "").strip().encode('utf-8')).hexdigest()
+
+
+def shard_of(hash_hex: str, num_shards: int) -> int:
+    """
+    Return the 1-based shard a content hash belongs to.
+
+    Args:
+        hash_hex: Value returned by content_hash
+        num_shards: Total number of shards
+
+    Returns:
+        Shard number between 1 and num_shards
+    """
+    return int(hash_hex[:16], 16) % num_shards + 1
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """
+    Parse a `--shard i/N` argument.
+
+    Args:
+        value: Shard spec such as "2/4" (shards are numbered from 1)
+
+    Returns:
+        Tuple of (shard number, number of shards)
+
+    Raises:
+        argparse.ArgumentTypeError: If the spec is malformed or out of range
+    """
+    try:
+        index, total = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid shard '{value}', expected i/N such as 1/4")
+    if total < 1 or not 1 <= index <= total:
+        raise argparse.ArgumentTypeError(f"invalid shard '{value}', i must be between 1 and N")
+    return index, total
+
+
+def shard_db_path(db_file: str, index: int, total: int) -> str:
+    """
+    Return the per-shard database path derived from the base database path.
+
+    Args:
+        db_file: Base database path, e.g. "leetcode_traces.db"
+        index: Shard number (1-based)
+        total: Number of shards
+
+    Returns:
+        Path such as "leetcode_traces.shard-2-of-4.db"
+    """
+    root, extension = os.path.splitext(db_file)
+    return f"{root}.shard-{index}-of-{total}{extension or '.db'}"
+
+
+def ensure_content_hashes(conn: sqlite3.Connection, logger=None) -> int:
+    """
+    Index content_hash and fill it in for rows saved before it existed.
+
+    Rows are hashed in batches, so memory use does not grow with the database.
+
+    Args:
+        conn: SQLite connection object (content_hash column already exists)
+        logger: Logger instance for logging
+
+    Returns:
+        Number of rows backfilled
+    """
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_leetcode_reasoning_content_hash ON leetcode_reasoning (content_hash)')
+
+    backfilled = 0
+    while True:
+        rows = conn.execute('SELECT id, content FROM leetcode_reasoning WHERE content_hash IS NULL LIMIT ?',
+                            (BACKFILL_BATCH_SIZE,)).fetchall()
+        if not rows:
+            break
+        conn.executemany('UPDATE leetcode_reasoning SET content_hash = ? WHERE id = ?',
+                         [(content_hash(content), trace_id) for trace_id, content in rows])
+        conn.commit()
+        backfilled += len(rows)
+
+    if backfilled and logger:
+        logger.info(f"Computed content_hash for {backfilled} existing rows")
+    return backfilled
@@ -0,0 +1,10 @@
+"""
+Test configuration
+The pipeline modules live at the repository root and are imported as
+top-level modules, the same way the scripts import each other.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,136 @@
+"""
+Tests for the sidecar offset index of the input JSONL (input_index.py)
+"""
+
+import gzip
+import json
+import os
+
+import numpy as np
+import pytest
+
+import input_index
+from input_index import load_input_index, index_path, count_entries
+from sharding import content_hash, shard_of
+
+
+def _write_jsonl(path, contents):
+    with open(path, 'w', encoding='utf-8') as f:
+        for i, content in enumerate(contents):
+            f.write(json.dumps({'title': f"Problem {i}", 'content': content}) + "\n")
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    """Count the full index builds."""
+    calls = []
+    build = input_index.build_input_index
+
+    def counting_build(file_path, logger=None):
+        calls.append(file_path)
+        return build(file_path, logger)
+
+    monkeypatch.setattr(input_index, 'build_input_index', counting_build)
+    return calls
+
+
+def test_offsets_point_at_each_line(tmp_path):
+    path = str(tmp_path / "input.jsonl")
+    _write_jsonl(path, ["first", "second problem", "third — ünïcode"])
+
+    index = load_input_index(path)
+
+    assert len(index) == 3
+    lines = dict(index.read_lines(np.arange(3)))
+    assert [json.loads(lines[i])['content'] for i in range(3)] == ["first", "second problem", "third — ünïcode"]
+    assert int(index.offsets[-1]) == os.path.getsize(path)
+
+
+def test_sidecar_is_reused_while_the_file_is_unchanged(tmp_path, builds):
+    path = str(tmp_path / "input.jsonl")
+    _write_jsonl(path, ["a", "b"])
+
+    load_input_index(path)
+    assert os.path.exists(index_path(path))
+    assert count_entries(path) == 2
+    assert len(builds) == 1
+
+
+def test_rebuilt_when_the_size_changes(tmp_path, builds):
+    path = str(tmp_path / "input.jsonl")
+    _write_jsonl(path, ["a", "b"])
+    load_input_index(path)
+    stat = os.stat(path)
+
+    _write_jsonl(path, ["a", "b", "c"])
+    # Keep the old mtime so only the size differs
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    index = load_input_index(path)
+    assert len(builds) == 2
+    assert len(index) == 3
+
+
+def test_rebuilt_when_only_the_mtime_changes(tmp_path, builds):
+    path = str(tmp_path / "input.jsonl")
+    _write_jsonl(path, ["aa", "bb"])
+    load_input_index(path)
+    stat = os.stat(path)
+
+    # Same size, different content
+    _write_jsonl(path, ["cc", "dd"])
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert os.path.getsize(path) == stat.st_size
+
+    index = load_input_index(path)
+    assert len(builds) == 2
+    assert list(index.hash_keys) == [int(content_hash(c)[:16], 16) for c in ("cc", "dd")]
+
+
+def test_rebuilt_when_the_sidecar_is_unreadable(tmp_path, builds):
+    path = str(tmp_path / "input.jsonl")
+    _write_jsonl(path, ["a"])
+    with open(index_path(path), 'wb') as f:
+        f.write(b"not an index")
+
+    assert len(load_input_index(path)) == 1
+    assert len(builds) == 1
+    # The broken sidecar was replaced, so the next load reuses it
+    load_input_index(path)
+    assert len(builds) == 1
+
+
+def test_select_slice_and_shard_match_shard_of(tmp_path):
+    path = str(tmp_path / "input.jsonl")
+    contents = [f"problem {i}" for i in range(50)]
+    _write_jsonl(path, contents)
+    index = load_input_index(path)
+
+    assert list(index.select(10, 5)) == [10, 11, 12, 13, 14]
+    assert list(index.select(48, 10)) == [48, 49]
+    for shard in (1, 2, 3):
+        expected = [i for i, content in enumerate(contents) if shard_of(content_hash(content), 3) == shard]
+        assert list(index.select(shard=(shard, 3))) == expected
+
+
+def test_select_excludes_stored_problems(tmp_path):
+    path = str(tmp_path / "input.jsonl")
+    _write_jsonl(path, ["a", "b", "c"])
+    index = load_input_index(path)
+
+    stored = np.array([int(content_hash("b")[:16], 16)], dtype=np.uint64)
+    assert list(index.select(exclude_keys=stored)) == [0, 2]
+
+
+def test_gzip_input_is_indexed_on_the_decompressed_stream(tmp_path):
+    plain = str(tmp_path / "input.jsonl")
+    _write_jsonl(plain, ["a", "b", "c"])
+    path = str(tmp_path / "input.jsonl.gz")
+    with open(plain, 'rb') as source, gzip.open(path, 'wb') as target:
+        target.write(source.read())
+
+    index = load_input_index(path)
+
+    assert index.compression == 'gzip'
+    assert len(index) == 3
+    assert [json.loads(line)['content'] for _, line in index.read_lines(np.array([0, 2]))] == ["a", "c"]
@@ -0,0 +1,122 @@
+"""
+Tests for near-duplicate detection (near_duplicates.py)
+"""
+
+import pytest
+
+from near_duplicates import NearDuplicateIndex, index_stored_problems, mark_near_duplicates, normalize_content
+from sharding import content_hash
+from traceWithThink import setup_database
+
+TWO_SUM = ("Given an array of integers nums and an integer target, return indices of the two numbers "
+           "such that they add up to target. You may assume that each input would have exactly one "
+           "solution, and you may not use the same element twice. You can return the answer in any order. "
+           "Follow-up: can you come up with an algorithm that is less than quadratic time complexity?")
+# Same statement with different markup and one extra sentence
+TWO_SUM_VARIANT = ("<p>Given an <code>array</code> of integers <em>nums</em> and an integer target, return "
+                   "indices of the two numbers such that they add up to target.</p> You may assume that each "
+                   "input would have exactly one solution, and you may not use the same element twice. You can "
+                   "return the answer in any order. Follow-up: can you come up with an algorithm that is less "
+                   "than quadratic time complexity? Good luck!")
+# Shares a few phrases but is a different problem
+VALID_PARENTHESES = ("Given a string s containing just the characters of brackets, determine if the input "
+                     "string is valid. An input string is valid if open brackets are closed by the same type "
+                     "of brackets and open brackets are closed in the correct order. You may assume that the "
+                     "input is not empty, and you can return the answer as a boolean.")
+
+
+def _key(content):
+    return content_hash(content)
+
+
+def test_normalize_content_ignores_markup_and_case():
+    assert normalize_content("<p>Return **The** `sum`.</p>") == ["return", "the", "sum"]
+
+
+def test_new_problem_is_not_a_duplicate():
+    index = NearDuplicateIndex(0.85)
+    assert index.add(_key(TWO_SUM), TWO_SUM) is None
+    assert index.add(_key(VALID_PARENTHESES), VALID_PARENTHESES) is None
+    assert len(index) == 2
+
+
+def test_exact_duplicate():
+    index = NearDuplicateIndex(0.85)
+    index.add(_key(TWO_SUM), TWO_SUM)
+    assert index.add(_key(TWO_SUM), TWO_SUM) == (_key(TWO_SUM), 1.0)
+    assert len(index) == 1
+
+
+def test_near_duplicate_above_threshold():
+    index = NearDuplicateIndex(0.85)
+    index.add(_key(TWO_SUM), TWO_SUM)
+    match = index.add(_key(TWO_SUM_VARIANT), TWO_SUM_VARIANT)
+    assert match is not None
+    assert match[0] == _key(TWO_SUM)
+    assert 0.85 <= match[1] < 1.0
+    # Near-duplicates are not indexed themselves
+    assert len(index) == 1
+
+
+def test_threshold_decides_the_match():
+    permissive = NearDuplicateIndex(0.5)
+    permissive.add(_key(TWO_SUM), TWO_SUM)
+    _, similarity = permissive.add(_key(TWO_SUM_VARIANT), TWO_SUM_VARIANT)
+
+    strict = NearDuplicateIndex(similarity + 0.01)
+    strict.add(_key(TWO_SUM), TWO_SUM)
+    assert strict.add(_key(TWO_SUM_VARIANT), TWO_SUM_VARIANT) is None
+    assert len(strict) == 2
+
+
+def test_signatures_are_stable_across_instances():
+    assert (NearDuplicateIndex().signature(TWO_SUM) == NearDuplicateIndex().signature(TWO_SUM)).all()
+
+
+def test_mark_near_duplicates_sets_duplicate_of():
+    entries = [{'title': 'Two Sum', 'content': TWO_SUM},
+               {'title': 'Valid Parentheses', 'content': VALID_PARENTHESES},
+               {'title': 'Two Sum (copy)', 'content': TWO_SUM_VARIANT}]
+    marked = list(mark_near_duplicates(entries, NearDuplicateIndex(0.85)))
+    assert [entry.get('duplicate_of') for entry in marked] == [None, None, _key(TWO_SUM)]
+    assert all(entry['content_hash'] == _key(entry['content']) for entry in marked)
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = setup_database(str(tmp_path / "traces.db"))
+    yield conn
+    conn.close()
+
+
+def _store(conn, title, content, duplicate_of=None):
+    conn.execute('INSERT INTO leetcode_reasoning (title, content, content_hash, duplicate_of) VALUES (?, ?, ?, ?)',
+                 (title, content, _key(content), duplicate_of))
+    conn.commit()
+
+
+def test_stored_problems_catch_later_near_duplicates(conn):
+    _store(conn, 'Two Sum', TWO_SUM)
+    index = NearDuplicateIndex(0.85)
+    assert index_stored_problems(conn, index) == 1
+
+    marked = list(mark_near_duplicates([{'title': 'Two Sum (copy)', 'content': TWO_SUM_VARIANT}], index))
+    assert marked[0]['duplicate_of'] == _key(TWO_SUM)
+    assert index.titles[_key(TWO_SUM)] == 'Two Sum'
+
+
+def test_stored_duplicates_are_not_indexed(conn):
+    _store(conn, 'Two Sum', TWO_SUM)
+    _store(conn, 'Two Sum (copy)', TWO_SUM_VARIANT, duplicate_of=_key(TWO_SUM))
+    assert index_stored_problems(conn, NearDuplicateIndex(0.85)) == 1
+
+
+def test_reprocessing_a_stored_problem_is_not_its_own_duplicate(conn):
+    _store(conn, 'Two Sum', TWO_SUM)
+    index = NearDuplicateIndex(0.85)
+    index_stored_problems(conn, index)
+
+    entries = [{'title': 'Two Sum', 'content': TWO_SUM}, {'title': 'Two Sum', 'content': TWO_SUM}]
+    marked = list(mark_near_duplicates(entries, index))
+    # The first reappearance is processed again; a second copy in the input is a duplicate
+    assert [entry.get('duplicate_of') for entry in marked] == [None, _key(TWO_SUM)]
@@ -0,0 +1,142 @@
+"""
+Tests for shard assignment (sharding.py) and shard merging (merge_shards.py)
+"""
+
+import argparse
+import sqlite3
+
+import pytest
+
+from merge_shards import merge_databases, row_rank
+from sharding import content_hash, shard_of, parse_shard, shard_db_path
+from traceWithThink import setup_database
+
+
+def test_content_hash_ignores_surrounding_whitespace():
+    assert content_hash("  Two Sum\n") == content_hash("Two Sum")
+    assert content_hash("Two Sum") != content_hash("Two  Sum")
+    assert content_hash(None) == content_hash("")
+
+
+def test_shard_of_is_deterministic_and_in_range():
+    hashes = [content_hash(f"problem {i}") for i in range(400)]
+    for num_shards in (1, 3, 4):
+        shards = [shard_of(hash_hex, num_shards) for hash_hex in hashes]
+        assert shards == [shard_of(hash_hex, num_shards) for hash_hex in hashes]
+        assert set(shards) == set(range(1, num_shards + 1))
+
+
+def test_shards_partition_the_input():
+    hashes = [content_hash(f"problem {i}") for i in range(400)]
+    selected = [[h for h in hashes if shard_of(h, 4) == index] for index in range(1, 5)]
+    assert sorted(sum(selected, [])) == sorted(hashes)
+    # Every shard gets a reasonable share
+    assert min(len(shard) for shard in selected) > 400 / 4 * 0.6
+
+
+@pytest.mark.parametrize("value, expected", [("1/1", (1, 1)), ("2/4", (2, 4)), ("4/4", (4, 4))])
+def test_parse_shard(value, expected):
+    assert parse_shard(value) == expected
+
+
+@pytest.mark.parametrize("value", ["0/4", "5/4", "1/0", "2", "a/b", "1/2/3"])
+def test_parse_shard_rejects_invalid_specs(value):
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_shard(value)
+
+
+def test_shard_db_path():
+    assert shard_db_path("leetcode_traces.db", 2, 4) == "leetcode_traces.shard-2-of-4.db"
+    assert shard_db_path("traces", 1, 2) == "traces.shard-1-of-2.db"
+
+
+def test_row_rank_prefers_generated_then_translated_then_newest():
+    failed = {'trace_en_with_think': None, 'created_at': '2026-10-02'}
+    generated = {'trace_en_with_think': 'trace', 'translation_status': 'pending', 'created_at': '2026-10-01'}
+    translated = {**generated, 'translation_status': 'completed', 'trace_hi_with_think': 'अनुवाद',
+                  'translated_at': '2026-10-01'}
+    newer = {**translated, 'translated_at': '2026-10-03'}
+    invalid = {**generated, 'translation_status': 'invalid', 'trace_hi_with_think': 'bad',
+               'translated_at': '2026-10-05'}
+
+    assert row_rank(generated) > row_rank(failed)
+    assert row_rank(translated) > row_rank(generated)
+    assert row_rank(translated) > row_rank(invalid)
+    assert row_rank(newer) > row_rank(translated)
+
+
+def _make_shard(path, rows):
+    """Create a shard database holding rows of (content, trace, status, hindi, translated_at)."""
+    conn = setup_database(str(path))
+    for content, trace, status, hindi, translated_at in rows:
+        cursor = conn.execute('INSERT INTO leetcode_reasoning (title, content, trace_en_with_think, '
+                              'translation_status, trace_hi_with_think, translated_at) VALUES (?, ?, ?, ?, ?, ?)',
+                              (content, content, trace, status, hindi, translated_at))
+        if trace is None:
+            conn.execute("INSERT INTO failures (trace_id, stage, error_class, attempts, last_error) "
+                         "VALUES (?, 'generation', 'timeout', 1, 'timed out')", (cursor.lastrowid,))
+    conn.commit()
+    conn.close()
+    return str(path)
+
+
+def _merged_rows(path):
+    conn = sqlite3.connect(path)
+    rows = conn.execute('SELECT content, trace_en_with_think, translation_status, trace_hi_with_think, '
+                        'content_hash FROM leetcode_reasoning ORDER BY content').fetchall()
+    failures = conn.execute('SELECT r.content, f.stage FROM failures f '
+                            'JOIN leetcode_reasoning r ON r.id = f.trace_id').fetchall()
+    conn.close()
+    return rows, failures
+
+
+def test_merge_keeps_the_better_copy_of_each_problem(tmp_path):
+    shard_1 = _make_shard(tmp_path / "a.db", [
+        ("only in a", "trace a", "pending", None, None),
+        ("failed in a", None, "pending", None, None),
+        ("failed everywhere", None, "pending", None, None),
+        ("translated in a", "trace", "completed", "अनुवाद", "2026-10-01 10:00:00"),
+        ("newer in b", "trace", "completed", "पुराना", "2026-10-01 10:00:00"),
+    ])
+    shard_2 = _make_shard(tmp_path / "b.db", [
+        ("failed in a", "trace b", "pending", None, None),
+        ("translated in a", "trace", "pending", None, None),
+        ("newer in b", "trace", "completed", "नया", "2026-10-02 10:00:00"),
+        ("only in b", "trace b", "pending", None, None),
+    ])
+    output = str(tmp_path / "merged.db")
+
+    counts = merge_databases(output, [shard_1, shard_2])
+
+    assert counts['inserted'] == 6
+    assert counts['replaced'] == 2
+    assert counts['duplicates'] == 1
+
+    rows, failures = _merged_rows(output)
+    by_content = {row[0]: row for row in rows}
+    assert set(by_content) == {"only in a", "only in b", "failed in a", "failed everywhere",
+                               "translated in a", "newer in b"}
+    assert by_content["failed in a"][1] == "trace b"
+    assert by_content["translated in a"][2:4] == ("completed", "अनुवाद")
+    assert by_content["newer in b"][3] == "नया"
+    assert all(row[4] == content_hash(row[0]) for row in rows)
+    # Failures move with the kept row; the replaced row's failure is dropped
+    assert failures == [("failed everywhere", "generation")]
+
+
+def test_merge_deduplicates_by_content_not_title(tmp_path):
+    shard_1 = _make_shard(tmp_path / "a.db", [("same problem", "trace a", "pending", None, None)])
+    shard_2 = _make_shard(tmp_path / "b.db", [("  same problem\n", "trace b", "pending", None, None)])
+    output = str(tmp_path / "merged.db")
+
+    counts = merge_databases(output, [shard_1, shard_2])
+
+    assert (counts['inserted'], counts['duplicates']) == (1, 1)
+    rows, _ = _merged_rows(output)
+    assert [row[1] for row in rows] == ["trace a"]
+
+
+def test_merge_refuses_to_merge_into_a_source(tmp_path):
+    shard = _make_shard(tmp_path / "a.db", [("problem", "trace", "pending", None, None)])
+    with pytest.raises(ValueError):
+        merge_databases(shard, [shard])
@@ -0,0 +1,137 @@
+"""
+Tests for packed translation requests (translation.py): pack planning, the
+segment marker parser and the fallback to individual calls
+"""
+
+import pytest
+
+import translation
+from translation import (
+    plan_packs, build_packed_prompt, parse_packed_response, translate_segments,
+    PACK_MAX_SEGMENT_CHARS, PACK_MAX_SEGMENTS,
+)
+
+SEGMENTS = [
+    "We iterate over the array once and keep the running sum of the elements seen so far.",
+    "If the running sum ever becomes negative we reset it, because it cannot help later.",
+    "The answer is the largest running sum observed during the scan of the whole array.",
+]
+HINDI = [
+    "हम एरे पर एक बार इटरेट करते हैं और अब तक देखे गए एलिमेंट्स का रनिंग सम रखते हैं।",
+    "अगर रनिंग सम कभी नेगेटिव हो जाए तो हम उसे रीसेट करते हैं, क्योंकि वह आगे मदद नहीं करता।",
+    "जवाब पूरे एरे के स्कैन के दौरान देखा गया सबसे बड़ा रनिंग सम है, बस इतना ही काफी है।",
+]
+
+
+def _packed(texts, numbers=None):
+    numbers = numbers or range(1, len(texts) + 1)
+    return "\n".join(f"[[{number}]]\n{text}" for number, text in zip(numbers, texts))
+
+
+def test_parse_round_trip():
+    assert parse_packed_response(_packed(HINDI), 3) == HINDI
+
+
+def test_parse_tolerates_think_block_and_marker_whitespace():
+    text = "<think>\nThree segments to translate.\n</think>\n  [[1]] " + HINDI[0] + "\n[[2]]\t\n" + HINDI[1]
+    assert parse_packed_response(text, 2) == HINDI[:2]
+
+
+def test_parse_keeps_multiline_segments():
+    text = _packed(["पहली लाइन\n\nदूसरी लाइन", HINDI[1]])
+    assert parse_packed_response(text, 2) == ["पहली लाइन\n\nदूसरी लाइन", HINDI[1]]
+
+
+@pytest.mark.parametrize("text", [
+    _packed(HINDI[:2]),                             # a segment is missing
+    _packed(HINDI, numbers=[1, 3, 2]),              # out of order
+    _packed(HINDI + [HINDI[0]], numbers=[1, 2, 2, 3]),  # duplicated marker
+    _packed(HINDI + ["अतिरिक्त"]),                  # extra segment
+    _packed([HINDI[0], "", HINDI[2]]),              # empty segment
+    "यहाँ अनुवाद है:\n" + _packed(HINDI),            # text before the first marker
+    "\n\n".join(HINDI),                             # no markers at all
+    "",
+])
+def test_parse_rejects_misaligned_output(text):
+    assert parse_packed_response(text, 3) is None
+
+
+def test_markers_inside_a_line_are_not_segment_boundaries():
+    text = _packed([HINDI[0] + " (देखें [[2]])", HINDI[1]])
+    assert parse_packed_response(text, 2) == [HINDI[0] + " (देखें [[2]])", HINDI[1]]
+
+
+def test_prompt_numbers_every_segment():
+    prompt = build_packed_prompt(SEGMENTS)
+    for number, segment in enumerate(SEGMENTS, 1):
+        assert f"[[{number}]]\n{segment}" in prompt
+
+
+def test_plan_packs_groups_short_items_and_isolates_long_ones():
+    long_segment = PACK_MAX_SEGMENT_CHARS + 1
+    # Long and empty items go alone; short items around them still share a pack
+    assert plan_packs([[100], [100], [long_segment], [100], []]) == [[2], [4], [0, 1, 3]]
+
+
+def test_plan_packs_respects_the_segment_limit():
+    packs = plan_packs([[10, 10]] * PACK_MAX_SEGMENTS)
+    assert len(packs) > 1
+    assert all(2 * len(pack) <= PACK_MAX_SEGMENTS for pack in packs)
+    assert sorted(i for pack in packs for i in pack) == list(range(PACK_MAX_SEGMENTS))
+
+
+@pytest.fixture
+def fake_models(monkeypatch):
+    """Replace the packed request and the individual cascade calls."""
+    calls = {'packed': [], 'individual': []}
+    responses = {}
+
+    def generate(model, prompt, kind, logger=None):
+        calls['packed'].append(prompt)
+        return {'response': responses['packed']}
+
+    def translate_with_cascade(text, title="", logger=None, first_tier=0):
+        calls['individual'].append((text, first_tier))
+        return HINDI[SEGMENTS.index(text)], first_tier
+
+    monkeypatch.setattr(translation.model_calls, 'generate', generate)
+    monkeypatch.setattr(translation, 'translate_with_cascade', translate_with_cascade)
+    return calls, responses
+
+
+def test_aligned_pack_needs_one_request(fake_models):
+    calls, responses = fake_models
+    responses['packed'] = _packed(HINDI)
+
+    assert translate_segments(SEGMENTS) == [(text, 0) for text in HINDI]
+    assert len(calls['packed']) == 1
+    assert calls['individual'] == []
+
+
+def test_misaligned_pack_falls_back_to_individual_calls(fake_models):
+    calls, responses = fake_models
+    responses['packed'] = _packed(HINDI, numbers=[1, 3, 2])
+
+    assert translate_segments(SEGMENTS) == [(text, 0) for text in HINDI]
+    assert calls['individual'] == [(segment, 0) for segment in SEGMENTS]
+
+
+def test_rejected_segments_escalate_to_the_next_tier(fake_models):
+    calls, responses = fake_models
+    # The second segment comes back untranslated and fails validation
+    responses['packed'] = _packed([HINDI[0], SEGMENTS[1], HINDI[2]])
+
+    assert translate_segments(SEGMENTS) == [(HINDI[0], 0), (HINDI[1], 1), (HINDI[2], 0)]
+    assert calls['individual'] == [(SEGMENTS[1], 1)]
+
+
+def test_failed_pack_request_falls_back_to_individual_calls(fake_models, monkeypatch):
+    calls, _ = fake_models
+
+    def failing_generate(model, prompt, kind, logger=None):
+        raise ConnectionError("connection refused")
+
+    monkeypatch.setattr(translation.model_calls, 'generate', failing_generate)
+
+    assert translate_segments(SEGMENTS) == [(text, 0) for text in HINDI]
+    assert calls['individual'] == [(segment, 0) for segment in SEGMENTS]
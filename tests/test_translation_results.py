@@ -0,0 +1,53 @@
+"""
+Tests for storing translation results (traceWithThink.save_translation_result)
+"""
+
+import pytest
+
+from failures import record_failure
+from traceWithThink import setup_database, save_translation_result
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = setup_database(str(tmp_path / "traces.db"))
+    conn.execute("INSERT INTO leetcode_reasoning (title, content, trace_en_with_think) "
+                 "VALUES ('Two Sum', 'Find two numbers.', '<think>plan</think>answer')")
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def _row(conn):
+    return conn.execute("SELECT translation_status, translation_issue, trace_hi_with_think "
+                        "FROM leetcode_reasoning WHERE id = 1").fetchone()
+
+
+def _failures(conn):
+    return conn.execute("SELECT COUNT(*) FROM failures WHERE trace_id = 1").fetchone()[0]
+
+
+def test_completed(conn):
+    translation = {'failed_parts': None, 'issue': None, 'think_hi': 'योजना', 'answer_hi': 'जवाब',
+                   'trace_hi_with_think': '<think>योजना</think>जवाब'}
+    assert save_translation_result(conn, 1, translation) == 'completed'
+    assert _row(conn) == ('completed', None, '<think>योजना</think>जवाब')
+
+
+def test_invalid(conn):
+    translation = {'failed_parts': 'answer', 'issue': 'empty translation', 'think_hi': 'योजना',
+                   'answer_hi': 'Translation error: empty translation', 'trace_hi_with_think': None}
+    assert save_translation_result(conn, 1, translation) == 'invalid'
+    assert _row(conn)[:2] == ('invalid', 'empty translation')
+    assert _failures(conn) == 1
+
+
+def test_skipped_is_not_a_failure(conn):
+    record_failure(conn, 1, 'translation', 'empty translation')
+    translation = {'skipped': "selected sections ('answer') are empty", 'failed_parts': None,
+                   'issue': "selected sections ('answer') are empty", 'think_hi': None, 'answer_hi': None,
+                   'trace_hi_with_think': None}
+    assert save_translation_result(conn, 1, translation) == 'skipped'
+    assert _row(conn) == ('skipped', "selected sections ('answer') are empty", None)
+    # retry-failed never sees the row again
+    assert _failures(conn) == 0
@@ -0,0 +1,73 @@
+"""
+Tests for translation_validator.validate_translations
+"""
+
+from translation_validator import (
+    validate_translations, validate_translation, MIN_CHECKED_CHARS, SOURCE_ECHO_CHARS,
+)
+
+SOURCE = ("We keep a hash map from each value to its index. For every number we check "
+          "whether its complement was already seen, which gives a single pass solution.")
+HINDI = ("हम हर मान से उसके इंडेक्स तक एक हैश मैप रखते हैं। हर संख्या के लिए हम जांचते हैं "
+         "कि क्या उसका पूरक पहले देखा जा चुका है, जिससे एक ही पास में हल मिलता है।")
+
+
+def test_valid_translation_passes():
+    assert validate_translations([SOURCE], [HINDI]) == [None]
+
+
+def test_empty_translation():
+    assert validate_translations([SOURCE, SOURCE], ["", "  \n"]) == ["empty translation"] * 2
+
+
+def test_english_prompt_echo():
+    translation = "Translate the following English text to Hindi:\n" + HINDI
+    assert validate_translation(SOURCE, translation) == "prompt echoed in output"
+
+
+def test_hindi_prompt_echo():
+    translation = "हिंदी अनुवाद: " + HINDI
+    assert validate_translation(SOURCE, translation) == "prompt echoed in output"
+
+
+def test_source_echo():
+    assert len(SOURCE) >= SOURCE_ECHO_CHARS
+    translation = HINDI + "\n" + SOURCE
+    assert validate_translation(SOURCE, translation) == "English source echoed in output"
+
+
+def test_untranslated_english_fails_script_check():
+    reason = validate_translation(SOURCE, SOURCE.upper().replace("WE ", "THEN WE "))
+    assert reason.startswith("Devanagari ratio")
+
+
+def test_length_ratio_bounds():
+    assert validate_translation(SOURCE, HINDI[:20]).startswith("length ratio")
+    assert validate_translation(SOURCE, " ".join([HINDI] * 4)).startswith("length ratio")
+
+
+def test_code_blocks_are_ignored():
+    code = "\n```python\ndef two_sum(nums, target):\n    return [0, 1]\n```\n"
+    assert validate_translation(SOURCE + code, HINDI + code) is None
+
+
+def test_short_sources_only_checked_for_empty_and_echo():
+    source = "Return the sum."
+    assert len(source) < MIN_CHECKED_CHARS
+    assert validate_translation(source, "Return the sum of both.") is None
+    assert validate_translation(source, "") == "empty translation"
+
+
+def test_batch_reasons_stay_aligned():
+    # A prompt echo in one row must not be attributed to its neighbours
+    sources = [SOURCE, SOURCE, SOURCE]
+    translations = [HINDI, HINDI + " english text:", HINDI]
+    assert validate_translations(sources, translations) == [None, "prompt echoed in output", None]
+
+
+def test_none_values_are_treated_as_empty():
+    assert validate_translations([None, SOURCE], [HINDI, None]) == [None, "empty translation"]
+
+
+def test_empty_batch():
+    assert validate_translations([], []) == []
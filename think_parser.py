@@ -0,0 +1,76 @@
+"""
+Think Block Parser
+Helpers for splitting '/think' model responses into the <think>...</think>
+reasoning section and the final answer that follows it.
+"""
+
+import re
+from typing import Dict
+
+THINK_OPEN_TAG = "<think>"
+THINK_CLOSE_TAG = "</think>"
+
+_THINK_BLOCK_PATTERN = re.compile(r'<think>(.*?)</think>', re.DOTALL)
+
+
+def split_think_response(text: str) -> Dict[str, str]:
+    """
+    Split a model response into its think section and its answer section.
+
+    Args:
+        text: Raw model response, optionally starting with a <think> block
+
+    Returns:
+        Dictionary with 'think' and 'answer' keys (either may be empty)
+    """
+    if not text:
+        return {'think': '', 'answer': ''}
+
+    match = _THINK_BLOCK_PATTERN.search(text)
+    if match:
+        think = match.group(1).strip()
+        answer = (text[:match.start()] + text[match.end():]).strip()
+        return {'think': think, 'answer': answer}
+
+    # Truncated output: an opening tag with no closing tag is all reasoning
+    open_index = text.find(THINK_OPEN_TAG)
+    if open_index != -1:
+        return {
+            'think': text[open_index + len(THINK_OPEN_TAG):].strip(),
+            'answer': text[:open_index].strip()
+        }
+
+    return {'think': '', 'answer': text.strip()}
+
+
+def strip_think(text: str) -> str:
+    """
+    Remove any <think> block from a response and return only the answer.
+
+    Args:
+        text: Raw model response
+
+    Returns:
+        The answer section of the response
+    """
+    return split_think_response(text)['answer']
+
+
+def join_think_response(think: str, answer: str) -> str:
+    """
+    Reassemble think and answer sections into a single response string.
+
+    Args:
+        think: The reasoning section (may be empty)
+        answer: The final answer section (may be empty)
+
+    Returns:
+        Combined text in the same layout the model produces
+    """
+    parts = []
+    if think:
+        parts.append(f"{THINK_OPEN_TAG}\n{think}\n{THINK_CLOSE_TAG}")
+    if answer:
+        parts.append(answer)
+    return "\n\n".join(parts)
+
@@ -0,0 +1,323 @@
+"""
+Token Budget
+Per-request token estimation and context sizing for Ollama calls.
+
+Each request gets its own `num_ctx` and `num_predict` derived from the
+estimated prompt size and the output lengths observed so far, so long
+problems are not silently truncated and short ones do not reserve a large
+KV cache. num_ctx only takes a few coarse values (MIN_NUM_CTX doubled up to
+MAX_NUM_CTX), because Ollama reloads the model whenever num_ctx changes.
+"""
+
+import math
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Any, List, Optional
+
+# Try to import configuration, fall back to defaults if not found
+try:
+    from config import (
+        TOKENIZER_PATH, MIN_NUM_CTX, MAX_NUM_CTX,
+        DEFAULT_NUM_PREDICT, OUTPUT_LENGTH_QUANTILE, OUTPUT_LENGTH_HEADROOM
+    )
+except ImportError:
+    TOKENIZER_PATH = None  # Optional tokenizer.json for exact counts (needs the 'tokenizers' package)
+    MIN_NUM_CTX = 2048
+    MAX_NUM_CTX = 32768
+    DEFAULT_NUM_PREDICT = {"generation": 8192, "translation": 8192}
+    OUTPUT_LENGTH_QUANTILE = 0.99
+    OUTPUT_LENGTH_HEADROOM = 1.25
+
+# Initial characters-per-token ratio, refined from Ollama's prompt_eval_count
+DEFAULT_CHARS_PER_TOKEN = 4.0
+
+# Request kinds whose output length scales with the input (e.g. translation)
+PROPORTIONAL_KINDS = ("translation",)
+
+# Output/input token ratio assumed for proportional kinds before any observations
+# (Devanagari output tokenizes into more tokens than the English source)
+DEFAULT_OUTPUT_RATIO = 3.0
+
+# Smallest output allowance worth sending; a prompt that leaves less room
+# in MAX_NUM_CTX is rejected instead of sent
+MIN_NUM_PREDICT = 256
+
+# Observations needed before the observed distribution replaces the defaults
+MIN_OBSERVATIONS = 20
+MAX_OBSERVATIONS = 1000
+
+
+def ctx_buckets(min_ctx: int = MIN_NUM_CTX, max_ctx: int = MAX_NUM_CTX) -> List[int]:
+    """
+    Return the num_ctx values requests may use: min_ctx doubled up to max_ctx.
+
+    Args:
+        min_ctx: Smallest context window
+        max_ctx: Largest context window (always the last bucket)
+
+    Returns:
+        Ascending list of context sizes, e.g. [2048, 4096, 8192, 16384, 32768]
+    """
+    buckets = []
+    size = min_ctx
+    while size < max_ctx:
+        buckets.append(size)
+        size *= 2
+    buckets.append(max_ctx)
+    return buckets
+
+
+@lru_cache(maxsize=4)
+def load_tokenizer(tokenizer_path: str):
+    """
+    Load and cache a Hugging Face tokenizer from a tokenizer.json file.
+
+    Args:
+        tokenizer_path: Path to the tokenizer.json file
+
+    Returns:
+        Tokenizer instance, or None if the 'tokenizers' package is unavailable
+    """
+    try:
+        from tokenizers import Tokenizer
+    except ImportError:
+        return None
+    return Tokenizer.from_file(tokenizer_path)
+
+
+class TokenEstimator:
+    """
+    Estimate token counts with a cached tokenizer, or with a character ratio
+    calibrated against the prompt token counts Ollama reports.
+    """
+
+    def __init__(self, tokenizer_path: Optional[str] = None, chars_per_token: float = DEFAULT_CHARS_PER_TOKEN):
+        self.tokenizer = load_tokenizer(tokenizer_path) if tokenizer_path else None
+        self.chars_per_token = chars_per_token
+        self.samples = 0
+        self._lock = threading.Lock()
+
+    def count(self, text: str) -> int:
+        """
+        Estimate the number of tokens in a piece of text.
+
+        Args:
+            text: Text to measure
+
+        Returns:
+            Estimated token count
+        """
+        if not text:
+            return 0
+        if self.tokenizer is not None:
+            return len(self.tokenizer.encode(text).ids)
+        return max(1, int(math.ceil(len(text) / self.chars_per_token)))
+
+    def calibrate(self, text: str, actual_tokens: Optional[int]) -> None:
+        """
+        Refine the characters-per-token ratio from an observed token count.
+
+        Args:
+            text: Text that was sent to the model
+            actual_tokens: Token count reported by the model for that text
+        """
+        if self.tokenizer is not None or not text or not actual_tokens:
+            return
+
+        ratio = len(text) / actual_tokens
+        with self._lock:
+            self.samples += 1
+            # Running mean for the first samples, then an exponential average
+            weight = max(1.0 / self.samples, 0.05)
+            self.chars_per_token += weight * (ratio - self.chars_per_token)
+
+
+def _quantile(values, q: float) -> float:
+    """Return the q-th quantile of a sequence of numbers (nearest rank)."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(math.ceil(q * len(ordered))) - 1))
+    return ordered[index]
+
+
+class TokenBudget:
+    """
+    Choose num_ctx and num_predict per request from the estimated input size
+    and the distribution of output lengths observed for each request kind.
+    """
+
+    def __init__(self, estimator: TokenEstimator, min_ctx: int = MIN_NUM_CTX, max_ctx: int = MAX_NUM_CTX,
+                 default_predict: Dict[str, int] = None,
+                 quantile: float = OUTPUT_LENGTH_QUANTILE, headroom: float = OUTPUT_LENGTH_HEADROOM):
+        self.estimator = estimator
+        self.min_ctx = min_ctx
+        self.max_ctx = max_ctx
+        self.ctx_buckets = ctx_buckets(min_ctx, max_ctx)
+        self.default_predict = dict(default_predict or DEFAULT_NUM_PREDICT)
+        self.quantile = quantile
+        self.headroom = headroom
+        self.observations = {}
+        self._lock = threading.Lock()
+
+    def observe_output(self, kind: str, input_tokens: int, output_tokens: int) -> None:
+        """
+        Record the output length of a completed request.
+
+        Args:
+            kind: Request kind, e.g. "generation" or "translation"
+            input_tokens: Prompt tokens of the request
+            output_tokens: Tokens generated by the model
+        """
+        if not output_tokens:
+            return
+        if kind in PROPORTIONAL_KINDS:
+            value = output_tokens / max(1, input_tokens)
+        else:
+            value = output_tokens
+
+        with self._lock:
+            self.observations.setdefault(kind, deque(maxlen=MAX_OBSERVATIONS)).append(value)
+
+    def predict_output_tokens(self, kind: str, input_tokens: int) -> int:
+        """
+        Predict a safe upper bound on the output length of a request.
+
+        Args:
+            kind: Request kind, e.g. "generation" or "translation"
+            input_tokens: Estimated prompt tokens of the request
+
+        Returns:
+            Number of tokens to allow the model to generate
+        """
+        default = self.default_predict.get(kind, max(self.default_predict.values()))
+
+        with self._lock:
+            observed = list(self.observations.get(kind, ()))
+
+        if len(observed) < MIN_OBSERVATIONS:
+            if kind in PROPORTIONAL_KINDS:
+                return min(default, max(512, int(math.ceil(input_tokens * DEFAULT_OUTPUT_RATIO))))
+            return default
+
+        bound = _quantile(observed, self.quantile) * self.headroom
+        if kind in PROPORTIONAL_KINDS:
+            bound *= max(1, input_tokens)
+        return max(MIN_NUM_PREDICT, int(math.ceil(bound)))
+
+    def request_options(self, prompt: str, kind: str, logger=None) -> Dict[str, int]:
+        """
+        Compute the num_ctx and num_predict options for a request.
+
+        Args:
+            prompt: The full prompt that will be sent
+            kind: Request kind, e.g. "generation" or "translation"
+            logger: Logger instance for logging
+
+        Returns:
+            Dictionary with 'num_ctx' and 'num_predict' for the Ollama options
+
+        Raises:
+            ValueError: If the prompt leaves less than MIN_NUM_PREDICT output
+                tokens within MAX_NUM_CTX
+        """
+        input_tokens = self.estimator.count(prompt)
+        num_predict = self.predict_output_tokens(kind, input_tokens)
+
+        needed = input_tokens + num_predict
+        num_ctx = next((bucket for bucket in self.ctx_buckets if bucket >= needed), self.max_ctx)
+
+        if needed > num_ctx:
+            # Context is capped: keep the whole prompt and shrink the output allowance
+            num_predict = num_ctx - input_tokens
+            if num_predict < MIN_NUM_PREDICT:
+                raise ValueError(f"{kind} prompt of ~{input_tokens} tokens leaves {max(0, num_predict)} output "
+                                 f"tokens within num_ctx={num_ctx} (MAX_NUM_CTX)")
+            if logger:
+                logger.error(f"{kind} request needs ~{needed} tokens but num_ctx is capped at {num_ctx}; "
+                             f"output truncated to num_predict={num_predict}")
+
+        if logger:
+            logger.debug(f"{kind} token budget: ~{input_tokens} input tokens, "
+                         f"num_ctx={num_ctx}, num_predict={num_predict}")
+
+        return {'num_ctx': num_ctx, 'num_predict': num_predict}
+
+    def record_response(self, kind: str, prompt: str, response: Any, options: Dict[str, int], logger=None) -> None:
+        """
+        Update the estimator and output distribution from an Ollama response.
+
+        Args:
+            kind: Request kind, e.g. "generation" or "translation"
+            prompt: The prompt that was sent
+            response: The Ollama generate response
+            options: The options the request was sent with
+            logger: Logger instance for logging
+        """
+        prompt_tokens = _response_field(response, 'prompt_eval_count')
+        output_tokens = _response_field(response, 'eval_count')
+
+        self.estimator.calibrate(prompt, prompt_tokens)
+
+        if _response_field(response, 'done_reason') == 'length':
+            # The output hit num_predict; record a larger value so later requests get more room
+            if logger:
+                logger.warning(f"{kind} response was truncated at num_predict={options.get('num_predict')}")
+            output_tokens = max(output_tokens or 0, options.get('num_predict', 0)) * 2
+
+        self.observe_output(kind, prompt_tokens or self.estimator.count(prompt), output_tokens)
+
+    def seed_from_database(self, conn, limit: int = MAX_OBSERVATIONS) -> int:
+        """
+        Seed the generation output distribution from traces already stored.
+
+        Args:
+            conn: SQLite connection object
+            limit: Maximum number of recent rows to read
+
+        Returns:
+            Number of observations loaded
+        """
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT think_token_count, answer_token_count
+            FROM leetcode_reasoning
+            WHERE think_token_count IS NOT NULL
+            ORDER BY id DESC
+            LIMIT ?
+        ''', (limit,))
+
+        count = 0
+        for think_tokens, answer_tokens in cursor.fetchall():
+            self.observe_output('generation', 0, (think_tokens or 0) + (answer_tokens or 0))
+            count += 1
+        return count
+
+
+def _response_field(response: Any, name: str):
+    """Read a field from an Ollama response object or plain dictionary."""
+    try:
+        return response[name]
+    except (KeyError, TypeError, IndexError):
+        return getattr(response, name, None)
+
+
+_estimator = TokenEstimator(TOKENIZER_PATH)
+_budget = TokenBudget(_estimator)
+
+
+def get_token_budget() -> TokenBudget:
+    """Return the process-wide token budget shared by all Ollama calls."""
+    return _budget
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in a piece of text with the shared estimator.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Estimated token count
+    """
+    return _estimator.count(text)
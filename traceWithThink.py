@@ -1,39 +1,111 @@
+import argparse
 import json
+import os
 import sqlite3
-import ollama
-import logging
+import re
 import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
-from typing import List, Dict, Any
-from translation import translate_reasoning_trace
+from typing import List, Dict, Any, Iterator
+from translation import (translate_trace_parts, is_translation_error, translation_models, TRANSLATE_PARTS,
+                         build_translation_prompt, build_trace_context)
+from preflight import run_preflight
+from warmup import warm_up_models
+from think_parser import split_think_response
+from token_budget import get_token_budget, estimate_tokens
+from concurrency import get_controller
+from scheduling import schedule_entries, OutputLengthPredictor, SCHEDULE_POLICY, SCHEDULE_POLICIES, SCHEDULE_WINDOW
+from metrics import ensure_metrics_table
+from failures import ensure_failures_table, migrate_error_strings, record_failure, clear_failure
+from estimate import estimate_run, print_estimate
+from logging_setup import setup_logging, with_fields, LOG_LEVELS
+from db_writer import DatabaseWriter
+from near_duplicates import NearDuplicateIndex, index_stored_problems, mark_near_duplicates, DEDUP_MODE, DEDUP_MODES, DEDUP_THRESHOLD
+from input_index import load_input_index
+from search_index import ensure_search_index
+from sharding import content_hash, ensure_content_hashes, parse_shard, shard_db_path
+from run_budget import RunBudget, parse_duration, read_checkpoint, write_checkpoint, stored_hash_keys, TIME_BUDGET
+from tracing import span, traced, begin_async, end_async, start_tracing, write_trace
+from versions import template_hash, TEMPLATE_PLACEHOLDER
+from hedging import get_hedge_policy
+from inference_profiles import apply_concurrency_profiles
+import model_calls
 
-def setup_logging():
-    """
-    Setup logging configuration for the application.
+# Columns added after the original schema; migrated in place by setup_database
+TRACE_PART_COLUMNS = [
+    ('think_en', 'TEXT'),
+    ('answer_en', 'TEXT'),
+    ('think_token_count', 'INTEGER'),
+    ('answer_token_count', 'INTEGER'),
+    ('think_hi', 'TEXT'),
+    ('answer_hi', 'TEXT'),
+]
+
+# Hash of the problem content (assigns problems to shards and deduplicates
+# merges), and the content_hash of the problem a near-duplicate repeats
+DEDUP_COLUMNS = [
+    ('content_hash', 'TEXT'),
+    ('duplicate_of', 'TEXT'),
+]
+
+# Translation model cascade tier (0 = smallest model) and model name that
+# produced the accepted translation of a row
+TRANSLATION_TIER_COLUMNS = [
+    ('translation_model', 'TEXT'),
+    ('translation_tier', 'INTEGER'),
+]
+
+# Version stamps: the generation model and hashes of the prompt templates
+# that produced a row's English trace and Hindi translation (see versions.py)
+VERSION_COLUMNS = [
+    ('generation_model', 'TEXT'),
+    ('generation_prompt_hash', 'TEXT'),
+    ('translation_prompt_hash', 'TEXT'),
+]
+
+# Set when a translation fails validation: the reason, and which sections
+# ("think", "answer" or "both") need to be translated again
+TRANSLATION_CHECK_COLUMNS = [
+    ('translation_issue', 'TEXT'),
+    ('retranslate_parts', 'TEXT'),
+]
+
+def iter_leetcode_entries(file_path: str, num_entries: int = None, logger=None, start: int = 0,
+                          shard: tuple = None, exclude_keys=None) -> Iterator[Dict[str, Any]]:
     """
-    # Create logs directory if it doesn't exist
-    import os
-    if not os.path.exists('logs'):
-        os.makedirs('logs')
+    Stream entries from the JSONL file one line at a time.
     
-    # Setup logging configuration
-    log_filename = f"logs/leetcode_traces_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+    Lines are located through the sidecar offset index (see input_index.py),
+    so a slice starting deep in the file or one shard of it is read without
+    scanning the lines before or between them.
     
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_filename, encoding='utf-8'),
-            logging.StreamHandler()  # Also log to console
-        ]
-    )
+    Args:
+        file_path: Path to the JSONL file
+        num_entries: Maximum number of lines to read (default: all)
+        logger: Logger instance for logging
+        start: First line to read (0-based)
+        shard: Optional (shard number, number of shards); only that shard's lines are read
+        exclude_keys: Optional hash keys of problems to skip (see run_budget.stored_hash_keys)
     
-    logger = logging.getLogger(__name__)
-    logger.info("=" * 60)
-    logger.info("LeetCode Reasoning Trace Collection - Session Started")
-    logger.info("=" * 60)
+    Yields:
+        Dictionaries with the title and content of each entry
     
-    return logger
+    Raises:
+        FileNotFoundError: If the file does not exist
+        json.JSONDecodeError: If a line is not valid JSON
+    """
+    index = load_input_index(file_path, logger)
+    for i, line in index.read_lines(index.select(start, num_entries, shard, exclude_keys)):
+        with span("read_entry", "io", line=i + 1, chars=len(line)):
+            entry = json.loads(line)
+        
+        if logger:
+            logger.debug(f"Read entry {i+1}: '{entry.get('title', 'Unknown')}'")
+        
+        yield {
+            'title': entry.get('title', ''),
+            'content': entry.get('content', '')
+        }
 
 def read_leetcode_entries(file_path: str, num_entries: int = 2, logger=None) -> List[Dict[str, Any]]:
     """
@@ -54,25 +126,14 @@ def read_leetcode_entries(file_path: str, num_entries: int = 2, logger=None) ->
     start_time = time.time()
     
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            for i, line in enumerate(file):
-                if i >= num_entries:
-                    break
-                
-                entry = json.loads(line.strip())
-                entries.append({
-                    'title': entry.get('title', ''),
-                    'content': entry.get('content', '')
-                })
-                
-                if logger:
-                    logger.info(f"Read entry {i+1}: '{entry.get('title', 'Unknown')}'")
+        with span("read_leetcode_entries", "io", file=file_path) as span_args:
+            entries = list(iter_leetcode_entries(file_path, num_entries, logger))
+            span_args['entries'] = len(entries)
         
         end_time = time.time()
         elapsed_time = end_time - start_time
         
         success_msg = f"Successfully read {len(entries)} entries from {file_path} in {elapsed_time:.2f} seconds"
-        print(success_msg)
         if logger:
             logger.info(success_msg)
         
@@ -80,24 +141,47 @@ def read_leetcode_entries(file_path: str, num_entries: int = 2, logger=None) ->
         
     except FileNotFoundError:
         error_msg = f"Error: File {file_path} not found"
-        print(error_msg)
         if logger:
             logger.error(error_msg)
         return []
     except json.JSONDecodeError as e:
         error_msg = f"Error parsing JSON: {e}"
-        print(error_msg)
         if logger:
             logger.error(error_msg)
         return []
     except Exception as e:
         error_msg = f"Unexpected error: {e}"
-        print(error_msg)
         if logger:
             logger.error(error_msg)
         return []
 
 
+def build_trace_prompt(content: str) -> str:
+    """
+    Build the '/think' reasoning trace prompt for a problem.
+    
+    Args:
+        content: The problem content/description
+    
+    Returns:
+        The full prompt sent to the model
+    """
+    return f"""/think Given the following coding problem, provide only the reasoning trace - your step-by-step thought process to understand and approach the problem. Do NOT provide the actual solution or code.
+
+Problem:
+{content}
+
+Please provide your reasoning trace - the logical steps you would take to understand and approach this problem:"""
+
+def generation_prompt_hash() -> str:
+    """
+    Return the version stamp of the reasoning trace prompt.
+    
+    Returns:
+        Short hash of the build_trace_prompt template (see versions.template_hash)
+    """
+    return template_hash(build_trace_prompt(TEMPLATE_PLACEHOLDER))
+
 def get_reasoning_trace_with_think(content: str, model_name: str = "qwen3:8b", logger=None) -> str:
     """
     Get reasoning trace from Ollama model with '/think' prefix.
@@ -109,60 +193,43 @@ def get_reasoning_trace_with_think(content: str, model_name: str = "qwen3:8b", l
     
     Returns:
         The reasoning trace as a string
+    
+    Raises:
+        Exception: If the model request fails (logged before re-raising)
     """
     if logger:
-        logger.info(f"Starting WITH THINK trace generation with model: {model_name}")
+        logger.debug(f"Starting WITH THINK trace generation with model: {model_name}")
     
     start_time = time.time()
-    start_datetime = datetime.now()
     
-    prompt = f"""/think Given the following coding problem, provide only the reasoning trace - your step-by-step thought process to understand and approach the problem. Do NOT provide the actual solution or code.
-
-Problem:
-{content}
-
-Please provide your reasoning trace - the logical steps you would take to understand and approach this problem:"""
+    prompt = build_trace_prompt(content)
 
     try:
-        if logger:
-            logger.info(f"WITH THINK - Sending request to model at {start_datetime.strftime('%Y-%m-%d %H:%M:%S')}")
-        
-        response = ollama.generate(
-            model=model_name,
-            prompt=prompt
-        )
+        with span("get_reasoning_trace_with_think", "model", model=model_name, input_chars=len(prompt)) as span_args:
+            response = model_calls.generate(model_name, prompt, 'generation', logger)
+            reasoning_trace = response['response'].strip()
+            span_args['output_chars'] = len(reasoning_trace)
         
         end_time = time.time()
-        end_datetime = datetime.now()
         elapsed_time = end_time - start_time
         
-        reasoning_trace = response['response'].strip()
-        
-        success_msg = f"WITH THINK trace generated successfully in {elapsed_time:.2f} seconds (length: {len(reasoning_trace)})"
-        print(success_msg)
-        
         if logger:
-            logger.info(f"WITH THINK - Request completed at {end_datetime.strftime('%Y-%m-%d %H:%M:%S')}")
-            logger.info(f"WITH THINK - Generation time: {elapsed_time:.2f} seconds")
-            logger.info(f"WITH THINK - Response length: {len(reasoning_trace)} characters")
-            logger.info(success_msg)
+            logger.debug(f"WITH THINK trace generated in {elapsed_time:.2f} seconds "
+                         f"(length: {len(reasoning_trace)} characters)",
+                         extra={'elapsed': round(elapsed_time, 3), 'output_chars': len(reasoning_trace)})
         
         return reasoning_trace
         
     except Exception as e:
         end_time = time.time()
         elapsed_time = end_time - start_time
-        error_msg = f"Error generating WITH THINK reasoning trace after {elapsed_time:.2f} seconds: {e}"
-        print(error_msg)
         
         if logger:
-            logger.error(error_msg)
-            logger.error("Please ensure:")
-            logger.error("1. Ollama is installed and running")
-            logger.error(f"2. The model '{model_name}' is available")
-            logger.error("3. You can run: ollama list")
+            logger.error(f"Error generating WITH THINK reasoning trace after {elapsed_time:.2f} seconds: {e} "
+                         f"(check that Ollama is running and the model '{model_name}' is available)",
+                         extra={'elapsed': round(elapsed_time, 3)})
         
-        return f"Error generating WITH THINK reasoning trace: {str(e)}"
+        raise
 
 def setup_database(db_path: str = "leetcode_traces.db", logger=None) -> sqlite3.Connection:
     """
@@ -176,7 +243,7 @@ def setup_database(db_path: str = "leetcode_traces.db", logger=None) -> sqlite3.
         SQLite connection object
     """
     if logger:
-        logger.info(f"Setting up database at: {db_path}")
+        logger.debug(f"Setting up database at: {db_path}")
     
     try:
         conn = sqlite3.connect(db_path)
@@ -188,7 +255,7 @@ def setup_database(db_path: str = "leetcode_traces.db", logger=None) -> sqlite3.
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 title TEXT NOT NULL,
                 content TEXT NOT NULL,
-                trace_en_with_think TEXT NOT NULL,
+                trace_en_with_think TEXT,
                 trace_hi_with_think TEXT,
                 translation_status TEXT DEFAULT 'pending',
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -196,9 +263,24 @@ def setup_database(db_path: str = "leetcode_traces.db", logger=None) -> sqlite3.
             )
         ''')
         
+        allow_null_trace(conn, logger)
+        # Lets `check_db.py --watch` find newly finished translations without a table scan
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_leetcode_reasoning_translated_at '
+                       'ON leetcode_reasoning (translated_at)')
+        ensure_columns(conn, 'leetcode_reasoning', TRACE_PART_COLUMNS, logger)
+        ensure_columns(conn, 'leetcode_reasoning', TRANSLATION_CHECK_COLUMNS, logger)
+        ensure_columns(conn, 'leetcode_reasoning', DEDUP_COLUMNS, logger)
+        ensure_columns(conn, 'leetcode_reasoning', TRANSLATION_TIER_COLUMNS, logger)
+        ensure_columns(conn, 'leetcode_reasoning', VERSION_COLUMNS, logger)
+        ensure_metrics_table(conn)
+        ensure_failures_table(conn)
+        migrate_error_strings(conn, logger)
+        backfill_trace_parts(conn, logger)
+        ensure_content_hashes(conn, logger)
+        ensure_search_index(conn, logger)
+        
         conn.commit()
         success_msg = f"Database setup complete: {db_path}"
-        print(success_msg)
         if logger:
             logger.info(success_msg)
         
@@ -206,45 +288,192 @@ def setup_database(db_path: str = "leetcode_traces.db", logger=None) -> sqlite3.
         
     except Exception as e:
         error_msg = f"Error setting up database: {e}"
-        print(error_msg)
         if logger:
             logger.error(error_msg)
         raise
 
-def save_to_database(conn: sqlite3.Connection, entries_with_traces: List[Dict[str, str]], logger=None) -> None:
+def ensure_columns(conn: sqlite3.Connection, table: str, columns: List[tuple], logger=None) -> None:
+    """
+    Add any missing columns to an existing table.
+    
+    Args:
+        conn: SQLite connection object
+        table: Name of the table to migrate
+        columns: List of (column_name, column_type) tuples that must exist
+        logger: Logger instance for logging
+    """
+    cursor = conn.cursor()
+    cursor.execute(f"PRAGMA table_info({table})")
+    existing = {row[1] for row in cursor.fetchall()}
+    
+    for name, column_type in columns:
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+            if logger:
+                logger.info(f"Added column {table}.{name} ({column_type})")
+
+def allow_null_trace(conn: sqlite3.Connection, logger=None) -> None:
+    """
+    Drop the NOT NULL constraint on trace_en_with_think from older databases.
+    
+    Failed generations leave the trace NULL (the error goes to the failures
+    table). SQLite cannot alter a column constraint, so the table is rebuilt
+    once from its own definition with the constraint removed.
+    
+    Args:
+        conn: SQLite connection object
+        logger: Logger instance for logging
+    """
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(leetcode_reasoning)")
+    columns = cursor.fetchall()
+    if not any(column[1] == 'trace_en_with_think' and column[3] for column in columns):
+        return
+    
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'leetcode_reasoning'")
+    create_sql = re.sub(r"(trace_en_with_think\s+TEXT)\s+NOT\s+NULL", r"\1", cursor.fetchone()[0], count=1)
+    create_sql = create_sql.replace("leetcode_reasoning", "leetcode_reasoning_rebuild", 1)
+    column_list = ", ".join(column[1] for column in columns)
+    
+    conn.commit()
+    cursor.execute("BEGIN")
+    try:
+        cursor.execute(create_sql)
+        cursor.execute(f"INSERT INTO leetcode_reasoning_rebuild ({column_list}) "
+                       f"SELECT {column_list} FROM leetcode_reasoning")
+        cursor.execute("DROP TABLE leetcode_reasoning")
+        cursor.execute("ALTER TABLE leetcode_reasoning_rebuild RENAME TO leetcode_reasoning")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    
+    if logger:
+        logger.info("Rebuilt leetcode_reasoning to allow NULL trace_en_with_think")
+
+def trace_part_fields(trace_en_with_think: str) -> Dict[str, Any]:
+    """
+    Split an English trace into its stored think/answer fields and token counts.
+    
+    Args:
+        trace_en_with_think: Raw model response including the <think> block
+    
+    Returns:
+        Dictionary with think_en, answer_en, think_token_count and answer_token_count
+    """
+    parts = split_think_response(trace_en_with_think)
+    return {
+        'think_en': parts['think'],
+        'answer_en': parts['answer'],
+        'think_token_count': estimate_tokens(parts['think']),
+        'answer_token_count': estimate_tokens(parts['answer'])
+    }
+
+def backfill_trace_parts(conn: sqlite3.Connection, logger=None) -> None:
+    """
+    Populate think/answer fields for rows saved before they were split.
+    
+    Args:
+        conn: SQLite connection object
+        logger: Logger instance for logging
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT id, trace_en_with_think
+        FROM leetcode_reasoning
+        WHERE think_en IS NULL AND answer_en IS NULL AND trace_en_with_think IS NOT NULL
+    ''')
+    rows = cursor.fetchall()
+    
+    for trace_id, trace_en_with_think in rows:
+        fields = trace_part_fields(trace_en_with_think)
+        cursor.execute('''
+            UPDATE leetcode_reasoning
+            SET think_en = ?, answer_en = ?, think_token_count = ?, answer_token_count = ?
+            WHERE id = ?
+        ''', (fields['think_en'], fields['answer_en'], fields['think_token_count'],
+              fields['answer_token_count'], trace_id))
+    
+    if rows and logger:
+        logger.info(f"Split think/answer sections for {len(rows)} existing traces")
+
+@traced("save_to_database", "db")
+def save_to_database(conn: sqlite3.Connection, entries_with_traces: List[Dict[str, str]], logger=None) -> List[int]:
     """
     Save the entries with reasoning traces to the database.
     
+    The English trace is split into its think and answer sections, which are
+    stored alongside the raw response together with their token counts.
+    Entries whose generation failed (trace_en_with_think is None) are saved
+    with NULL trace columns and their 'error' recorded in the failures table.
+    
     Args:
         conn: SQLite connection object
-        entries_with_traces: List of dictionaries with title, content, trace_en_with_think, and optionally trace_hi_with_think
+        entries_with_traces: List of dictionaries with title, content, trace_en_with_think, and optionally trace_hi_with_think or error
         logger: Logger instance for logging
+    
+    Returns:
+        List of row IDs of the saved entries, in input order
     """
     if logger:
-        logger.info(f"Starting to save {len(entries_with_traces)} entries to database")
+        logger.debug(f"Starting to save {len(entries_with_traces)} entries to database")
     
     start_time = time.time()
+    row_ids = []
     
     try:
         cursor = conn.cursor()
         
         for i, entry in enumerate(entries_with_traces, 1):
+            entry_hash = entry.get('content_hash') or content_hash(entry['content'])
+            
+            if entry['trace_en_with_think'] is None:
+                # Failed generation: keep the problem so retry-failed can redo it
+                cursor.execute('''
+                    INSERT INTO leetcode_reasoning (title, content, content_hash, duplicate_of, translation_status)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (entry['title'], entry['content'], entry_hash, entry.get('duplicate_of'), 'pending'))
+                record_failure(conn, cursor.lastrowid, 'generation', entry.get('error'), commit=False)
+                row_ids.append(cursor.lastrowid)
+                
+                if logger:
+                    logger.debug(f"Saved failed entry {i}/{len(entries_with_traces)}: {entry['title']} "
+                                 f"(generation error: {entry.get('error')})")
+                continue
+            
+            fields = trace_part_fields(entry['trace_en_with_think'])
+            
             if 'trace_hi_with_think' in entry and entry['trace_hi_with_think']:
                 # Entry with translation
                 cursor.execute('''
-                    INSERT INTO leetcode_reasoning (title, content, trace_en_with_think, trace_hi_with_think, translation_status, translated_at)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (entry['title'], entry['content'], entry['trace_en_with_think'], 
-                      entry['trace_hi_with_think'], 'completed', datetime.now()))
+                    INSERT INTO leetcode_reasoning (title, content, content_hash, duplicate_of, trace_en_with_think,
+                                                    think_en, answer_en, think_token_count, answer_token_count,
+                                                    generation_model, generation_prompt_hash,
+                                                    trace_hi_with_think, think_hi, answer_hi, translation_status,
+                                                    translated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (entry['title'], entry['content'], entry_hash, entry.get('duplicate_of'), entry['trace_en_with_think'],
+                      fields['think_en'], fields['answer_en'], fields['think_token_count'],
+                      fields['answer_token_count'], entry.get('generation_model'), entry.get('generation_prompt_hash'),
+                      entry['trace_hi_with_think'], entry.get('think_hi'), entry.get('answer_hi'), 'completed',
+                      datetime.now()))
             else:
                 # Entry without translation
                 cursor.execute('''
-                    INSERT INTO leetcode_reasoning (title, content, trace_en_with_think, translation_status)
-                    VALUES (?, ?, ?, ?)
-                ''', (entry['title'], entry['content'], entry['trace_en_with_think'], 'pending'))
+                    INSERT INTO leetcode_reasoning (title, content, content_hash, duplicate_of, trace_en_with_think,
+                                                    think_en, answer_en, think_token_count, answer_token_count,
+                                                    generation_model, generation_prompt_hash, translation_status)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (entry['title'], entry['content'], entry_hash, entry.get('duplicate_of'), entry['trace_en_with_think'],
+                      fields['think_en'], fields['answer_en'], fields['think_token_count'],
+                      fields['answer_token_count'], entry.get('generation_model'), entry.get('generation_prompt_hash'),
+                      'pending'))
+            
+            row_ids.append(cursor.lastrowid)
             
             if logger:
-                logger.info(f"Saved entry {i}/{len(entries_with_traces)}: {entry['title']}")
+                logger.debug(f"Saved entry {i}/{len(entries_with_traces)}: {entry['title']} "
+                             f"(think: {fields['think_token_count']} tokens, answer: {fields['answer_token_count']} tokens)")
         
         conn.commit()
         
@@ -252,48 +481,125 @@ def save_to_database(conn: sqlite3.Connection, entries_with_traces: List[Dict[st
         elapsed_time = end_time - start_time
         
         success_msg = f"Successfully saved {len(entries_with_traces)} entries to database in {elapsed_time:.2f} seconds"
-        print(success_msg)
         if logger:
-            logger.info(success_msg)
+            logger.debug(success_msg)
+        
+        return row_ids
         
     except Exception as e:
         error_msg = f"Error saving to database: {e}"
-        print(error_msg)
         if logger:
             logger.error(error_msg)
         raise
 
-def get_untranslated_traces(conn: sqlite3.Connection, logger=None) -> List[Dict[str, Any]]:
+@traced("save_duplicate_entry", "db")
+def save_duplicate_entry(conn: sqlite3.Connection, entry: Dict[str, Any], logger=None) -> int:
+    """
+    Save a skipped near-duplicate without a trace, linked to its canonical problem.
+    
+    Args:
+        conn: SQLite connection object
+        entry: Entry with title, content, content_hash and duplicate_of
+        logger: Logger instance for logging
+    
+    Returns:
+        Row ID of the saved entry
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO leetcode_reasoning (title, content, content_hash, duplicate_of, translation_status)
+        VALUES (?, ?, ?, ?, 'duplicate')
+    ''', (entry['title'], entry['content'], entry['content_hash'], entry['duplicate_of']))
+    conn.commit()
+    
+    if logger:
+        logger.debug(f"Saved near-duplicate without generating: {entry['title']} (duplicate of {entry['duplicate_of']})")
+    return cursor.lastrowid
+
+@traced("update_generated_trace", "db")
+def update_generated_trace(conn: sqlite3.Connection, trace_id: int, trace_en_with_think: str, logger=None,
+                           model: str = None, prompt_hash: str = None) -> None:
+    """
+    Store a regenerated English trace for a row whose generation had failed or is out of date.
+    
+    Any translation of the previous trace is discarded, so the row is translated again.
+    
+    Args:
+        conn: SQLite connection object
+        trace_id: The ID of the trace to update
+        trace_en_with_think: Raw model response including the <think> block
+        logger: Logger instance for logging
+        model: Model that generated the trace
+        prompt_hash: generation_prompt_hash() of the prompt used
+    """
+    fields = trace_part_fields(trace_en_with_think)
+    cursor = conn.cursor()
+    cursor.execute('''
+        UPDATE leetcode_reasoning
+        SET trace_en_with_think = ?, think_en = ?, answer_en = ?,
+            think_token_count = ?, answer_token_count = ?, translation_status = 'pending',
+            generation_model = ?, generation_prompt_hash = ?,
+            trace_hi_with_think = NULL, think_hi = NULL, answer_hi = NULL, translated_at = NULL,
+            translation_issue = NULL, retranslate_parts = NULL,
+            translation_model = NULL, translation_tier = NULL, translation_prompt_hash = NULL
+        WHERE id = ?
+    ''', (trace_en_with_think, fields['think_en'], fields['answer_en'],
+          fields['think_token_count'], fields['answer_token_count'], model, prompt_hash, trace_id))
+    clear_failure(conn, trace_id, 'generation', commit=False)
+    conn.commit()
+    
+    if logger:
+        logger.debug(f"Stored regenerated trace for trace ID: {trace_id}")
+
+def get_untranslated_traces(conn: sqlite3.Connection, logger=None, include_failed: bool = True) -> List[Dict[str, Any]]:
     """
-    Get traces that haven't been translated yet.
+    Get traces that haven't been translated yet, or whose translation was marked invalid.
+    
+    For invalid rows, the previously accepted Hindi sections that do not need
+    re-translation are returned as 'think_hi' / 'answer_hi'.
     
     Args:
         conn: SQLite connection object
         logger: Logger instance for logging
+        include_failed: Also return traces with a recorded translation failure
     
     Returns:
         List of dictionaries containing untranslated traces
     """
     if logger:
-        logger.info("Fetching untranslated traces from database")
+        logger.debug("Fetching untranslated traces from database")
     
     try:
         cursor = conn.cursor()
         cursor.execute('''
-            SELECT id, title, trace_en_with_think 
+            SELECT id, title, trace_en_with_think, think_en, answer_en, think_hi, answer_hi, retranslate_parts
             FROM leetcode_reasoning 
-            WHERE translation_status = 'pending' OR trace_hi_with_think IS NULL
+            WHERE (translation_status IN ('pending', 'invalid') OR trace_hi_with_think IS NULL)
+              AND translation_status IS NOT 'skipped'
+              AND trace_en_with_think IS NOT NULL
+              AND (? OR id NOT IN (SELECT trace_id FROM failures WHERE stage = 'translation'))
             ORDER BY id ASC
-        ''')
+        ''', (include_failed,))
         
         rows = cursor.fetchall()
         traces = []
         
         for row in rows:
+            think_en, answer_en = row[3], row[4]
+            if think_en is None and answer_en is None:
+                parts = split_think_response(row[2])
+                think_en, answer_en = parts['think'], parts['answer']
+            
+            retranslate_parts = row[7]
             traces.append({
                 'id': row[0],
                 'title': row[1],
-                'trace_en_with_think': row[2]
+                'trace_en_with_think': row[2],
+                'think_en': think_en,
+                'answer_en': answer_en,
+                'retranslate_parts': retranslate_parts,
+                'think_hi': row[5] if retranslate_parts == 'answer' else None,
+                'answer_hi': row[6] if retranslate_parts == 'think' else None
             })
         
         if logger:
@@ -303,50 +609,168 @@ def get_untranslated_traces(conn: sqlite3.Connection, logger=None) -> List[Dict[
         
     except Exception as e:
         error_msg = f"Error fetching untranslated traces: {e}"
-        print(error_msg)
         if logger:
             logger.error(error_msg)
         return []
 
-def update_translation_in_database(conn: sqlite3.Connection, trace_id: int, hindi_trace: str, logger=None) -> None:
+def update_translation_in_database(conn: sqlite3.Connection, trace_id: int, hindi_trace: str, logger=None,
+                                   think_hi: str = None, answer_hi: str = None, model: str = None,
+                                   tier: int = None, prompt_hash: str = None) -> None:
     """
     Update the database with the Hindi translation for a specific trace.
     
+    When only some sections were re-translated, the row keeps the larger of
+    its stored tier and the new one, and keeps its stored prompt hash if it
+    differs (the kept section is still from the older prompt).
+    
     Args:
         conn: SQLite connection object
         trace_id: The ID of the trace to update
-        hindi_trace: The Hindi translation of the trace
+        hindi_trace: The combined Hindi translation of the trace
         logger: Logger instance for logging
+        think_hi: Hindi translation of the think section, if translated
+        answer_hi: Hindi translation of the answer section, if translated
+        model: Translation model that produced the translation
+        tier: Cascade tier of that model (0 = smallest)
+        prompt_hash: translation_prompt_hash() of the prompts used
     """
     if logger:
-        logger.info(f"Updating translation for trace ID: {trace_id}")
+        logger.debug(f"Updating translation for trace ID: {trace_id}")
     
     try:
-        cursor = conn.cursor()
-        cursor.execute('''
-            UPDATE leetcode_reasoning 
-            SET trace_hi_with_think = ?, translation_status = 'completed', translated_at = ?
-            WHERE id = ?
-        ''', (hindi_trace, datetime.now(), trace_id))
-        
-        conn.commit()
+        with span("update_translation_in_database", "db", trace_id=trace_id):
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE leetcode_reasoning 
+                SET trace_hi_with_think = ?, think_hi = ?, answer_hi = ?,
+                    translation_status = 'completed', translated_at = ?,
+                    translation_model = CASE WHEN retranslate_parts IN ('think', 'answer') AND translation_tier > ?
+                                             THEN translation_model ELSE ? END,
+                    translation_tier = CASE WHEN retranslate_parts IN ('think', 'answer') AND translation_tier > ?
+                                            THEN translation_tier ELSE ? END,
+                    translation_prompt_hash = CASE WHEN retranslate_parts IN ('think', 'answer')
+                                                        AND translation_prompt_hash IS NOT ?
+                                                   THEN translation_prompt_hash ELSE ? END,
+                    translation_issue = NULL, retranslate_parts = NULL
+                WHERE id = ?
+            ''', (hindi_trace, think_hi, answer_hi, datetime.now(), tier, model, tier, tier,
+                  prompt_hash, prompt_hash, trace_id))
+            clear_failure(conn, trace_id, 'translation', commit=False)
+            
+            conn.commit()
         
         if logger:
-            logger.info(f"Successfully updated translation for trace ID: {trace_id}")
+            logger.debug(f"Successfully updated translation for trace ID: {trace_id}")
         
     except Exception as e:
         error_msg = f"Error updating translation for trace ID {trace_id}: {e}"
-        print(error_msg)
         if logger:
             logger.error(error_msg)
         raise
 
-def process_translations(conn: sqlite3.Connection, logger=None) -> None:
+@traced("mark_translation_invalid", "db")
+def mark_translation_invalid(conn: sqlite3.Connection, trace_id: int, issue: str, parts: str, logger=None,
+                             think_hi: str = None, answer_hi: str = None, commit: bool = True,
+                             model: str = None, tier: int = None, prompt_hash: str = None) -> None:
     """
-    Process all pending translations.
+    Mark a trace's translation as invalid so only the failing sections are translated again.
+    
+    The issue is also recorded in the failures table, so retry-failed picks the row up.
+    
+    Args:
+        conn: SQLite connection object
+        trace_id: The ID of the trace to mark
+        issue: Why the translation was rejected
+        parts: Sections to re-translate: "think", "answer" or "both"
+        logger: Logger instance for logging
+        think_hi: Accepted Hindi think section to keep, if any
+        answer_hi: Accepted Hindi answer section to keep, if any
+        commit: Commit immediately (False when marking many rows in one transaction)
+        model: Translation model that produced the kept sections, if any
+        tier: Cascade tier of that model
+        prompt_hash: translation_prompt_hash() of the prompts that produced them
+    """
+    if logger:
+        logger.warning(f"Marking translation of trace ID {trace_id} invalid ({parts}): {issue}")
+    
+    cursor = conn.cursor()
+    cursor.execute('''
+        UPDATE leetcode_reasoning 
+        SET translation_status = 'invalid', translation_issue = ?, retranslate_parts = ?,
+            think_hi = COALESCE(?, think_hi), answer_hi = COALESCE(?, answer_hi),
+            translation_model = COALESCE(?, translation_model), translation_tier = COALESCE(?, translation_tier),
+            translation_prompt_hash = COALESCE(?, translation_prompt_hash)
+        WHERE id = ?
+    ''', (issue, parts, think_hi, answer_hi, model, tier, prompt_hash, trace_id))
+    record_failure(conn, trace_id, 'translation', issue, commit=False)
+    
+    if commit:
+        conn.commit()
+
+def mark_translation_skipped(conn: sqlite3.Connection, trace_id: int, reason: str, logger=None) -> None:
+    """
+    Mark a trace whose selected sections are all empty, so it is neither stored
+    as a translation nor picked up for translation again.
+    
+    Args:
+        conn: SQLite connection object
+        trace_id: The ID of the trace to mark
+        reason: Why there was nothing to translate
+        logger: Logger instance for logging
+    """
+    if logger:
+        logger.warning(f"Skipping translation of trace ID {trace_id}: {reason}")
+    
+    conn.execute('''
+        UPDATE leetcode_reasoning
+        SET translation_status = 'skipped', translation_issue = ?, trace_hi_with_think = NULL,
+            think_hi = NULL, answer_hi = NULL, retranslate_parts = NULL
+        WHERE id = ?
+    ''', (reason, trace_id))
+    # Retrying cannot help, so the row also leaves the failures table
+    clear_failure(conn, trace_id, 'translation', commit=False)
+    conn.commit()
+
+def save_translation_result(conn: sqlite3.Connection, trace_id: int, translation: Dict[str, Any], logger=None) -> str:
+    """
+    Store a translate_trace_parts result, or mark the row for re-translation if it failed.
     
     Args:
         conn: SQLite connection object
+        trace_id: The ID of the trace
+        translation: Result of translate_trace_parts
+        logger: Logger instance for logging
+    
+    Returns:
+        str: The row's new translation_status: 'completed' if the translation
+            was stored, 'invalid' if it was marked for re-translation, or
+            'skipped' if there was nothing to translate
+    """
+    if translation.get('skipped'):
+        mark_translation_skipped(conn, trace_id, translation['skipped'], logger)
+        return 'skipped'
+    
+    if translation['failed_parts']:
+        # Keep the sections that passed so only the failing ones are redone
+        mark_translation_invalid(conn, trace_id, translation['issue'], translation['failed_parts'], logger,
+                                 think_hi=None if is_translation_error(translation['think_hi']) else translation['think_hi'],
+                                 answer_hi=None if is_translation_error(translation['answer_hi']) else translation['answer_hi'],
+                                 model=translation.get('translation_model'), tier=translation.get('translation_tier'),
+                                 prompt_hash=translation.get('translation_prompt_hash'))
+        return 'invalid'
+    
+    update_translation_in_database(conn, trace_id, translation['trace_hi_with_think'], logger,
+                                   think_hi=translation['think_hi'], answer_hi=translation['answer_hi'],
+                                   model=translation.get('translation_model'), tier=translation.get('translation_tier'),
+                                   prompt_hash=translation.get('translation_prompt_hash'))
+    return 'completed'
+
+def process_translations(writer: DatabaseWriter, logger=None) -> None:
+    """
+    Process all pending translations.
+    
+    Args:
+        writer: Database writer that owns the connection
         logger: Logger instance for logging
     """
     if logger:
@@ -354,174 +778,555 @@ def process_translations(conn: sqlite3.Connection, logger=None) -> None:
         logger.info("STEP: Processing translations")
         logger.info("=" * 40)
     
-    print("\nProcessing translations...")
-    
-    # Get untranslated traces
-    untranslated_traces = get_untranslated_traces(conn, logger)
+    # Get untranslated traces; failed ones are left to retry-failed
+    untranslated_traces = writer.call(get_untranslated_traces, logger, include_failed=False)
     
     if not untranslated_traces:
-        print("No pending translations found.")
         if logger:
             logger.info("No pending translations found")
         return
     
-    print(f"Found {len(untranslated_traces)} traces to translate...")
+    if logger:
+        logger.info(f"Found {len(untranslated_traces)} traces to translate")
     
     for i, trace in enumerate(untranslated_traces, 1):
         trace_start_time = time.time()
-        print(f"\nTranslating trace {i}/{len(untranslated_traces)}: '{trace['title']}'")
-        if logger:
-            logger.info(f"Translating trace {i}/{len(untranslated_traces)}: '{trace['title']}'")
+        trace_logger = with_fields(logger, problem=trace['title'], trace_id=trace['id'], stage='translation')
+        if trace_logger:
+            trace_logger.info(f"Translating trace {i}/{len(untranslated_traces)}: '{trace['title']}'")
         
-        # Translate the trace
-        hindi_trace = translate_reasoning_trace(
-            trace['trace_en_with_think'], 
+        # Translate the trace (only the invalid sections of a previously rejected translation)
+        translation = translate_trace_parts(
+            trace['think_en'], 
+            trace['answer_en'], 
             trace['title'], 
-            logger
+            parts=trace['retranslate_parts'],
+            logger=trace_logger,
+            think_hi=trace['think_hi'],
+            answer_hi=trace['answer_hi']
         )
         
-        # Update the database
-        update_translation_in_database(conn, trace['id'], hindi_trace, logger)
+        # Update the database; a failed write leaves the row pending for a later run
+        try:
+            outcome = writer.call(save_translation_result, trace['id'], translation, trace_logger)
+        except Exception as e:
+            if trace_logger:
+                trace_logger.error(f"Error saving translation of trace ID {trace['id']}: {e}")
+            continue
         
         trace_end_time = time.time()
         trace_elapsed_time = trace_end_time - trace_start_time
         
-        completion_msg = f"Completed translation: {trace['title']} in {trace_elapsed_time:.2f} seconds"
-        print(completion_msg)
-        if logger:
-            logger.info(completion_msg)
-            logger.info("-" * 40)
+        if not trace_logger:
+            continue
+        if outcome == 'completed':
+            trace_logger.info(f"Completed translation: {trace['title']} in {trace_elapsed_time:.2f} seconds",
+                              extra={'elapsed': round(trace_elapsed_time, 3)})
+        elif outcome == 'skipped':
+            trace_logger.info(f"Nothing to translate: {trace['title']} ({translation['skipped']})")
+        else:
+            trace_logger.warning(f"Translation rejected: {trace['title']} ({translation['issue']})")
+
+def generate_entry_trace(entry: Dict[str, str], model_name: str, logger=None) -> Dict[str, Any]:
+    """
+    Generate the reasoning trace for one entry (runs on a generation worker).
+    
+    Args:
+        entry: Dictionary with the problem title and content
+        model_name: Name of the Ollama model to use
+        logger: Logger instance for logging
+    
+    Returns:
+        Dictionary with title, content, trace_en_with_think, generation_time, error
+        (trace_en_with_think is None and error is set if generation failed), and
+        the generation_model / generation_prompt_hash version stamps
+    """
+    start_time = time.time()
+    logger = with_fields(logger, problem=entry['title'], stage='generation')
+    if logger:
+        logger.debug(f"Generating WITH THINK reasoning trace for: '{entry['title']}'")
+    
+    with span("generate_entry_trace", "problem", problem=entry['title']) as span_args:
+        try:
+            trace_en_with_think = get_reasoning_trace_with_think(entry['content'], model_name, logger) or None
+            error = None if trace_en_with_think else "Empty response from model"
+        except Exception as e:
+            trace_en_with_think, error = None, e
+        span_args['failed'] = error is not None
+    
+    return {
+        'title': entry['title'],
+        'content': entry['content'],
+        'trace_en_with_think': trace_en_with_think,
+        'error': error,
+        'generation_time': time.time() - start_time,
+        'generation_model': model_name,
+        'generation_prompt_hash': generation_prompt_hash()
+    }
+
+def translate_entry_trace(entry_with_trace: Dict[str, Any], logger=None) -> Dict[str, Any]:
+    """
+    Translate a generated trace to Hindi (runs on a translation worker).
+    
+    Args:
+        entry_with_trace: Dictionary returned by generate_entry_trace
+        logger: Logger instance for logging
+    
+    Returns:
+        The translate_trace_parts result with an added translation_time
+    """
+    start_time = time.time()
+    logger = with_fields(logger, problem=entry_with_trace['title'], stage='translation')
+    if logger:
+        logger.debug(f"Translating reasoning trace to Hindi for: '{entry_with_trace['title']}'")
+    
+    trace_parts = split_think_response(entry_with_trace['trace_en_with_think'])
+    translation = translate_trace_parts(trace_parts['think'], trace_parts['answer'],
+                                        entry_with_trace['title'], logger=logger)
+    translation['translation_time'] = time.time() - start_time
+    return translation
+
+def generate_and_save_entry(entry: Dict[str, str], model_name: str, writer: DatabaseWriter, logger=None) -> Dict[str, Any]:
+    """
+    Generate the reasoning trace for one entry and save it (runs on a generation worker).
+    
+    Args:
+        entry: Dictionary with the problem title and content
+        model_name: Name of the Ollama model to use
+        writer: Database writer that owns the connection
+        logger: Logger instance for logging
+    
+    Returns:
+        The generate_entry_trace result with the saved row's 'trace_id'
+    """
+    entry_with_trace = generate_entry_trace(entry, model_name, logger)
+    entry_with_trace['trace_id'] = writer.call(save_to_database, [entry_with_trace], logger)[0]
+    return entry_with_trace
+
+def translate_and_save_entry(entry_with_trace: Dict[str, Any], writer: DatabaseWriter, logger=None) -> Dict[str, Any]:
+    """
+    Translate a saved trace to Hindi and store the result (runs on a translation worker).
+    
+    Args:
+        entry_with_trace: Dictionary returned by generate_and_save_entry
+        writer: Database writer that owns the connection
+        logger: Logger instance for logging
+    
+    Returns:
+        The translate_entry_trace result with 'outcome' set to the row's new
+        translation_status ('completed', 'invalid' or 'skipped', see save_translation_result)
+    """
+    translation = translate_entry_trace(entry_with_trace, logger)
+    row_logger = with_fields(logger, problem=entry_with_trace['title'], trace_id=entry_with_trace['trace_id'],
+                             stage='translation')
+    translation['outcome'] = writer.call(save_translation_result, entry_with_trace['trace_id'], translation, row_logger)
+    return translation
+
+def run_estimate(jsonl_file: str, db_file: str, num_entries: int, concurrency: int, shard: tuple = None,
+                 start: int = 0) -> None:
+    """
+    Print a time/token/storage estimate for a slice of the input without calling any model.
+    
+    Args:
+        jsonl_file: Path to the JSONL file
+        db_file: Path to the SQLite database with historical metrics
+        num_entries: Number of entries in the slice
+        concurrency: Concurrency level to estimate for
+        shard: Optional (shard number, number of shards); only that shard's entries are estimated
+        start: First line of the slice (0-based)
+    """
+    if not os.path.exists(jsonl_file):
+        print(f"Error: File {jsonl_file} not found. Exiting.")
+        return
+    
+    conn = None
+    if os.path.exists(db_file):
+        # Read-only: a dry run never migrates or writes the database
+        conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+    
+    try:
+        entries = iter_leetcode_entries(jsonl_file, num_entries, start=start, shard=shard)
+        estimate = estimate_run(conn, entries, concurrency, TRANSLATE_PARTS)
+    finally:
+        if conn is not None:
+            conn.close()
+    
+    print_estimate(estimate)
 
-def main():
+def parse_args(argv=None) -> argparse.Namespace:
+    """
+    Parse command line arguments for the pipeline.
+    
+    Args:
+        argv: Argument list (default: sys.argv[1:])
+    
+    Returns:
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser(description="Generate LeetCode reasoning traces and translate them to Hindi")
+    parser.add_argument("--input", default="leetcode.jsonl", help="Input JSONL file with LeetCode problems")
+    parser.add_argument("--db", default="leetcode_traces.db", help="Database file path")
+    parser.add_argument("--model", default="qwen3:8b", help="Ollama model for trace generation")
+    parser.add_argument("--num-entries", type=int, default=2,
+                        help="Number of problems to process (with --shard: input lines scanned, shared by all shards)")
+    parser.add_argument("--start", type=int, default=0,
+                        help="Index of the first problem to read (0-based); seeks via the input offset index")
+    parser.add_argument("--shard", type=parse_shard, metavar="I/N",
+                        help="Only process problems whose content hash falls in shard I of N, "
+                             "writing to a per-shard database derived from --db")
+    parser.add_argument("--schedule", choices=SCHEDULE_POLICIES, default=SCHEDULE_POLICY,
+                        help="Order in which problems are sent for generation")
+    parser.add_argument("--dedup", choices=DEDUP_MODES, default=DEDUP_MODE,
+                        help="Near-duplicate problems: flag them, skip their generation, or do not check")
+    parser.add_argument("--dedup-threshold", type=float, default=DEDUP_THRESHOLD,
+                        help="Estimated Jaccard similarity above which a problem is a near-duplicate")
+    parser.add_argument("--time-budget", type=parse_duration, default=TIME_BUDGET, metavar="DURATION",
+                        help="Wall-clock budget such as 7h30m; new problems stop in time to drain before it ends")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue the slice recorded in the database's checkpoint, skipping stored problems")
+    parser.add_argument("--dry-run", "--estimate", dest="dry_run", action="store_true",
+                        help="Estimate run time, tokens and DB growth from past runs without calling any model")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="Concurrency level assumed by --dry-run (default: generation max from CONCURRENCY_LIMITS)")
+    parser.add_argument("--log-level", type=str.upper, choices=LOG_LEVELS, default=None,
+                        help="Log verbosity; DEBUG adds per-request detail (default: LOG_LEVEL from config)")
+    parser.add_argument("--trace", metavar="FILE", default=None,
+                        help="Write a Chrome/Perfetto trace-event timeline of the run to FILE (default: TRACE_FILE from config)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """
     Main function to orchestrate the entire process.
+    
+    Args:
+        argv: Command line arguments (default: sys.argv[1:])
     """
-    # Setup logging first
-    logger = setup_logging()
+    args = parse_args(argv)
     
     # Configuration
-    JSONL_FILE = "leetcode.jsonl"
-    DB_FILE = "leetcode_traces.db"
-    MODEL_NAME = "qwen3:8b"
-    NUM_ENTRIES = 2
+    JSONL_FILE = args.input
+    DB_FILE = args.db
+    MODEL_NAME = args.model
+    NUM_ENTRIES = args.num_entries
+    
+    if args.dry_run:
+        concurrency = args.concurrency or get_controller('generation').max_limit
+        run_estimate(JSONL_FILE, DB_FILE, NUM_ENTRIES, concurrency, args.shard, args.start)
+        return
+    
+    if args.shard:
+        DB_FILE = shard_db_path(DB_FILE, *args.shard)
+    
+    # Setup logging first
+    logger = setup_logging('leetcode_traces', "LeetCode Reasoning Trace Collection", args.log_level)
+    start_tracing(args.trace)
+    budget = RunBudget(args.time_budget, logger=logger)
+    
+    if args.resume:
+        checkpoint = read_checkpoint(DB_FILE)
+        if checkpoint:
+            # Resume exactly the slice of the interrupted run
+            JSONL_FILE = checkpoint['input']
+            NUM_ENTRIES = checkpoint['num_entries']
+            args.start = checkpoint['start']
+            logger.info(f"Resuming from checkpoint (previous run: {checkpoint.get('stopped') or 'completed'})")
+        else:
+            logger.warning(f"No checkpoint found for {DB_FILE}; resuming the slice given on the command line")
     
     logger.info(f"Configuration:")
     logger.info(f"  - JSONL File: {JSONL_FILE}")
     logger.info(f"  - Database File: {DB_FILE}")
     logger.info(f"  - Model Name: {MODEL_NAME}")
     logger.info(f"  - Number of Entries: {NUM_ENTRIES}")
-    
-    print("Starting LeetCode Reasoning Trace Collection and Translation Pipeline...")
-    print("=" * 70)
+    if args.start:
+        logger.info(f"  - Starting at Entry: {args.start}")
+    if args.shard:
+        logger.info(f"  - Shard: {args.shard[0]} of {args.shard[1]} (by content hash)")
+    logger.info(f"  - Schedule Policy: {args.schedule} (window: {SCHEDULE_WINDOW})")
+    logger.info(f"  - Near-Duplicates: {args.dedup} (threshold: {args.dedup_threshold})")
+    if args.time_budget:
+        logger.info(f"  - Time Budget: {args.time_budget:.0f} seconds (drain reserve: {budget.drain_reserve:.0f} seconds)")
     
     overall_start_time = time.time()
     
     # Step 1: Setup database first
-    print("Step 1: Setting up database...")
     logger.info("=" * 40)
     logger.info("STEP 1: Setting up database")
     logger.info("=" * 40)
     
-    conn = setup_database(DB_FILE, logger)
+    # One writer thread owns the connection; workers save through it
+    writer = DatabaseWriter(DB_FILE, logger)
+    seeded = writer.call(get_token_budget().seed_from_database)
+    logger.info(f"Seeded token budget with {seeded} stored output lengths")
+    
+    # Verify every endpoint has both models before any work is queued
+    ready_endpoints = run_preflight([MODEL_NAME] + translation_models(), logger)
+    if not ready_endpoints:
+        error_msg = "Preflight failed: no Ollama endpoint has the required models. Exiting."
+        logger.error(error_msg)
+        writer.close()
+        return
     
-    # Step 2: Read entries from JSONL file
-    print("\nStep 2: Reading entries from JSONL file...")
+    # Start concurrency where `python cli.py autotune` measured it peaks
+    apply_concurrency_profiles('generation', [MODEL_NAME], logger)
+    apply_concurrency_profiles('translation', translation_models(), logger)
+    
+    # Load both models on every endpoint before timing any real work, with the
+    # num_ctx of the first problem's requests so they do not reload the model
+    # (the problem statement stands in for the English trace to translate)
+    sample_prompts = {}
+    if os.path.exists(JSONL_FILE):
+        for entry in iter_leetcode_entries(JSONL_FILE, 1, None, args.start, args.shard):
+            sample_prompts[MODEL_NAME] = ('generation', build_trace_prompt(entry['content']))
+            for translation_model in translation_models():
+                sample_prompts.setdefault(translation_model, (
+                    'translation', build_translation_prompt(build_trace_context(entry['content']))))
+    logger.info("Warming up models...")
+    warm_up_start_time = time.time()
+    warm_up_models([MODEL_NAME] + translation_models(), logger=logger, sample_prompts=sample_prompts)
+    warm_up_elapsed_time = time.time() - warm_up_start_time
+    logger.info(f"Warm-up completed in {warm_up_elapsed_time:.2f} seconds")
+    overall_start_time = time.time()
+    
+    # Step 2: Stream entries from the JSONL file in scheduled order
     logger.info("=" * 40)
     logger.info("STEP 2: Reading entries from JSONL file")
     logger.info("=" * 40)
     
-    entries = read_leetcode_entries(JSONL_FILE, NUM_ENTRIES, logger)
-    
-    if not entries:
-        error_msg = "No entries found. Exiting."
-        print(error_msg)
+    if not os.path.exists(JSONL_FILE):
+        error_msg = f"Error: File {JSONL_FILE} not found. Exiting."
         logger.error(error_msg)
-        conn.close()
+        writer.close()
         return
     
+    predictor = OutputLengthPredictor()
+    writer.call(predictor.fit_from_database, logger)
+    exclude_keys = None
+    if args.resume:
+        exclude_keys = writer.call(stored_hash_keys)
+        logger.info(f"Skipping {len(exclude_keys)} problems already stored in {DB_FILE}")
+    input_entries = iter_leetcode_entries(JSONL_FILE, NUM_ENTRIES, logger, args.start, args.shard, exclude_keys)
+    if args.dedup != 'off':
+        # Problems stored by earlier runs (and excluded above on --resume) are
+        # still compared against, so their near-duplicates are caught too
+        dedup_index = NearDuplicateIndex(args.dedup_threshold)
+        writer.call(index_stored_problems, dedup_index, logger)
+        input_entries = mark_near_duplicates(input_entries, dedup_index, logger)
+    scheduled_entries = schedule_entries(input_entries, args.schedule, SCHEDULE_WINDOW, predictor, logger)
+    
     # Step 3: Generate reasoning traces and save to database
-    print("\nStep 3: Generating reasoning traces...")
     logger.info("=" * 40)
     logger.info("STEP 3: Generating reasoning traces")
     logger.info("=" * 40)
     
-    for i, entry in enumerate(entries, 1):
-        entry_start_time = time.time()
-        print(f"\nProcessing entry {i}/{len(entries)}: '{entry['title']}'")
-        logger.info(f"Processing entry {i}/{len(entries)}: '{entry['title']}'")
-        logger.info(f"Entry content length: {len(entry['content'])} characters")
-        
-        # Generate WITH THINK reasoning trace
-        print("  Generating WITH THINK reasoning trace...")
-        trace_en_with_think = get_reasoning_trace_with_think(entry['content'], MODEL_NAME, logger)
-        
-        # Save trace to database immediately
-        entry_with_trace = {
-            'title': entry['title'],
-            'content': entry['content'],
-            'trace_en_with_think': trace_en_with_think
-        }
-        save_to_database(conn, [entry_with_trace], logger)
-        
-        entry_end_time = time.time()
-        entry_elapsed_time = entry_end_time - entry_start_time
-        completion_msg = f"Completed processing and saved: {entry['title']} in {entry_elapsed_time:.2f} seconds"
-        print(completion_msg)
-        logger.info(completion_msg)
-        logger.info("-" * 40)
-        
-        # Step 4: Translate the trace immediately after saving
-        print("  Translating reasoning trace to Hindi...")
-        logger.info("Starting translation for current entry")
-        
-        translation_start_time = time.time()
-        hindi_trace = translate_reasoning_trace(trace_en_with_think, entry['title'], logger)
-        
-        # Update database with translation
-        cursor = conn.cursor()
-        cursor.execute('''
-            UPDATE leetcode_reasoning 
-            SET trace_hi_with_think = ?, translation_status = 'completed', translated_at = ?
-            WHERE title = ? AND trace_en_with_think = ?
-        ''', (hindi_trace, datetime.now(), entry['title'], trace_en_with_think))
-        conn.commit()
-        
-        translation_end_time = time.time()
-        translation_elapsed_time = translation_end_time - translation_start_time
-        
-        translation_completion_msg = f"Completed translation: {entry['title']} in {translation_elapsed_time:.2f} seconds"
-        print(translation_completion_msg)
-        logger.info(translation_completion_msg)
-        
-        total_entry_time = entry_end_time - entry_start_time + translation_elapsed_time
-        print(f"Total time for entry '{entry['title']}': {total_entry_time:.2f} seconds")
-        logger.info(f"Total time for entry '{entry['title']}': {total_entry_time:.2f} seconds")
-        logger.info("=" * 50)
+    # Generation and translation run in their own worker pools; the adaptive
+    # controllers decide how many requests are actually in flight. Workers save
+    # their results through the writer thread, so SQLite is never shared
+    # across threads and this thread only schedules work.
+    generation_workers = get_controller('generation', logger).max_limit
+    translation_workers = get_controller('translation', logger).max_limit
+    logger.info(f"Worker pools: {generation_workers} generation, {translation_workers} translation")
     
-    # Step 5: Process any remaining translations (fallback)
-    print(f"\nStep 4: Checking for any remaining translations...")
-    process_translations(conn, logger)
+    # Only a couple of entries per worker are queued ahead, so scheduling
+    # decisions are made late and the input is never fully loaded
+    max_queued_generations = generation_workers * 2
+    entries_read = 0
+    generation_failures = 0
+    translation_failures = 0
+    translations_skipped = 0
+    duplicates_skipped = 0
+    entries_cancelled = 0
+    generations_pending = 0
+    input_exhausted = False
+    stopping = False
+    completed = False
     
-    # Close database connection
-    conn.close()
-    logger.info("Database connection closed")
+    # From here on SIGINT/SIGTERM drain the pools instead of killing the run
+    budget.install_signal_handlers()
+    try:
+        with ThreadPoolExecutor(max_workers=generation_workers, thread_name_prefix='generate') as generation_pool, \
+                ThreadPoolExecutor(max_workers=translation_workers, thread_name_prefix='translate') as translation_pool:
+            pending = {}
+            
+            while True:
+                while not input_exhausted and generations_pending < max_queued_generations and not budget.should_stop():
+                    try:
+                        entry = next(scheduled_entries)
+                    except StopIteration:
+                        input_exhausted = True
+                        break
+                    except Exception as e:
+                        error_msg = f"Error reading {JSONL_FILE}: {e}. No further entries will be queued."
+                        logger.error(error_msg)
+                        input_exhausted = True
+                        break
+                    
+                    entries_read += 1
+                    if entry.get('duplicate_of') and args.dedup == 'skip':
+                        try:
+                            writer.call(save_duplicate_entry, entry, logger)
+                            duplicates_skipped += 1
+                        except Exception as e:
+                            # Not stored, so a --resume run considers the problem again
+                            logger.error(f"Error saving near-duplicate '{entry['title']}': {e}",
+                                         extra={'problem': entry['title']})
+                        continue
+                    
+                    logger.debug(f"Queued entry {entries_read}: '{entry['title']}' "
+                                 f"(content length: {len(entry['content'])} characters, "
+                                 f"estimated cost: {entry['estimated_cost']:.0f} tokens)",
+                                 extra={'problem': entry['title'], 'estimated_cost': round(entry['estimated_cost'])})
+                    # Titles can repeat in the input, so each problem's async slice
+                    # is keyed on its position in the input instead
+                    span_id = entries_read
+                    begin_async("problem", span_id, problem=entry['title'])
+                    future = generation_pool.submit(generate_and_save_entry, entry, MODEL_NAME, writer, logger)
+                    pending[future] = ('generate', entry, span_id)
+                    generations_pending += 1
+                
+                if budget.should_stop() and not stopping:
+                    # Drop queued generations that have not started, even when the
+                    # input is already exhausted; --resume picks them up
+                    stopping = True
+                    input_exhausted = True
+                    for future, (stage, entry, span_id) in list(pending.items()):
+                        if stage == 'generate' and future.cancel():
+                            del pending[future]
+                            generations_pending -= 1
+                            entries_cancelled += 1
+                            end_async("problem", span_id, outcome="cancelled")
+                    logger.info(f"Cancelled {entries_cancelled} queued problems; draining {len(pending)} in flight")
+                
+                if not pending:
+                    break
+                
+                # Wake up regularly so the time budget is checked while waiting
+                with span("wait_for_workers", "idle", pending=len(pending)):
+                    done, _ = wait(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, entry, span_id = pending.pop(future)
+                    
+                    if stage == 'generate':
+                        generations_pending -= 1
+                        
+                        # The worker already saved the trace; queue its translation
+                        try:
+                            entry_with_trace = future.result()
+                        except Exception as e:
+                            # e.g. a database error re-raised by the writer; nothing was
+                            # stored, so a --resume run considers the problem again
+                            generation_failures += 1
+                            logger.error(f"Error saving generated trace for '{entry['title']}': {e}",
+                                         extra={'problem': entry['title'], 'stage': 'generation'})
+                            end_async("problem", span_id, outcome="generation not saved")
+                            continue
+                        trace_id = entry_with_trace['trace_id']
+                        problem_logger = with_fields(logger, problem=entry['title'], trace_id=trace_id, stage='generation',
+                                                     elapsed=round(entry_with_trace['generation_time'], 3))
+                        
+                        if entry_with_trace['trace_en_with_think'] is None:
+                            generation_failures += 1
+                            budget.record_problem(entry_with_trace['generation_time'])
+                            problem_logger.error(f"Generation failed: {entry['title']} ({entry_with_trace['error']})")
+                            end_async("problem", span_id, trace_id=trace_id, outcome="generation failed")
+                            continue
+                        
+                        problem_logger.info(f"Completed processing and saved: {entry['title']} "
+                                            f"in {entry_with_trace['generation_time']:.2f} seconds")
+                        
+                        future = translation_pool.submit(translate_and_save_entry, entry_with_trace, writer, logger)
+                        pending[future] = ('translate', entry_with_trace, span_id)
+                    else:
+                        # The worker stored the translation (or marked it for re-translation)
+                        trace_id = entry['trace_id']
+                        try:
+                            translation = future.result()
+                        except Exception as e:
+                            # The row stays pending, so a later translate run picks it up
+                            translation_failures += 1
+                            logger.error(f"Error translating or saving trace ID {trace_id} ('{entry['title']}'): {e}",
+                                         extra={'problem': entry['title'], 'trace_id': trace_id, 'stage': 'translation'})
+                            end_async("problem", span_id, trace_id=trace_id, outcome="translation not saved")
+                            continue
+                        total_entry_time = entry['generation_time'] + translation['translation_time']
+                        budget.record_problem(total_entry_time)
+                        problem_logger = with_fields(logger, problem=entry['title'], trace_id=trace_id, stage='translation',
+                                                     elapsed=round(translation['translation_time'], 3),
+                                                     total_elapsed=round(total_entry_time, 3))
+                        if translation['outcome'] == 'completed':
+                            problem_logger.info(f"Completed translation: {entry['title']} "
+                                                f"in {translation['translation_time']:.2f} seconds "
+                                                f"(total for entry: {total_entry_time:.2f} seconds)")
+                            end_async("problem", span_id, trace_id=trace_id, outcome="completed")
+                        elif translation['outcome'] == 'skipped':
+                            translations_skipped += 1
+                            problem_logger.info(f"Nothing to translate: {entry['title']} ({translation['skipped']})")
+                            end_async("problem", span_id, trace_id=trace_id, outcome="translation skipped")
+                        else:
+                            translation_failures += 1
+                            problem_logger.warning(f"Translation rejected: {entry['title']} ({translation['issue']})")
+                            end_async("problem", span_id, trace_id=trace_id, outcome="translation rejected")
+        
+        if entries_read == 0 and budget.stop_reason is None:
+            error_msg = "No entries found. Exiting."
+            logger.error(error_msg)
+            # Nothing to resume, so no checkpoint is written
+            completed = True
+            return
+        
+        # Step 4: Process any remaining translations (fallback); skipped when
+        # stopping early, since they may belong to earlier runs and take long
+        if budget.stop_reason is None:
+            process_translations(writer, logger)
+        completed = True
+    finally:
+        # Also reached when the run fails: queued writes are still flushed and
+        # the checkpoint records how far the run got, so --resume can continue
+        budget.restore_signal_handlers()
+        try:
+            writer.close()
+            logger.info("Database connection closed")
+        finally:
+            if entries_read or budget.stop_reason is not None or not completed:
+                write_checkpoint(DB_FILE, {
+                    'input': JSONL_FILE,
+                    'start': args.start,
+                    'num_entries': NUM_ENTRIES,
+                    'shard': args.shard,
+                    'stopped': budget.stop_reason or (None if completed else 'error'),
+                    'entries_read': entries_read - entries_cancelled,
+                    'entries_cancelled': entries_cancelled,
+                }, logger)
     
     overall_end_time = time.time()
     total_elapsed_time = overall_end_time - overall_start_time
     
-    print("\n" + "=" * 70)
-    print("Process completed successfully!")
-    print(f"Generated reasoning traces for {len(entries)} problems")
-    print(f"Translated traces to Hindi for {len(entries)} problems")
-    print(f"Data saved to: {DB_FILE}")
-    print(f"Total execution time: {total_elapsed_time:.2f} seconds")
     logger.info("=" * 60)
-    logger.info("PROCESS COMPLETED SUCCESSFULLY!")
-    logger.info(f"Generated reasoning traces for {len(entries)} problems")
-    logger.info(f"Translated traces to Hindi for {len(entries)} problems")
+    if budget.stop_reason is None:
+        logger.info("PROCESS COMPLETED SUCCESSFULLY!")
+    else:
+        resume_args = f" --shard {args.shard[0]}/{args.shard[1]}" if args.shard else ""
+        logger.warning(f"PROCESS STOPPED EARLY ({budget.stop_reason}); all in-flight problems were saved")
+        logger.warning(f"Continue with: python cli.py generate --resume --db {args.db}{resume_args}")
+    generated = entries_read - entries_cancelled - duplicates_skipped - generation_failures
+    logger.info(f"Generated reasoning traces for {generated} problems")
+    logger.info(f"Translated traces to Hindi for {generated - translation_failures - translations_skipped} problems")
+    if translations_skipped:
+        logger.info(f"Skipped translation of {translations_skipped} traces with no text in the translated sections "
+                    f"(translation_status 'skipped')")
+    if duplicates_skipped:
+        logger.info(f"Skipped {duplicates_skipped} near-duplicate problems (translation_status 'duplicate')")
+    if generation_failures or translation_failures:
+        logger.warning(f"Failed: {generation_failures} generation, {translation_failures} translation "
+                       f"(run `python cli.py retry-failed` to reprocess them)")
+    hedge_stats = get_hedge_policy().stats()
+    if hedge_stats['hedges']:
+        logger.info(f"Hedged {hedge_stats['hedges']} of {hedge_stats['requests']} requests on a second endpoint "
+                    f"({hedge_stats['hedge_wins']} hedges won)")
     logger.info(f"Data saved to: {DB_FILE}")
-    logger.info(f"Total execution time: {total_elapsed_time:.2f} seconds")
+    logger.info(f"Total execution time: {total_elapsed_time:.2f} seconds (plus {warm_up_elapsed_time:.2f} seconds warm-up)")
     logger.info("=" * 60)
+    write_trace(logger)
 
 if __name__ == "__main__":
     main()
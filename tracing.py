@@ -0,0 +1,215 @@
+"""
+Span Tracing
+Lightweight timeline tracing of the pipeline, written as Chrome trace-event
+JSON that opens in Perfetto (https://ui.perfetto.dev) or chrome://tracing.
+
+Spans are recorded per thread, so the timeline shows one track per worker
+with its reads, model requests, retry sleeps and database writes. Counters
+track in-flight requests against the concurrency limit (idle slots), and each
+problem gets an async slice from the moment it is queued until its
+translation is stored, so queueing delays and retry storms are visible.
+
+Tracing is off unless a trace file is set (TRACE_FILE or --trace); span()
+is then a cheap no-op. Events are buffered in memory and written once by
+write_trace(), or at exit.
+"""
+
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+
+# Try to import configuration, fall back to defaults if not found
+try:
+    from config import TRACE_FILE
+except ImportError:
+    TRACE_FILE = None  # Path of the trace-event JSON file; None disables tracing
+
+_events: List[Dict[str, Any]] = []
+_thread_names: Dict[int, str] = {}
+_lock = threading.Lock()
+_trace_file: Optional[str] = None
+_epoch = time.perf_counter()
+_pid = os.getpid()
+
+
+def start_tracing(path: Optional[str] = None) -> bool:
+    """
+    Start recording spans; they are written to `path` by write_trace() or at exit.
+
+    Args:
+        path: Trace file path (default: TRACE_FILE; tracing stays off if neither is set)
+
+    Returns:
+        bool: True if tracing is enabled
+    """
+    global _trace_file
+
+    path = path or TRACE_FILE
+    if not path:
+        return False
+    with _lock:
+        if _trace_file is None:
+            atexit.register(write_trace)
+        _trace_file = path
+        _events.clear()
+    return True
+
+
+def tracing_enabled() -> bool:
+    """Return True if spans are being recorded."""
+    return _trace_file is not None
+
+
+def _now_us() -> float:
+    return (time.perf_counter() - _epoch) * 1e6
+
+
+def _append(event: Dict[str, Any]) -> None:
+    thread = threading.current_thread()
+    tid = threading.get_native_id()
+    event['pid'] = _pid
+    event['tid'] = tid
+    with _lock:
+        _thread_names.setdefault(tid, thread.name)
+        _events.append(event)
+
+
+@contextmanager
+def span(name: str, category: str = "pipeline", **args):
+    """
+    Record the enclosed block as one span on the current thread.
+
+    Args:
+        name: Span name shown in the timeline
+        category: Event category, e.g. "io", "model", "db" or "sleep"
+        **args: Values shown with the span (problem title, trace ID, sizes, ...)
+
+    Yields:
+        The args dictionary; add keys to it to record results such as output sizes
+    """
+    if _trace_file is None:
+        yield args
+        return
+
+    start = _now_us()
+    try:
+        yield args
+    except Exception as e:
+        args['error'] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _append({'name': name, 'cat': category, 'ph': 'X', 'ts': start,
+                 'dur': _now_us() - start, 'args': args})
+
+
+def traced(name: Optional[str] = None, category: str = "pipeline"):
+    """
+    Decorator that records every call of a function as a span.
+
+    Args:
+        name: Span name (default: the function name)
+        category: Event category
+
+    Returns:
+        The decorator
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _trace_file is None:
+                return func(*args, **kwargs)
+            with span(name or func.__name__, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instant(name: str, category: str = "pipeline", **args) -> None:
+    """
+    Record a point-in-time event on the current thread.
+
+    Args:
+        name: Event name
+        category: Event category
+        **args: Values shown with the event
+    """
+    if _trace_file is not None:
+        _append({'name': name, 'cat': category, 'ph': 'i', 's': 't', 'ts': _now_us(), 'args': args})
+
+
+def counter(name: str, **values: float) -> None:
+    """
+    Record the current value of one or more counters, e.g. in-flight requests.
+
+    Args:
+        name: Counter track name
+        **values: Series values at this moment
+    """
+    if _trace_file is not None:
+        _append({'name': name, 'ph': 'C', 'ts': _now_us(), 'args': values})
+
+
+def begin_async(name: str, span_id: Any, category: str = "problem", **args) -> None:
+    """
+    Open an async slice that may end on another thread (e.g. one problem's lifetime).
+
+    Args:
+        name: Slice name
+        span_id: Identifier shared with the matching end_async call
+        category: Event category
+        **args: Values shown with the slice
+    """
+    if _trace_file is not None:
+        _append({'name': name, 'cat': category, 'ph': 'b', 'id': str(span_id), 'ts': _now_us(), 'args': args})
+
+
+def end_async(name: str, span_id: Any, category: str = "problem", **args) -> None:
+    """
+    Close an async slice opened with begin_async.
+
+    Args:
+        name: Slice name
+        span_id: Identifier passed to begin_async
+        category: Event category
+        **args: Values shown with the slice
+    """
+    if _trace_file is not None:
+        _append({'name': name, 'cat': category, 'ph': 'e', 'id': str(span_id), 'ts': _now_us(), 'args': args})
+
+
+def write_trace(logger=None) -> int:
+    """
+    Write the recorded events to the trace file and stop tracing.
+
+    Args:
+        logger: Logger instance for logging
+
+    Returns:
+        Number of events written
+    """
+    global _trace_file
+
+    with _lock:
+        path, _trace_file = _trace_file, None
+        events = list(_events)
+        thread_names = dict(_thread_names)
+        _events.clear()
+    if path is None:
+        return 0
+
+    metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': _pid, 'tid': tid, 'args': {'name': thread_name}}
+                for tid, thread_name in thread_names.items()]
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}, file, ensure_ascii=False, default=str)
+
+    if logger:
+        logger.info(f"Wrote {len(events)} trace events to {path} (open it in https://ui.perfetto.dev)")
+    return len(events)
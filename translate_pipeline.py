@@ -5,40 +5,21 @@ This script can be used to translate existing English traces to Hindi
 independently of the main trace generation process.
 """
 
+import argparse
 import sqlite3
-import logging
 import time
-from datetime import datetime
-from translation import translate_reasoning_trace, setup_logging as setup_translation_logging
-from traceWithThink import setup_database, get_untranslated_traces, update_translation_in_database
-
-def setup_logging():
-    """
-    Setup logging configuration for the standalone translation pipeline.
-    """
-    # Create logs directory if it doesn't exist
-    import os
-    if not os.path.exists('logs'):
-        os.makedirs('logs')
-    
-    # Setup logging configuration
-    log_filename = f"logs/standalone_translation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
-    
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_filename, encoding='utf-8'),
-            logging.StreamHandler()  # Also log to console
-        ]
-    )
-    
-    logger = logging.getLogger(__name__)
-    logger.info("=" * 60)
-    logger.info("Standalone Translation Pipeline - Session Started")
-    logger.info("=" * 60)
-    
-    return logger
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrency import get_controller
+from hedging import get_hedge_policy
+from inference_profiles import apply_concurrency_profiles
+from metrics import flush_metrics
+from translation import (translate_trace_parts_batch, plan_trace_batches, translation_models,
+                         build_translation_prompt, build_trace_context)
+from logging_setup import setup_logging, with_fields, LOG_LEVELS
+from tracing import start_tracing, write_trace
+from preflight import run_preflight
+from warmup import warm_up_models
+from traceWithThink import setup_database, get_untranslated_traces, save_translation_result
 
 def check_database_status(conn: sqlite3.Connection, logger=None) -> dict:
     """
@@ -66,7 +47,7 @@ def check_database_status(conn: sqlite3.Connection, logger=None) -> dict:
         completed_translations = cursor.fetchone()[0]
         
         # Count pending translations
-        cursor.execute('SELECT COUNT(*) FROM leetcode_reasoning WHERE translation_status = "pending" OR trace_hi_with_think IS NULL')
+        cursor.execute('SELECT COUNT(*) FROM leetcode_reasoning WHERE (translation_status IN ("pending", "invalid") OR trace_hi_with_think IS NULL) AND translation_status IS NOT "skipped" AND trace_en_with_think IS NOT NULL')
         pending_translations = cursor.fetchone()[0]
         
         status = {
@@ -85,11 +66,50 @@ def check_database_status(conn: sqlite3.Connection, logger=None) -> dict:
         
     except Exception as e:
         error_msg = f"Error checking database status: {e}"
-        print(error_msg)
         if logger:
             logger.error(error_msg)
         return {}
 
+def save_batch_translation(conn: sqlite3.Connection, trace: dict, translation, trace_logger=None,
+                           start_time: float = None) -> str:
+    """
+    Store the translation of one trace from a translation batch.
+    
+    Args:
+        conn: SQLite connection object
+        trace: The untranslated trace row (from get_untranslated_traces)
+        translation: translate_trace_parts result, or the exception raised by the batch
+        trace_logger: Logger instance for logging, carrying the trace's fields
+        start_time: When the batch was queued, for the elapsed time
+    
+    Returns:
+        str: The outcome of save_translation_result ('completed', 'invalid' or
+            'skipped'), or 'error' if the batch raised
+    """
+    trace_elapsed_time = time.time() - start_time
+    if isinstance(translation, Exception):
+        if trace_logger:
+            trace_logger.error(f"❌ Error translating trace ID {trace['id']} after {trace_elapsed_time:.2f} seconds: "
+                               f"{translation}", extra={'elapsed': round(trace_elapsed_time, 3)})
+        return 'error'
+    
+    # Update the database; failed sections are marked for re-translation
+    outcome = save_translation_result(conn, trace['id'], translation, trace_logger)
+    if outcome == 'skipped':
+        if trace_logger:
+            trace_logger.info(f"Nothing to translate for trace ID {trace['id']}: {translation['skipped']}")
+        return outcome
+    if outcome != 'completed':
+        if trace_logger:
+            trace_logger.error(f"❌ Translation failed for trace ID {trace['id']}: {translation['issue']}")
+        return outcome
+    
+    if trace_logger:
+        trace_logger.info(f"✅ Completed '{trace['title']}' in {trace_elapsed_time:.2f} seconds",
+                          extra={'elapsed': round(trace_elapsed_time, 3),
+                                 'output_chars': len(translation['trace_hi_with_think'])})
+    return outcome
+
 def translate_all_pending_traces(db_file: str = "leetcode_traces.db", logger=None):
     """
     Translate all pending traces in the database.
@@ -101,157 +121,183 @@ def translate_all_pending_traces(db_file: str = "leetcode_traces.db", logger=Non
     if logger:
         logger.info(f"Starting standalone translation pipeline for database: {db_file}")
     
-    print("=" * 60)
-    print("Standalone Translation Pipeline")
-    print("=" * 60)
-    
     overall_start_time = time.time()
     
-    # Connect to database
+    # Connect to database (setup_database also migrates older schemas)
     try:
-        conn = sqlite3.connect(db_file)
-        print(f"Connected to database: {db_file}")
+        conn = setup_database(db_file, logger)
         if logger:
             logger.info(f"Connected to database: {db_file}")
     except Exception as e:
         error_msg = f"Failed to connect to database: {e}"
-        print(error_msg)
         if logger:
             logger.error(error_msg)
         return
     
     # Check database status
-    print("\nChecking database status...")
     status = check_database_status(conn, logger)
     
     if not status:
-        print("Failed to check database status. Exiting.")
         conn.close()
         return
     
-    print(f"Total traces: {status['total_traces']}")
-    print(f"Completed translations: {status['completed_translations']}")
-    print(f"Pending translations: {status['pending_translations']}")
-    
     if status['pending_translations'] == 0:
-        print("\nNo pending translations found. All traces are already translated!")
         if logger:
-            logger.info("No pending translations found")
+            logger.info("No pending translations found. All traces are already translated!")
         conn.close()
         return
     
     # Get untranslated traces
-    print(f"\nFetching {status['pending_translations']} pending traces...")
     untranslated_traces = get_untranslated_traces(conn, logger)
     
     if not untranslated_traces:
-        print("No untranslated traces found despite status check. Exiting.")
+        if logger:
+            logger.warning("No untranslated traces found despite status check")
+        conn.close()
+        return
+    
+    if logger:
+        logger.info(f"Found {len(untranslated_traces)} traces to translate")
+    
+    if not run_preflight(translation_models(), logger):
+        if logger:
+            logger.error("Preflight failed: no Ollama endpoint has the translation models")
         conn.close()
         return
+    apply_concurrency_profiles('translation', translation_models(), logger)
     
-    print(f"Found {len(untranslated_traces)} traces to translate.")
-    print("\nStarting translation process...")
-    print("-" * 60)
+    # Load the translation model before timing starts, so the first
+    # translation is not charged with the model load; it is loaded with the
+    # num_ctx of the first trace's translation so that request does not reload it
+    warm_up_start_time = time.time()
+    first = untranslated_traces[0]
+    sample_prompt = build_translation_prompt(build_trace_context(first['think_en'] or first['trace_en_with_think']))
+    warm_up_models(translation_models(), logger=logger,
+                   sample_prompts={model: ('translation', sample_prompt) for model in translation_models()})
+    flush_metrics(conn)
+    warm_up_elapsed_time = time.time() - warm_up_start_time
+    if logger:
+        logger.info(f"Warm-up completed in {warm_up_elapsed_time:.2f} seconds")
+    overall_start_time = time.time()
     
     # Process translations
     successful_translations = 0
+    skipped_translations = 0
     failed_translations = 0
     
-    for i, trace in enumerate(untranslated_traces, 1):
-        trace_start_time = time.time()
-        print(f"\n[{i}/{len(untranslated_traces)}] Translating: '{trace['title']}'")
-        
-        if logger:
-            logger.info(f"Translating trace {i}/{len(untranslated_traces)}: '{trace['title']}'")
-            logger.info(f"Trace ID: {trace['id']}")
-            logger.info(f"English trace length: {len(trace['trace_en_with_think'])} characters")
-        
-        try:
-            # Translate the trace
-            hindi_trace = translate_reasoning_trace(
-                trace['trace_en_with_think'], 
-                trace['title'], 
-                logger
-            )
-            
-            # Check if translation was successful (not an error message)
-            if hindi_trace.startswith(("Translation error:", "Translation timeout:", "Translation request error:", "Unexpected translation error:")):
-                print(f"  ❌ Translation failed: {hindi_trace}")
+    # Translations run on a worker pool sized to the adaptive controller's
+    # maximum; database updates are applied here as each one finishes.
+    translation_workers = get_controller('translation', logger).max_limit
+    
+    # Translate the think and answer sections separately; rows rejected by
+    # validation only redo their failing sections. Traces whose sections are
+    # all short are batched so their sections share packed requests.
+    items = [{
+        'think_text': trace['think_en'],
+        'answer_text': trace['answer_en'],
+        'problem_title': trace['title'],
+        'parts': trace['retranslate_parts'],
+        'think_hi': trace['think_hi'],
+        'answer_hi': trace['answer_hi'],
+    } for trace in untranslated_traces]
+    batches = plan_trace_batches(items)
+    if logger and len(batches) < len(items):
+        logger.info(f"Packing short traces: {len(items)} traces in {len(batches)} translation batches")
+    
+    with ThreadPoolExecutor(max_workers=translation_workers, thread_name_prefix='translate') as translation_pool:
+        futures = {}
+        for batch in batches:
+            for i in batch:
+                trace = untranslated_traces[i]
                 if logger:
-                    logger.error(f"Translation failed for trace ID {trace['id']}: {hindi_trace}")
-                failed_translations += 1
-                continue
-            
-            # Update the database
-            update_translation_in_database(conn, trace['id'], hindi_trace, logger)
+                    logger.debug(f"Queued trace {i + 1}/{len(untranslated_traces)}: '{trace['title']}' "
+                                 f"({len(trace['trace_en_with_think'])} characters)",
+                                 extra={'problem': trace['title'], 'trace_id': trace['id'], 'stage': 'translation'})
             
-            trace_end_time = time.time()
-            trace_elapsed_time = trace_end_time - trace_start_time
-            
-            print(f"  ✅ Completed in {trace_elapsed_time:.2f} seconds")
-            if logger:
-                logger.info(f"Successfully translated trace ID {trace['id']} in {trace_elapsed_time:.2f} seconds")
-                logger.info(f"Hindi trace length: {len(hindi_trace)} characters")
+            first = untranslated_traces[batch[0]]
+            batch_logger = logger if len(batch) > 1 else \
+                with_fields(logger, problem=first['title'], trace_id=first['id'], stage='translation')
+            future = translation_pool.submit(translate_trace_parts_batch, [items[i] for i in batch], batch_logger)
+            futures[future] = (batch, time.time())
+        
+        for future in as_completed(futures):
+            batch, trace_start_time = futures[future]
+            flush_metrics(conn)
             
-            successful_translations += 1
+            try:
+                translations = future.result()
+            except Exception as e:
+                translations = [e] * len(batch)
             
-        except Exception as e:
-            trace_end_time = time.time()
-            trace_elapsed_time = trace_end_time - trace_start_time
-            error_msg = f"  ❌ Error after {trace_elapsed_time:.2f} seconds: {e}"
-            print(error_msg)
-            if logger:
-                logger.error(f"Error translating trace ID {trace['id']}: {e}")
-            failed_translations += 1
+            for i, translation in zip(batch, translations):
+                trace = untranslated_traces[i]
+                trace_logger = with_fields(logger, problem=trace['title'], trace_id=trace['id'], stage='translation')
+                outcome = save_batch_translation(conn, trace, translation, trace_logger, trace_start_time)
+                if outcome == 'completed':
+                    successful_translations += 1
+                elif outcome == 'skipped':
+                    skipped_translations += 1
+                else:
+                    failed_translations += 1
+    
+    flush_metrics(conn)
     
     # Close database connection
     conn.close()
     if logger:
-        logger.info("Database connection closed")
+        logger.debug("Database connection closed")
     
     overall_end_time = time.time()
     total_elapsed_time = overall_end_time - overall_start_time
     
     # Final summary
-    print("\n" + "=" * 60)
-    print("Translation Pipeline Completed!")
-    print("-" * 60)
-    print(f"Total traces processed: {len(untranslated_traces)}")
-    print(f"Successful translations: {successful_translations}")
-    print(f"Failed translations: {failed_translations}")
-    print(f"Total execution time: {total_elapsed_time:.2f} seconds")
-    if successful_translations > 0:
-        avg_time = total_elapsed_time / successful_translations
-        print(f"Average time per translation: {avg_time:.2f} seconds")
-    print("=" * 60)
-    
     if logger:
         logger.info("=" * 60)
-        logger.info("STANDALONE TRANSLATION PIPELINE COMPLETED!")
+        logger.info("STANDALONE TRANSLATION PIPELINE COMPLETED!",
+                    extra={'processed': len(untranslated_traces), 'succeeded': successful_translations,
+                           'skipped': skipped_translations, 'failed': failed_translations,
+                           'elapsed': round(total_elapsed_time, 3)})
         logger.info(f"Total traces processed: {len(untranslated_traces)}")
         logger.info(f"Successful translations: {successful_translations}")
+        if skipped_translations:
+            logger.info(f"Skipped (nothing to translate): {skipped_translations}")
         logger.info(f"Failed translations: {failed_translations}")
-        logger.info(f"Total execution time: {total_elapsed_time:.2f} seconds")
+        hedge_stats = get_hedge_policy().stats()
+        if hedge_stats['hedges']:
+            logger.info(f"Hedged {hedge_stats['hedges']} of {hedge_stats['requests']} requests on a second endpoint "
+                        f"({hedge_stats['hedge_wins']} hedges won)")
+        logger.info(f"Total execution time: {total_elapsed_time:.2f} seconds (plus {warm_up_elapsed_time:.2f} seconds warm-up)")
         if successful_translations > 0:
             logger.info(f"Average time per translation: {total_elapsed_time / successful_translations:.2f} seconds")
         logger.info("=" * 60)
 
-def main():
+def main(argv=None):
     """
     Main function for the standalone translation pipeline.
+    
+    Args:
+        argv: Command line arguments (default: sys.argv[1:])
     """
+    parser = argparse.ArgumentParser(description="Translate pending English traces to Hindi")
+    parser.add_argument("--db", default="leetcode_traces.db", help="Database file path")
+    parser.add_argument("--log-level", type=str.upper, choices=LOG_LEVELS,
+                        help="Log verbosity (default: LOG_LEVEL from config)")
+    parser.add_argument("--trace", metavar="FILE", default=None,
+                        help="Write a Chrome/Perfetto trace-event timeline of the run to FILE (default: TRACE_FILE from config)")
+    args = parser.parse_args(argv)
+    
     # Setup logging
-    logger = setup_logging()
+    logger = setup_logging('standalone_translation', "Standalone Translation Pipeline", args.log_level)
+    start_tracing(args.trace)
     
     # Configuration
-    DB_FILE = "leetcode_traces.db"
+    DB_FILE = args.db
     
-    print("Starting Standalone Translation Pipeline...")
-    logger.info("Starting standalone translation pipeline")
     logger.info(f"Target database: {DB_FILE}")
     
     # Run translation process
     translate_all_pending_traces(DB_FILE, logger)
+    write_trace(logger)
 
 if __name__ == "__main__":
     main()
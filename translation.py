@@ -1,147 +1,205 @@
-import ollama
-import logging
+import re
 import time
-import os
-from datetime import datetime
-from typing import Optional
+from typing import Optional, Dict, Any, List, Tuple
+from think_parser import strip_think, join_think_response
+import model_calls
+from preflight import get_model_inventory, model_available
+from translation_validator import validate_translation, validate_translations
+from logging_setup import setup_logging
+from tracing import span
+from versions import template_hash, TEMPLATE_PLACEHOLDER
 
 # Try to import configuration, fall back to defaults if not found
 try:
     from config import (
-        TRANSLATION_MODEL_NAME, MAX_RETRIES, RETRY_DELAY
+        TRANSLATION_MODEL_NAME, MAX_RETRIES, RETRY_DELAY, TRANSLATE_PARTS
     )
 except ImportError:
     # Default configuration if config.py doesn't exist
     TRANSLATION_MODEL_NAME = "qwen3:8b"  # Use qwen3:8b for translation via Ollama
     MAX_RETRIES = 3
     RETRY_DELAY = 2
+    TRANSLATE_PARTS = "both"  # Which trace parts to translate: "think", "answer" or "both"
 
-def setup_logging():
+try:
+    from config import PACK_TRANSLATIONS, PACK_MAX_CHARS, PACK_MAX_SEGMENT_CHARS, PACK_MAX_SEGMENTS
+except ImportError:
+    PACK_TRANSLATIONS = True  # Combine short trace sections into one translation request
+    PACK_MAX_CHARS = 6000  # English characters per packed request
+    PACK_MAX_SEGMENT_CHARS = 1500  # Longer sections are always translated on their own
+    PACK_MAX_SEGMENTS = 8  # Sections per packed request
+
+try:
+    from config import TRANSLATION_CASCADE, CASCADE_TIER_ATTEMPTS
+except ImportError:
+    TRANSLATION_CASCADE = None  # Models to try smallest first, e.g. ["qwen3:1.7b", "qwen3:8b"]; None uses TRANSLATION_MODEL_NAME only
+    CASCADE_TIER_ATTEMPTS = 1  # Attempts per tier before escalating; the last tier gets MAX_RETRIES
+
+VALID_TRANSLATE_PARTS = ("think", "answer", "both")
+
+TRANSLATION_ERROR_PREFIXES = (
+    "Translation error",
+    "Translation failed",
+    "Translation timeout:",
+    "Translation request error:",
+    "Unexpected translation error:",
+)
+
+# Segment marker of packed translations, e.g. "[[3]]" at the start of a line
+_PACK_MARKER = re.compile(r"^[ \t]*\[\[(\d+)\]\][ \t]*", re.MULTILINE)
+
+def translation_models() -> List[str]:
+    """
+    Return the translation models of the cascade, smallest (tier 0) first.
+    
+    Returns:
+        TRANSLATION_CASCADE, or just TRANSLATION_MODEL_NAME when no cascade is configured
     """
-    Setup logging configuration for the translation module.
+    return list(TRANSLATION_CASCADE) if TRANSLATION_CASCADE else [TRANSLATION_MODEL_NAME]
+
+def build_translation_prompt(text: str) -> str:
     """
-    # Create logs directory if it doesn't exist
-    if not os.path.exists('logs'):
-        os.makedirs('logs')
+    Build the translation prompt sent to the model.
     
-    # Setup logging configuration
-    log_filename = f"logs/translation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+    Args:
+        text: The English text to translate
     
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_filename, encoding='utf-8'),
-            logging.StreamHandler()  # Also log to console
-        ]
-    )
+    Returns:
+        The full prompt sent to the model
+    """
+    return f"""Translate the following English text to Hindi. Maintain the technical terminology and logical flow. Provide only the Hindi translation without any additional text or explanations.
+
+English text:
+{text}
+
+Hindi translation:"""
+
+def translate_text_to_hindi(text: str, logger=None, source: str = None, model: str = None,
+                            attempts: int = None) -> str:
+    """
+    Translate English text to Hindi using qwen3:8b model through Ollama.
+    
+    Every output is checked by translation_validator (script ratio, length
+    ratio, prompt echo); outputs that fail are retried like request errors.
+    The call, each attempt and each retry sleep are recorded as trace spans.
     
-    logger = logging.getLogger(__name__)
-    logger.info("=" * 60)
-    logger.info("Translation Service (Ollama qwen3:8b) - Session Started")
-    logger.info("=" * 60)
+    Args:
+        text: The English text to translate
+        logger: Logger instance for logging
+        source: The English text without any prompt context, used for validation (default: text)
+        model: Ollama model to use (default: TRANSLATION_MODEL_NAME)
+        attempts: Number of attempts (default: MAX_RETRIES)
     
-    return logger
+    Returns:
+        The translated Hindi text as a string
+    """
+    model = model or TRANSLATION_MODEL_NAME
+    with span("translate_text_to_hindi", "model", input_chars=len(text), model=model) as span_args:
+        translated_text = _translate_with_retries(text, logger, source, model, attempts or MAX_RETRIES)
+        span_args['failed'] = is_translation_error(translated_text)
+        return translated_text
 
-def translate_text_to_hindi(text: str, logger=None) -> str:
+def _translate_with_retries(text: str, logger=None, source: str = None, model: str = TRANSLATION_MODEL_NAME,
+                            attempts: int = MAX_RETRIES) -> str:
     """
-    Translate English text to Hindi using qwen3:8b model through Ollama.
+    Run the translation request with validation and retries (see translate_text_to_hindi).
     
     Args:
         text: The English text to translate
         logger: Logger instance for logging
+        source: The English text without any prompt context, used for validation (default: text)
+        model: Ollama model to use
+        attempts: Number of attempts
     
     Returns:
         The translated Hindi text as a string
     """
     if logger:
-        logger.info(f"Starting translation of text (length: {len(text)} chars)")
+        logger.debug(f"Starting translation of text (length: {len(text)} chars)")
     
     start_time = time.time()
-    start_datetime = datetime.now()
     
     # Create translation prompt for qwen3:8b
-    translation_prompt = f"""Translate the following English text to Hindi. Maintain the technical terminology and logical flow. Provide only the Hindi translation without any additional text or explanations.
-
-English text:
-{text}
-
-Hindi translation:"""
+    translation_prompt = build_translation_prompt(text)
     
     # Retry logic
-    for attempt in range(MAX_RETRIES):
+    for attempt in range(attempts):
         try:
             if logger:
-                logger.info(f"Translation attempt {attempt + 1}/{MAX_RETRIES} using model: {TRANSLATION_MODEL_NAME}")
-                if attempt > 0:
-                    logger.info(f"Retrying after previous attempt failed")
+                logger.debug(f"Translation attempt {attempt + 1}/{attempts} using model: {model}")
             
-            # Use Ollama to call qwen3:8b model for translation
-            response = ollama.generate(
-                model=TRANSLATION_MODEL_NAME,
-                prompt=translation_prompt
-            )
+            # Use Ollama to call the translation model
+            with span("translation_attempt", "model", attempt=attempt + 1):
+                response = model_calls.generate(model, translation_prompt, 'translation', logger)
             
             end_time = time.time()
-            end_datetime = datetime.now()
             elapsed_time = end_time - start_time
             
             if response and 'response' in response:
-                translated_text = response['response'].strip()
+                # qwen3 may prepend an (often empty) <think> block to the translation
+                translated_text = strip_think(response['response'])
                 
-                # Basic validation - check if we got a reasonable translation
-                if len(translated_text) > 0 and translated_text != text:
-                    success_msg = f"Translation completed successfully in {elapsed_time:.2f} seconds (output length: {len(translated_text)} chars)"
-                    print(success_msg)
-                    
+                # Validate against the bare source, not the prompt-wrapped text
+                validation_error = validate_translation(source or text, translated_text)
+                if validation_error is None:
                     if logger:
-                        logger.info(f"Request completed at {end_datetime.strftime('%Y-%m-%d %H:%M:%S')}")
-                        logger.info(f"Translation time: {elapsed_time:.2f} seconds")
-                        logger.info(f"Input length: {len(text)} characters")
-                        logger.info(f"Output length: {len(translated_text)} characters")
-                        logger.info(success_msg)
+                        logger.debug(f"Translation completed in {elapsed_time:.2f} seconds "
+                                     f"(input: {len(text)} chars, output: {len(translated_text)} chars)",
+                                     extra={'elapsed': round(elapsed_time, 3), 'input_chars': len(text),
+                                            'output_chars': len(translated_text), 'attempt': attempt + 1})
                     
                     return translated_text
                 else:
-                    error_msg = f"Invalid translation response: empty or unchanged text"
-                    print(f"Attempt {attempt + 1} failed: {error_msg}")
+                    error_msg = f"Invalid translation response: {validation_error}"
                     if logger:
                         logger.warning(f"Attempt {attempt + 1} failed: {error_msg}")
             else:
                 error_msg = f"Invalid response format from Ollama"
-                print(f"Attempt {attempt + 1} failed: {error_msg}")
                 if logger:
                     logger.warning(f"Attempt {attempt + 1} failed: {error_msg}")
             
-            if attempt < MAX_RETRIES - 1:
-                print(f"Retrying in {RETRY_DELAY} seconds...")
+            if attempt < attempts - 1:
                 if logger:
-                    logger.info(f"Retrying in {RETRY_DELAY} seconds...")
-                time.sleep(RETRY_DELAY)
+                    logger.debug(f"Retrying in {RETRY_DELAY} seconds...")
+                with span("retry_sleep", "sleep", attempt=attempt + 1, delay=RETRY_DELAY):
+                    time.sleep(RETRY_DELAY)
                 start_time = time.time()  # Reset timer for retry
             else:
-                return f"Translation error after {MAX_RETRIES} attempts: Failed to get valid translation"
+                return f"Translation error after {attempts} attempts: {error_msg}"
                     
         except Exception as e:
             end_time = time.time()
             elapsed_time = end_time - start_time
             error_msg = f"Translation request failed after {elapsed_time:.2f} seconds: {e}"
-            print(f"Attempt {attempt + 1} failed: {error_msg}")
             if logger:
                 logger.warning(f"Attempt {attempt + 1} failed: {error_msg}")
             
-            if attempt < MAX_RETRIES - 1:
-                print(f"Retrying in {RETRY_DELAY} seconds...")
+            if attempt < attempts - 1:
                 if logger:
-                    logger.info(f"Retrying in {RETRY_DELAY} seconds...")
-                time.sleep(RETRY_DELAY)
+                    logger.debug(f"Retrying in {RETRY_DELAY} seconds...")
+                with span("retry_sleep", "sleep", attempt=attempt + 1, delay=RETRY_DELAY):
+                    time.sleep(RETRY_DELAY)
                 start_time = time.time()  # Reset timer for retry
             else:
-                return f"Translation error after {MAX_RETRIES} attempts: {str(e)}"
+                return f"Translation error after {attempts} attempts: {str(e)}"
     
     # This should never be reached, but just in case
     return "Translation failed: Maximum retries exceeded"
 
+def build_trace_context(trace_text: str) -> str:
+    """
+    Wrap a reasoning trace with the context used when translating it.
+    
+    Args:
+        trace_text: The reasoning trace text to translate
+    
+    Returns:
+        The trace with translation instructions prepended
+    """
+    return f"""The following is a reasoning trace for a coding problem. Please translate it accurately to Hindi while maintaining the technical terminology and logical flow. Make sure not to use tough hindi words. Instead use simple hindi and use english words wherever technical terms are used.
+
+{trace_text}"""
+
 def translate_reasoning_trace(trace_text: str, problem_title: str = "", logger=None) -> str:
     """
     Translate a reasoning trace from English to Hindi.
@@ -155,56 +213,385 @@ def translate_reasoning_trace(trace_text: str, problem_title: str = "", logger=N
         The translated reasoning trace in Hindi
     """
     if logger:
-        logger.info(f"Translating reasoning trace for problem: '{problem_title}'")
+        logger.debug(f"Translating reasoning trace for problem: '{problem_title}'")
+    
+    translated_trace, _ = translate_with_cascade(trace_text, problem_title, logger)
+    
+    if logger:
+        logger.debug(f"Completed translation for problem: '{problem_title}'")
+    
+    return translated_trace
+
+def translate_with_cascade(trace_text: str, problem_title: str = "", logger=None,
+                           first_tier: int = 0) -> Tuple[str, int]:
+    """
+    Translate a reasoning trace with the cheapest cascade tier whose output passes validation.
+    
+    Each tier except the last gets CASCADE_TIER_ATTEMPTS attempts; a request
+    error or an output rejected by translation_validator escalates to the
+    next, larger model. The last tier gets the usual MAX_RETRIES. Without a
+    TRANSLATION_CASCADE there is a single tier, TRANSLATION_MODEL_NAME.
+    
+    Args:
+        trace_text: The reasoning trace text to translate
+        problem_title: The title of the problem (for logging purposes)
+        logger: Logger instance for logging
+        first_tier: Tier to start at (e.g. 1 when tier 0 already failed in a packed request)
+    
+    Returns:
+        Tuple of (Hindi translation or translation error message, index of the tier that produced it)
+    """
+    models = translation_models()
+    first_tier = min(first_tier, len(models) - 1)
     
     # Add context to help with better translation
-    contextual_prompt = f"""The following is a reasoning trace for a coding problem. Please translate it accurately to Hindi while maintaining the technical terminology and logical flow. Make sure not to use tough hindi words. Instead use simple hindi and use english words wherever technical terms are used.
+    contextual_prompt = build_trace_context(trace_text)
+    
+    for tier in range(first_tier, len(models)):
+        last_tier = tier == len(models) - 1
+        translated_trace = translate_text_to_hindi(contextual_prompt, logger, source=trace_text, model=models[tier],
+                                                   attempts=MAX_RETRIES if last_tier else CASCADE_TIER_ATTEMPTS)
+        if last_tier or not is_translation_error(translated_trace):
+            return translated_trace, tier
+        if logger:
+            logger.info(f"Escalating translation of '{problem_title}' from {models[tier]} to {models[tier + 1]}: "
+                        f"{translated_trace}", extra={'tier': tier + 1, 'model': models[tier + 1]})
 
-{trace_text}"""
+def plan_packs(items: List[List[int]]) -> List[List[int]]:
+    """
+    Group items into packed translation requests.
     
-    translated_trace = translate_text_to_hindi(contextual_prompt, logger)
+    An item is a list of segment lengths (one problem's sections, or a single
+    segment). Items with a segment longer than PACK_MAX_SEGMENT_CHARS are
+    sent on their own; the others are grouped in order until a pack reaches
+    PACK_MAX_CHARS or PACK_MAX_SEGMENTS.
     
-    if logger:
-        logger.info(f"Completed translation for problem: '{problem_title}'")
+    Args:
+        items: Segment lengths of each item
     
-    return translated_trace
+    Returns:
+        Lists of item indices; each list is translated by one worker
+    """
+    packs = []
+    current, chars, count = [], 0, 0
+    for i, lengths in enumerate(items):
+        if (not PACK_TRANSLATIONS or not lengths or max(lengths) > PACK_MAX_SEGMENT_CHARS
+                or len(lengths) > PACK_MAX_SEGMENTS):
+            packs.append([i])
+            continue
+        if current and (chars + sum(lengths) > PACK_MAX_CHARS or count + len(lengths) > PACK_MAX_SEGMENTS):
+            packs.append(current)
+            current, chars, count = [], 0, 0
+        current.append(i)
+        chars += sum(lengths)
+        count += len(lengths)
+    if current:
+        packs.append(current)
+    return packs
 
-def check_ollama_server(logger=None):
+def build_packed_prompt(segments: List[str]) -> str:
     """
-    Check if Ollama server is running and accessible.
+    Build one translation prompt for several numbered trace segments.
     
     Args:
+        segments: The English segments to translate
+    
+    Returns:
+        The full prompt sent to the model
+    """
+    numbered = "\n\n".join(f"[[{number}]]\n{segment}" for number, segment in enumerate(segments, 1))
+    return f"""Below are {len(segments)} numbered segments of reasoning traces for coding problems. Translate each segment accurately to Hindi while maintaining the technical terminology and logical flow. Make sure not to use tough hindi words. Instead use simple hindi and use english words wherever technical terms are used.
+
+Output format: for every segment write its marker ([[1]], [[2]], ...) on its own line, followed by the Hindi translation of that segment only. Keep every marker exactly once and in order, never merge or skip segments, and do not add any other text.
+
+{numbered}"""
+
+def parse_packed_response(text: str, count: int) -> Optional[List[str]]:
+    """
+    Split a packed translation response into its segments.
+    
+    Args:
+        text: Model response to a build_packed_prompt prompt
+        count: Number of segments that were sent
+    
+    Returns:
+        The translated segments in order, or None if the markers are missing,
+        duplicated, out of order, or a segment is empty (misaligned output)
+    """
+    text = strip_think(text)
+    markers = list(_PACK_MARKER.finditer(text))
+    if [int(marker.group(1)) for marker in markers] != list(range(1, count + 1)):
+        return None
+    if text[:markers[0].start()].strip():
+        return None
+    
+    ends = [marker.start() for marker in markers[1:]] + [len(text)]
+    segments = [text[marker.end():end].strip() for marker, end in zip(markers, ends)]
+    if not all(segments):
+        return None
+    return segments
+
+def _translate_pack(segments: List[str], logger=None) -> List[Optional[str]]:
+    """
+    Translate several segments with a single request.
+    
+    There are no retries here: anything that fails is translated again with
+    individual calls by translate_segments. Packs are sent to the first
+    (smallest) model of the translation cascade.
+    
+    Args:
+        segments: The English segments to translate
         logger: Logger instance for logging
     
     Returns:
-        bool: True if server is accessible, False otherwise
+        The translation of each segment, a translation error message for
+        segments that failed validation, or all None if the request failed or
+        the output was misaligned
     """
-    try:
-        # Try to get the list of models to check if Ollama is running
-        import subprocess
-        result = subprocess.run(['ollama', 'list'], capture_output=True, text=True)
+    model = translation_models()[0]
+    with span("translate_pack", "model", segments=len(segments), model=model,
+              input_chars=sum(len(segment) for segment in segments)) as span_args:
+        try:
+            response = model_calls.generate(model, build_packed_prompt(segments), 'translation', logger)
+        except Exception as e:
+            if logger:
+                logger.warning(f"Packed translation of {len(segments)} segments failed: {e}; "
+                               f"falling back to individual calls")
+            span_args['failed'] = True
+            return [None] * len(segments)
         
-        if result.returncode == 0:
+        translated = parse_packed_response((response or {}).get('response') or "", len(segments))
+        if translated is None:
             if logger:
-                logger.info("✅ Ollama server is running and accessible")
-            return True
-        else:
+                logger.warning(f"Packed translation of {len(segments)} segments was misaligned; "
+                               f"falling back to individual calls")
+            span_args['misaligned'] = True
+            return [None] * len(segments)
+        
+        validation_errors = validate_translations(segments, translated)
+        span_args['rejected'] = sum(error is not None for error in validation_errors)
+        return [text if error is None else f"Translation error in packed request: {error}"
+                for text, error in zip(translated, validation_errors)]
+
+def translate_segments(segments: List[str], titles: List[str] = None, logger=None) -> List[Tuple[str, int]]:
+    """
+    Translate trace segments, packing short ones into shared requests.
+    
+    Segments of a pack that come back misaligned are translated again one by
+    one with translate_with_cascade, which retries; segments the pack's model
+    translated but validation rejected start at the next cascade tier.
+    
+    Args:
+        segments: The English trace segments to translate
+        titles: Problem title of each segment (for logging purposes)
+        logger: Logger instance for logging
+    
+    Returns:
+        (Hindi translation or translation error message, cascade tier) of each segment
+    """
+    titles = titles or [""] * len(segments)
+    results = [None] * len(segments)
+    
+    for pack in plan_packs([[len(segment)] for segment in segments]):
+        packed = [None] * len(pack)
+        if len(pack) > 1:
+            packed = _translate_pack([segments[i] for i in pack], logger)
             if logger:
-                logger.warning(f"❌ Ollama server responded with error: {result.stderr}")
-            return False
-            
-    except FileNotFoundError:
-        if logger:
-            logger.warning("❌ Ollama command not found - please install Ollama")
-        return False
-    except Exception as e:
+                accepted = sum(text is not None and not is_translation_error(text) for text in packed)
+                logger.debug(f"Packed translation: {accepted}/{len(pack)} segments accepted from one request")
+        for i, text in zip(pack, packed):
+            if text is not None and not is_translation_error(text):
+                results[i] = (text, 0)
+            else:
+                first_tier = 0 if text is None else 1
+                results[i] = translate_with_cascade(segments[i], titles[i], logger, first_tier=first_tier)
+    
+    return results
+
+def translation_prompt_hash() -> str:
+    """
+    Return the version stamp of the translation prompts.
+    
+    Covers the single-section, trace-context and packed prompt templates, so
+    editing any of them makes previously stored translations stale.
+    
+    Returns:
+        Short hash of the templates (see versions.template_hash)
+    """
+    return template_hash(build_translation_prompt(TEMPLATE_PLACEHOLDER),
+                         build_trace_context(TEMPLATE_PLACEHOLDER),
+                         build_packed_prompt([TEMPLATE_PLACEHOLDER]))
+
+def is_translation_error(text: Optional[str]) -> bool:
+    """
+    Check whether a translation result is an error message rather than a translation.
+    
+    Args:
+        text: The value returned by translate_text_to_hindi
+    
+    Returns:
+        bool: True if the text is an error message
+    """
+    return bool(text) and text.startswith(TRANSLATION_ERROR_PREFIXES)
+
+def translate_trace_parts(think_text: str, answer_text: str, problem_title: str = "",
+                          parts: str = None, logger=None, think_hi: str = None,
+                          answer_hi: str = None) -> Dict[str, Optional[str]]:
+    """
+    Translate the think and answer sections of a reasoning trace separately.
+    
+    Sections not selected by `parts` are skipped and returned as None, unless an
+    already accepted translation of that section is passed in to be kept.
+    When both sections are short they share one packed request.
+    
+    Args:
+        think_text: The <think> reasoning section of the English trace
+        answer_text: The final answer section of the English trace
+        problem_title: The title of the problem (for logging purposes)
+        parts: Which sections to translate: "think", "answer" or "both" (default: TRANSLATE_PARTS)
+        logger: Logger instance for logging
+        think_hi: Accepted Hindi think section to keep when it is not re-translated
+        answer_hi: Accepted Hindi answer section to keep when it is not re-translated
+    
+    Returns:
+        Dictionary with 'think_hi', 'answer_hi', the combined 'trace_hi_with_think',
+        'failed_parts' / 'issue' describing sections that failed (None if all passed),
+        'skipped' with the reason when every selected section is empty (then
+        'trace_hi_with_think' is None and nothing should be stored as completed),
+        the 'translation_tier' / 'translation_model' of the largest cascade tier
+        that produced an accepted section, and the 'translation_prompt_hash' of the
+        prompts used (all None if no section was translated)
+    """
+    if logger:
+        logger.debug(f"Translating trace parts '{parts or TRANSLATE_PARTS}' for problem: '{problem_title}'")
+    
+    return translate_trace_parts_batch([{
+        'think_text': think_text, 'answer_text': answer_text, 'problem_title': problem_title,
+        'parts': parts, 'think_hi': think_hi, 'answer_hi': answer_hi,
+    }], logger)[0]
+
+def trace_segments(item: Dict[str, Any]) -> List[tuple]:
+    """
+    Return the (result key, English text) pairs of a trace that need translating.
+    
+    Args:
+        item: Keyword arguments of translate_trace_parts (think_text, answer_text, parts)
+    
+    Returns:
+        ('think_hi' / 'answer_hi', English section) pairs of the selected, non-empty sections
+    """
+    parts = item.get('parts') or TRANSLATE_PARTS
+    if parts not in VALID_TRANSLATE_PARTS:
+        raise ValueError(f"Invalid translate parts '{parts}', expected one of {VALID_TRANSLATE_PARTS}")
+    segments = []
+    if parts in ("think", "both") and item.get('think_text'):
+        segments.append(('think_hi', item['think_text']))
+    if parts in ("answer", "both") and item.get('answer_text'):
+        segments.append(('answer_hi', item['answer_text']))
+    return segments
+
+def plan_trace_batches(items: List[Dict[str, Any]]) -> List[List[int]]:
+    """
+    Group traces whose sections are all short, so they share packed requests.
+    
+    Args:
+        items: Keyword arguments of translate_trace_parts for each trace
+    
+    Returns:
+        Lists of item indices to pass together to translate_trace_parts_batch
+    """
+    return plan_packs([[len(text) for _, text in trace_segments(item)] for item in items])
+
+def translate_trace_parts_batch(items: List[Dict[str, Any]], logger=None) -> List[Dict[str, Optional[str]]]:
+    """
+    Translate the sections of several traces, packing short sections together.
+    
+    Args:
+        items: Keyword arguments of translate_trace_parts for each trace
+            (think_text, answer_text, problem_title, parts, think_hi, answer_hi)
+        logger: Logger instance for logging
+    
+    Returns:
+        The translate_trace_parts result of each item, in order
+    """
+    slots, segments, titles = [], [], []
+    for n, item in enumerate(items):
+        for key, text in trace_segments(item):
+            slots.append((n, key))
+            segments.append(text)
+            titles.append(item.get('problem_title', ""))
+    
+    if logger:
+        logger.debug(f"Translating {len(segments)} trace sections of {len(items)} problems")
+    
+    results = [{'think_hi': item.get('think_hi'), 'answer_hi': item.get('answer_hi'), 'tier': None} for item in items]
+    # Items whose selected sections are all empty have nothing to translate
+    translated_items = {n for n, _ in slots}
+    for n, item in enumerate(items):
+        if n not in translated_items and item.get('think_hi') is None and item.get('answer_hi') is None:
+            results[n]['skipped'] = f"nothing to translate: selected sections ({item.get('parts') or TRANSLATE_PARTS}) are empty"
+    problem = items[0].get('problem_title', "") if len(items) == 1 else f"{len(items)} problems"
+    with span("translate_trace_parts", "problem", problem=problem, sections=len(segments)):
+        for (n, key), (text, tier) in zip(slots, translate_segments(segments, titles, logger)):
+            results[n][key] = text
+            # A row is credited to the largest tier that produced one of its accepted sections
+            if not is_translation_error(text):
+                results[n]['tier'] = max(tier, results[n]['tier'] if results[n]['tier'] is not None else tier)
+    
+    return [_combine_trace_parts(result['think_hi'], result['answer_hi'], result['tier'], result.get('skipped'))
+            for result in results]
+
+def _combine_trace_parts(think_hi: Optional[str], answer_hi: Optional[str],
+                         tier: Optional[int] = None, skipped: Optional[str] = None) -> Dict[str, Optional[str]]:
+    """Build a translate_trace_parts result from the Hindi think and answer sections."""
+    # Surface the first error as the combined result so callers can detect it
+    errors = {part: text for part, text in (("think", think_hi), ("answer", answer_hi)) if is_translation_error(text)}
+    if errors:
+        combined = next(iter(errors.values()))
+    elif skipped:
+        combined = None
+    else:
+        combined = join_think_response(think_hi or "", answer_hi or "")
+    
+    return {
+        'think_hi': think_hi,
+        'answer_hi': answer_hi,
+        'trace_hi_with_think': combined,
+        'failed_parts': ("both" if len(errors) == 2 else next(iter(errors))) if errors else None,
+        'issue': "; ".join(f"{part}: {text}" for part, text in errors.items()) or skipped,
+        'skipped': skipped,
+        'translation_tier': tier,
+        'translation_model': translation_models()[tier] if tier is not None else None,
+        'translation_prompt_hash': translation_prompt_hash() if tier is not None else None,
+    }
+
+def check_ollama_server(logger=None):
+    """
+    Check if at least one configured Ollama endpoint is running and accessible.
+    
+    Args:
+        logger: Logger instance for logging
+    
+    Returns:
+        bool: True if an endpoint is accessible, False otherwise
+    """
+    inventory = get_model_inventory()
+    reachable = [host for host, entry in inventory.items() if not entry['error']]
+    
+    for host, entry in inventory.items():
         if logger:
-            logger.warning(f"❌ Error checking Ollama server: {e}")
-        return False
+            if entry['error']:
+                logger.warning(f"❌ Ollama endpoint {host} is not accessible: {entry['error']}")
+            else:
+                logger.info(f"✅ Ollama endpoint {host} is running and accessible")
+    
+    return bool(reachable)
 
 def get_available_models(logger=None):
     """
-    Get list of available models from Ollama.
+    Get list of models available on any configured Ollama endpoint.
+    
+    Uses the cached inventory from check_ollama_server when it is still fresh.
     
     Args:
         logger: Logger instance for logging
@@ -212,32 +599,15 @@ def get_available_models(logger=None):
     Returns:
         list: List of available model names
     """
-    try:
-        import subprocess
-        result = subprocess.run(['ollama', 'list'], capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            # Parse the output to extract model names
-            lines = result.stdout.strip().split('\n')
-            model_names = []
-            
-            for line in lines[1:]:  # Skip header line
-                if line.strip():
-                    model_name = line.split()[0]  # First column is model name
-                    model_names.append(model_name)
-            
-            if logger:
-                logger.info(f"Available models: {model_names}")
-            return model_names
-        else:
-            if logger:
-                logger.warning(f"Failed to get models: {result.stderr}")
-            return []
-            
-    except Exception as e:
-        if logger:
-            logger.warning(f"Error getting models: {e}")
-        return []
+    model_names = []
+    for entry in get_model_inventory().values():
+        for model_name in entry['models']:
+            if model_name not in model_names:
+                model_names.append(model_name)
+    
+    if logger:
+        logger.info(f"Available models: {model_names}")
+    return model_names
 
 def test_translation_service(logger=None):
     """
@@ -264,7 +634,7 @@ def test_translation_service(logger=None):
 
 if __name__ == "__main__":
     # Setup logging
-    logger = setup_logging()
+    logger = setup_logging('translation', "Translation Service (Ollama qwen3:8b)")
     
     # Test the translation service
     print("=" * 60)
@@ -281,7 +651,7 @@ if __name__ == "__main__":
         models = get_available_models(logger)
         print(f"Available models: {models}")
         
-        if TRANSLATION_MODEL_NAME in models:
+        if model_available(TRANSLATION_MODEL_NAME, models):
             print(f"✅ {TRANSLATION_MODEL_NAME} model is available")
             test_translation_service(logger)
         else:
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Translation Validator
+Cheap checks that a Hindi translation is actually a translation before it is
+stored as completed:
+
+- Devanagari ratio: share of Devanagari letters among Devanagari + Latin letters
+- Length ratio: translation length relative to the English source
+- Prompt echo: the output repeats the translation instructions (in English or
+  restated in Hindi) or the source
+
+Fenced code blocks are ignored by the script and length checks, since code is
+expected to stay in English. The checks are vectorized with NumPy over a batch
+of rows, so the same validator gates single translations in the pipeline and
+audits a whole database (`python cli.py audit`).
+"""
+
+import re
+import sqlite3
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+# Try to import configuration, fall back to defaults if not found
+try:
+    from config import MIN_DEVANAGARI_RATIO, MIN_LENGTH_RATIO, MAX_LENGTH_RATIO
+except ImportError:
+    MIN_DEVANAGARI_RATIO = 0.25  # Devanagari letters / (Devanagari + Latin letters)
+    MIN_LENGTH_RATIO = 0.3  # translation chars / source chars (outside code blocks)
+    MAX_LENGTH_RATIO = 3.0
+
+# Sources with less prose than this (e.g. an answer that is almost all code)
+# are only checked for emptiness and echoes
+MIN_CHECKED_CHARS = 50
+
+# Leading source characters that must not appear verbatim in the translation
+SOURCE_ECHO_CHARS = 80
+
+# Fragments of the translation prompts (see translation.py) that never belong
+# in a translation
+PROMPT_ECHO_MARKERS = (
+    "translate the following english text",
+    "english text:",
+    "hindi translation:",
+    "the following is a reasoning trace",
+    "make sure not to use tough hindi words",
+    # The same instructions restated in Hindi
+    "निम्नलिखित अंग्रेजी पाठ",
+    "निम्नलिखित अंग्रेज़ी पाठ",
+    "अंग्रेजी पाठ:",
+    "अंग्रेज़ी पाठ:",
+    "हिंदी अनुवाद:",
+    "केवल हिंदी अनुवाद",
+    "कठिन हिंदी शब्दों",
+    "निम्नलिखित एक रीज़निंग ट्रेस",
+    "निम्नलिखित एक तर्क ट्रेस",
+)
+
+DEVANAGARI_RANGE = (0x0900, 0x097F)
+
+# Columns read by the audit, in row order
+AUDIT_COLUMNS = ("id", "title", "think_en", "answer_en", "think_hi", "answer_hi",
+                 "trace_en_with_think", "trace_hi_with_think")
+
+_CODE_BLOCK_PATTERN = re.compile(r"```.*?(?:```|$)", re.DOTALL)
+_ECHO_PATTERN = re.compile("|".join(re.escape(marker) for marker in PROMPT_ECHO_MARKERS))
+
+
+def strip_code_blocks(text: str) -> str:
+    """Remove fenced code blocks (including an unterminated trailing one)."""
+    return _CODE_BLOCK_PATTERN.sub("", text or "")
+
+
+def _row_offsets(texts: List[str]) -> np.ndarray:
+    """Return the end offset of each text in their concatenation."""
+    return np.cumsum([len(text) for text in texts], dtype=np.int64)
+
+
+def _segment_sums(mask: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Sum a per-character mask over consecutive segments ending at `ends`."""
+    totals = np.concatenate(([0], np.cumsum(mask, dtype=np.int64)))
+    starts = np.concatenate(([0], ends[:-1]))
+    return totals[ends] - totals[starts]
+
+
+def script_counts(texts: List[str]) -> Dict[str, np.ndarray]:
+    """
+    Count Devanagari and Latin letters of each text in one pass.
+
+    The texts are concatenated into a single UTF-32 code point array, so the
+    character classification runs once over the whole batch.
+
+    Args:
+        texts: Texts to count
+
+    Returns:
+        Dictionary of per-text arrays: 'devanagari', 'latin' and 'chars'
+    """
+    if not texts:
+        empty = np.zeros(0, dtype=np.int64)
+        return {'devanagari': empty, 'latin': empty, 'chars': empty}
+
+    ends = _row_offsets(texts)
+    codepoints = np.frombuffer("".join(texts).encode("utf-32-le"), dtype=np.uint32)
+
+    devanagari = (codepoints >= DEVANAGARI_RANGE[0]) & (codepoints <= DEVANAGARI_RANGE[1])
+    lowered = codepoints | 0x20  # maps A-Z onto a-z
+    latin = (lowered >= ord("a")) & (lowered <= ord("z"))
+
+    return {
+        'devanagari': _segment_sums(devanagari, ends),
+        'latin': _segment_sums(latin, ends),
+        'chars': np.diff(np.concatenate(([0], ends))),
+    }
+
+
+def prompt_echo_flags(texts: List[str]) -> np.ndarray:
+    """
+    Flag texts that contain a fragment of the translation prompt.
+
+    Args:
+        texts: Translations to check
+
+    Returns:
+        Boolean array, True where a prompt fragment was found
+    """
+    flags = np.zeros(len(texts), dtype=bool)
+    if not texts:
+        return flags
+
+    # Search the whole batch at once and map match positions back to rows;
+    # the separator keeps a match from spanning two texts
+    separated = [text.lower() + "\n" for text in texts]
+    ends = _row_offsets(separated)
+    positions = [match.start() for match in _ECHO_PATTERN.finditer("".join(separated))]
+    if positions:
+        flags[np.searchsorted(ends, positions, side="right")] = True
+    return flags
+
+
+def translation_metrics(sources: List[str], translations: List[str]) -> Dict[str, np.ndarray]:
+    """
+    Compute the validation metrics for a batch of (source, translation) pairs.
+
+    Args:
+        sources: English source texts
+        translations: Hindi translations, in the same order
+
+    Returns:
+        Dictionary of per-row arrays: 'devanagari_ratio', 'length_ratio',
+        'source_chars', 'empty', 'prompt_echo' and 'source_echo'
+    """
+    sources = [source or "" for source in sources]
+    translations = [translation or "" for translation in translations]
+
+    source_prose = [strip_code_blocks(source) for source in sources]
+    translation_prose = [strip_code_blocks(translation) for translation in translations]
+
+    source_counts = script_counts(source_prose)
+    translation_counts = script_counts(translation_prose)
+
+    letters = translation_counts['devanagari'] + translation_counts['latin']
+    with np.errstate(divide="ignore", invalid="ignore"):
+        devanagari_ratio = np.where(letters > 0, translation_counts['devanagari'] / letters, 0.0)
+        length_ratio = np.where(source_counts['chars'] > 0,
+                                translation_counts['chars'] / source_counts['chars'], 0.0)
+
+    source_heads = [source.strip()[:SOURCE_ECHO_CHARS] for source in source_prose]
+    source_echo = np.array([len(head) == SOURCE_ECHO_CHARS and head in translation
+                            for head, translation in zip(source_heads, translations)], dtype=bool)
+
+    return {
+        'devanagari_ratio': devanagari_ratio,
+        'length_ratio': length_ratio,
+        'source_chars': source_counts['chars'],
+        'empty': np.array([not translation.strip() for translation in translations], dtype=bool),
+        'prompt_echo': prompt_echo_flags(translations),
+        'source_echo': source_echo,
+    }
+
+
+def validate_translations(sources: List[str], translations: List[str]) -> List[Optional[str]]:
+    """
+    Validate a batch of translations.
+
+    Args:
+        sources: English source texts
+        translations: Hindi translations, in the same order
+
+    Returns:
+        List with None for each valid translation and the failure reason otherwise
+    """
+    metrics = translation_metrics(sources, translations)
+    checked = metrics['source_chars'] >= MIN_CHECKED_CHARS
+    low_script = checked & (metrics['devanagari_ratio'] < MIN_DEVANAGARI_RATIO)
+    bad_length = checked & ((metrics['length_ratio'] < MIN_LENGTH_RATIO) |
+                            (metrics['length_ratio'] > MAX_LENGTH_RATIO))
+
+    reasons = []
+    for i in range(len(translations)):
+        if metrics['empty'][i]:
+            reasons.append("empty translation")
+        elif metrics['prompt_echo'][i]:
+            reasons.append("prompt echoed in output")
+        elif metrics['source_echo'][i]:
+            reasons.append("English source echoed in output")
+        elif low_script[i]:
+            reasons.append(f"Devanagari ratio {metrics['devanagari_ratio'][i]:.2f} "
+                           f"below {MIN_DEVANAGARI_RATIO}")
+        elif bad_length[i]:
+            reasons.append(f"length ratio {metrics['length_ratio'][i]:.2f} outside "
+                           f"[{MIN_LENGTH_RATIO}, {MAX_LENGTH_RATIO}]")
+        else:
+            reasons.append(None)
+    return reasons
+
+
+def validate_translation(source: str, translation: str) -> Optional[str]:
+    """
+    Validate a single translation.
+
+    Args:
+        source: English source text
+        translation: Hindi translation
+
+    Returns:
+        None if the translation is valid, otherwise the failure reason
+    """
+    return validate_translations([source], [translation])[0]
+
+
+def _reason_class(reason: str) -> str:
+    """Drop the measured values from a failure reason, e.g. 'length ratio'."""
+    return re.sub(r"\s*\d.*$", "", reason)
+
+
+def audit_database(conn: sqlite3.Connection, batch_size: int = 500, mark: bool = True,
+                   logger=None) -> Dict[str, Any]:
+    """
+    Validate every completed translation in the database.
+
+    Rows are read in batches with a streaming cursor. The think and answer
+    sections are validated separately; failing rows are marked 'invalid' with
+    the failing sections recorded, so only those sections are re-translated.
+    Legacy rows that only have trace_hi_with_think are validated as a whole
+    trace against trace_en_with_think and re-translated in full.
+
+    Args:
+        conn: SQLite connection (read-only connections may use an older schema)
+        batch_size: Rows validated per NumPy batch
+        mark: Mark failing rows for re-translation (False only reports)
+        logger: Logger instance for logging
+
+    Returns:
+        Dictionary with 'checked' and 'invalid' counts, a per-reason 'reasons'
+        count and the 'failures' as (id, title, parts, issue) tuples
+    """
+    from traceWithThink import mark_translation_invalid
+
+    # A database opened read-only for a report may predate the split columns
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(leetcode_reasoning)")}
+    selected = ", ".join(column if column in columns else f"NULL AS {column}" for column in AUDIT_COLUMNS)
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT {selected}
+        FROM leetcode_reasoning
+        WHERE translation_status = 'completed'
+        ORDER BY id ASC
+    ''')
+
+    checked = 0
+    reasons: Dict[str, int] = {}
+    failures = []
+
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        checked += len(rows)
+
+        # Validate every translated section of the batch in one call; legacy
+        # rows without split sections are validated as one whole trace
+        sections = []
+        for row_index, row in enumerate(rows):
+            if row[4] is None and row[5] is None:
+                if row[7] is not None:
+                    sections.append((row_index, 'trace', row[6], row[7]))
+                continue
+            sections.extend((row_index, part, source, translation)
+                            for part, source, translation in (('think', row[2], row[4]), ('answer', row[3], row[5]))
+                            if translation is not None)
+        results = validate_translations([section[2] for section in sections],
+                                        [section[3] for section in sections])
+
+        failed_parts: Dict[int, Dict[str, str]] = {}
+        for (row_index, part, _, _), reason in zip(sections, results):
+            if reason:
+                failed_parts.setdefault(row_index, {})[part] = reason
+                reason_class = _reason_class(reason)
+                reasons[reason_class] = reasons.get(reason_class, 0) + 1
+
+        for row_index, parts in failed_parts.items():
+            trace_id, title = rows[row_index][0], rows[row_index][1]
+            retranslate = "both" if len(parts) == 2 or 'trace' in parts else next(iter(parts))
+            issue = "; ".join(f"{part}: {reason}" for part, reason in parts.items())
+            failures.append((trace_id, title, retranslate, issue))
+
+        if logger:
+            logger.info(f"Audited {checked} translations, {len(failures)} invalid so far")
+
+    # Mark after the read cursor is exhausted so updates never disturb it
+    if mark:
+        for trace_id, _, retranslate, issue in failures:
+            mark_translation_invalid(conn, trace_id, issue, retranslate, commit=False)
+        conn.commit()
+
+    return {'checked': checked, 'invalid': len(failures), 'reasons': reasons, 'failures': failures}
+
+
+def main(argv=None):
+    """
+    Main function for the translation audit.
+
+    Args:
+        argv: Command line arguments (default: sys.argv[1:])
+    """
+    import argparse
+    from traceWithThink import setup_database
+
+    parser = argparse.ArgumentParser(description="Validate stored Hindi translations and mark failures for re-translation")
+    parser.add_argument("--db", default="leetcode_traces.db", help="Database file path")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows validated per batch")
+    parser.add_argument("--report-only", action="store_true", help="Report invalid translations without marking them")
+    parser.add_argument("--show", type=int, default=10, help="Number of invalid rows to list")
+    args = parser.parse_args(argv)
+
+    if args.report_only:
+        # Reporting never migrates or writes the database
+        conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    else:
+        conn = setup_database(args.db)
+    try:
+        result = audit_database(conn, args.batch_size, mark=not args.report_only)
+    finally:
+        conn.close()
+
+    print("=" * 60)
+    print("Translation Audit")
+    print("=" * 60)
+    print(f"Checked translations: {result['checked']}")
+    print(f"Invalid translations: {result['invalid']}")
+    for reason, count in sorted(result['reasons'].items(), key=lambda item: -item[1]):
+        print(f"   {reason}: {count}")
+
+    if result['failures'] and args.show > 0:
+        print()
+        for trace_id, title, parts, issue in result['failures'][:args.show]:
+            print(f"   #{trace_id} {title[:40]:<40} | {parts:<6} | {issue}")
+
+    if result['invalid']:
+        print()
+        if args.report_only:
+            print("Report only: no rows were changed.")
+        else:
+            print(f"Marked {result['invalid']} rows as 'invalid'; run `python cli.py translate` to re-translate them.")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
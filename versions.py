@@ -0,0 +1,31 @@
+"""
+Output Versions
+Every generated trace and translation is stamped with the model that
+produced it and a short hash of the prompt templates it was produced with.
+Editing a prompt builder, or switching models, changes the current version;
+`python cli.py backfill` then recomputes only the rows whose stamps no longer
+match (see backfill.py).
+
+A template hash is taken over the prompt builders' output for a fixed
+placeholder input, so it changes with the template text and nothing else.
+"""
+
+import hashlib
+
+# Input passed to prompt builders when hashing their templates
+TEMPLATE_PLACEHOLDER = "{input}"
+# Hex characters of the SHA-256 kept in a stamp
+PROMPT_HASH_CHARS = 12
+
+
+def template_hash(*templates: str) -> str:
+    """
+    Hash one or more rendered prompt templates.
+
+    Args:
+        templates: Prompt builder outputs for TEMPLATE_PLACEHOLDER
+
+    Returns:
+        Hex digest prefix, e.g. "3f9a0c1d7e42"
+    """
+    return hashlib.sha256("\n\x1e\n".join(templates).encode('utf-8')).hexdigest()[:PROMPT_HASH_CHARS]
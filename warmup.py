@@ -0,0 +1,120 @@
+"""
+Model Warm-up
+Preload the trace and translation models on every active endpoint before
+the main loop, so model load time is measured on its own instead of being
+reported as generation time for the first problems.
+
+Ollama reloads a model whenever a request changes its runner options, so a
+model is loaded with the options its first real request will use: the
+num_ctx the token budget picks for a sample prompt, plus the num_thread /
+num_batch of the endpoint's inference profile (see inference_profiles.py).
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from endpoints import get_active_endpoints, get_client
+from inference_profiles import profile_options
+from metrics import record_request
+from token_budget import get_token_budget
+
+# Try to import configuration, fall back to defaults if not found
+try:
+    from config import KEEP_ALIVE
+except ImportError:
+    KEEP_ALIVE = "30m"  # How long Ollama keeps a model resident after its last request
+
+
+def warm_up_model(host: str, model: str, keep_alive: str = KEEP_ALIVE,
+                  options: Optional[Dict[str, Any]] = None) -> Dict[str, float]:
+    """
+    Load one model on one endpoint with an empty prompt.
+
+    Args:
+        host: Ollama server URL
+        model: Model to load
+        keep_alive: How long the model should stay resident
+        options: Runner options (num_ctx, num_thread, num_batch) the model is loaded with
+
+    Returns:
+        Dictionary with the wall-clock 'elapsed' and Ollama-reported 'load' seconds
+    """
+    start_time = time.time()
+    # An empty prompt makes Ollama load the model without generating anything
+    response = get_client(host).generate(model=model, prompt="", options=options or None, keep_alive=keep_alive)
+    elapsed = time.time() - start_time
+    load_seconds = (response.get('load_duration') or 0) / 1e9
+    return {'elapsed': elapsed, 'load': load_seconds}
+
+
+def warm_up_options(host: str, model: str,
+                    sample_prompts: Optional[Dict[str, Tuple[str, str]]] = None) -> Dict[str, Any]:
+    """
+    Return the runner options a model should be loaded with on an endpoint.
+
+    Args:
+        host: Ollama server URL
+        model: Model to load
+        sample_prompts: Model -> (request kind, prompt) of the first request
+            expected for it
+
+    Returns:
+        Dictionary with the endpoint's profile options and the 'num_ctx' of
+        that request (without a sample, only the profile options)
+    """
+    options = profile_options(host, model)
+    if not sample_prompts or model not in sample_prompts:
+        return options
+    kind, prompt = sample_prompts[model]
+    try:
+        options['num_ctx'] = get_token_budget().request_options(prompt, kind)['num_ctx']
+    except ValueError:
+        # The sample itself does not fit; its request will fail on its own
+        pass
+    return options
+
+
+def warm_up_models(models: List[str], keep_alive: str = KEEP_ALIVE, logger=None,
+                   sample_prompts: Optional[Dict[str, Tuple[str, str]]] = None) -> Dict[Tuple[str, str], Dict]:
+    """
+    Preload models on every active endpoint.
+
+    Endpoints are warmed in parallel; models on the same endpoint are loaded
+    one after another so their load times do not overlap.
+
+    Args:
+        models: Models to preload (duplicates are loaded once)
+        keep_alive: How long each model should stay resident
+        logger: Logger instance for logging
+        sample_prompts: Model -> (request kind, prompt) of its first expected
+            request, so the model is loaded with that request's num_ctx
+
+    Returns:
+        Dictionary mapping (host, model) to its timings, or to {'error': message}
+    """
+    models = list(dict.fromkeys(models))
+    hosts = get_active_endpoints()
+
+    def warm_endpoint(host: str) -> Dict[Tuple[str, str], Dict]:
+        results = {}
+        for model in models:
+            try:
+                options = warm_up_options(host, model, sample_prompts)
+                timings = warm_up_model(host, model, keep_alive, options)
+                record_request('load', model, 0, None, None, timings['load'], 1)
+                results[(host, model)] = timings
+                if logger:
+                    logger.info(f"Warm-up: {model} on {host} resident after {timings['elapsed']:.2f} seconds "
+                                f"(model load: {timings['load']:.2f} seconds, keep_alive: {keep_alive}, options: {options})")
+            except Exception as e:
+                results[(host, model)] = {'error': str(e)}
+                if logger:
+                    logger.warning(f"Warm-up failed for {model} on {host}: {e}")
+        return results
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, len(hosts))) as pool:
+        for endpoint_results in pool.map(warm_endpoint, hosts):
+            results.update(endpoint_results)
+    return results